@@ -1,4 +1,6 @@
 from .utils import *
 from .plotting import *
 from .metrics import *
-from .models import *
\ No newline at end of file
+from .models import *
+from .inference import *
+from .plate import *
\ No newline at end of file
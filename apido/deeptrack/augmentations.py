@@ -17,18 +17,35 @@ FlipUD
     Flips images up-down.
 FlipDiagonal
     Flips images diagonally.
+GeometricChain
+    Resolves consecutive geometric augmentations with a single resampling.
+
+Functions
+---------
+fuse_geometric(feature)
+    Fuses consecutive geometric augmentations of a chain of features.
 """
 
-from .features import Feature
+from .features import (
+    Feature,
+    Branch,
+    StructuralFeature,
+    UpdateContext,
+    get_update_context,
+)
 from .image import Image
-from . import utils
+from .dtypes import get_dtype_policy
+from . import tracing, utils
 
 import numpy as np
 import scipy.ndimage as ndimage
 from scipy.ndimage.interpolation import map_coordinates
 from scipy.ndimage.filters import gaussian_filter
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
+import os
+import threading
 import warnings
 
 
@@ -63,9 +80,18 @@ class Augmentation(Feature):
         Function called on the output of the method `.get()`. Overrides
         the default behaviour, allowing full control over how to update
         the properties of the output to account for the augmentation.
+    pool_size : int
+        Number of results from the parent feature to keep. If larger than one,
+        each update draws its input from a random result in the pool. Every
+        `updates_per_reload` updates, a new result is resolved in a background
+        thread, and replaces the oldest result once the pool is full. Inputs are
+        then diverse without resolving the parent feature for each update.
+        Resolving in the background makes the random draws of other features
+        depend on timing, so outputs are not reproducible.
     """
 
     __distributed__ = False
+    __uncached_properties__ = ("hash_key", "update_tally")
 
     def __init__(
         self,
@@ -73,6 +99,7 @@ class Augmentation(Feature):
         load_size: int = 1,
         updates_per_reload: int = 1,
         update_properties: Callable or None = None,
+        pool_size: int = 1,
         **kwargs
     ):
 
@@ -84,6 +111,10 @@ class Augmentation(Feature):
 
         self.feature = feature
 
+        # Whether the parent feature was updated since it was last resolved
+        # for the pool.
+        self._stale = True
+
         def get_number_of_updates(updates_per_reload=1):
             # Updates the number of updates. The very first update is not counted.
             if not hasattr(self.properties["number_of_updates"], "_current_value"):
@@ -109,21 +140,23 @@ class Augmentation(Feature):
             or (lambda load_size: np.random.randint(load_size)),
             number_of_updates=get_number_of_updates,
             update_properties=lambda: update_properties,
+            pool_size=pool_size,
+            pool_index=lambda pool_size: (
+                np.random.randint(pool_size) if pool_size > 1 else 0
+            ),
             **kwargs
         )
 
     def _process_and_get(self, *args, update_properties=None, **kwargs):
 
         # Loads a result from storage
-        if self.feature and (
+        if self.feature and kwargs["pool_size"] > 1:
+            self.cache = self._draw_from_pool(kwargs["pool_size"], kwargs["pool_index"])
+        elif self.feature and (
             not hasattr(self, "cache")
             or kwargs["update_tally"] - self.last_update >= kwargs["updates_per_reload"]
         ):
-
-            if isinstance(self.feature, list):
-                self.cache = [feature.resolve() for feature in self.feature]
-            else:
-                self.cache = self.feature.resolve()
+            self.cache = self._resolve_feature()
             self.last_update = kwargs["update_tally"]
 
         if not self.feature:
@@ -139,32 +172,31 @@ class Augmentation(Feature):
 
         np.random.seed(kwargs["hash_key"][0])
 
-        for image_list in image_list_of_lists:
-            if isinstance(self.feature, list):
-                # If multiple features, ensure consistent rng
-                np.random.seed(kwargs["hash_key"][0])
+        with tracing.span(self, image_list_of_lists, "get") as span:
+            for image_list in image_list_of_lists:
+                if isinstance(self.feature, list):
+                    # If multiple features, ensure consistent rng
+                    np.random.seed(kwargs["hash_key"][0])
 
-            if isinstance(image_list, list):
-                new_list_of_lists.append(
-                    [
+                if isinstance(image_list, list):
+                    new_list_of_lists.append(
                         [
-                            Image(
-                                self.get(Image(image), **kwargs)
-                            ).merge_properties_from(image)
-                            for image in image_list
+                            [
+                                self._get_image(
+                                    Image(image), kwargs
+                                ).merge_properties_from(image)
+                                for image in image_list
+                            ]
                         ]
-                    ]
-                )
-            else:
-                # DANGEROUS
-                # if not isinstance(image_list, Image):
-                image_list = Image(image_list)
-
-                output = self.get(image_list, **kwargs)
+                    )
+                else:
+                    # DANGEROUS
+                    # if not isinstance(image_list, Image):
+                    image_list = Image(image_list)
 
-                if not isinstance(output, Image):
-                    output = Image(output)
-                new_list_of_lists.append(output.merge_properties_from(image_list))
+                    output = self._get_image(image_list, kwargs)
+                    new_list_of_lists.append(output.merge_properties_from(image_list))
+            span.outputs = new_list_of_lists
 
         if update_properties:
             if not isinstance(new_list_of_lists, list):
@@ -178,17 +210,92 @@ class Augmentation(Feature):
 
         return new_list_of_lists
 
+    def _get_image(self, image, kwargs):
+        # Calls get, and returns the output as an Image.
+        if not self.__plain_arrays__:
+            output = self.get(image, **kwargs)
+            return output if isinstance(output, Image) else Image(output)
+
+        # The properties are merged in by the caller.
+        return np.asarray(self.get(np.asarray(image), **kwargs)).view(Image)
+
     def _update(self, **kwargs):
         super()._update(**kwargs)
         if self.feature and not self.number_of_updates.current_value:
+            # The parent feature is not updated while it is being resolved in
+            # the background.
+            if self._is_refreshing():
+                return
             if isinstance(self.feature, Feature):
                 self.feature._update(**kwargs)
             elif isinstance(self.feature, list):
                 [feature._update(**kwargs) for feature in self.feature]
+            self._stale = True
 
     def update_properties(*args, **kwargs):
         pass
 
+    def __getstate__(self):
+        # Background refreshes belong to the original.
+        state = self.__dict__.copy()
+        state.pop("_refresh", None)
+        return state
+
+    def _resolve_feature(self):
+        if isinstance(self.feature, list):
+            return [feature.resolve() for feature in self.feature]
+        return self.feature.resolve()
+
+    def _draw_from_pool(self, pool_size, pool_index):
+        # Returns a result from the pool. Starts resolving the parent feature in
+        # the background if it has been updated, and adds the result to the pool
+        # once resolved. Only waits if the pool is empty.
+
+        if not hasattr(self, "pool"):
+            self.pool = []
+
+        refresh = getattr(self, "_refresh", None)
+        if refresh is not None and refresh[0] != os.getpid():
+            # Started before a fork. The thread does not exist in this process.
+            refresh = None
+            self._stale = True
+
+        if refresh is None and self._stale:
+            refresh = (os.getpid(), _executor().submit(self._resolve_feature))
+            self._stale = False
+
+        if refresh is not None and (refresh[1].done() or not self.pool):
+            self.pool.append(refresh[1].result())
+            del self.pool[:-pool_size]
+            refresh = None
+
+        self._refresh = refresh
+        return self.pool[pool_index % len(self.pool)]
+
+    def _is_refreshing(self):
+        refresh = getattr(self, "_refresh", None)
+        return (
+            refresh is not None and refresh[0] == os.getpid() and not refresh[1].done()
+        )
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def _executor():
+    # Thread pool resolving parent features of augmentations in the background.
+    # Threads do not survive a fork, so each process creates its own.
+    global _background
+
+    with _background_lock:
+        if _background is None or _background[0] != os.getpid():
+            _background = (
+                os.getpid(),
+                ThreadPoolExecutor(thread_name_prefix="augmentation"),
+            )
+        return _background[1]
+
 
 class PreLoad(Augmentation):
     """Simple storage with no augmentation.
@@ -221,6 +328,8 @@ class FlipLR(Augmentation):
     Updates all properties called "position" to flip the second index.
     """
 
+    __plain_arrays__ = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, load_size=1, updates_per_reload=2, **kwargs)
 
@@ -241,6 +350,20 @@ class FlipLR(Augmentation):
                     )
                     prop["position"] = new_position
 
+    def _geometry(self, image, number_of_updates, **kwargs):
+        if not number_of_updates % 2:
+            return _Geometry(image.shape)
+
+        width = image.shape[1]
+
+        def to_input(rows, cols):
+            return rows, width - 1 - cols
+
+        def to_output(position):
+            return (position[0], width - position[1] - 1, *position[2:])
+
+        return _Geometry(image.shape, to_input, to_output)
+
 
 class FlipUD(Augmentation):
     """Flips images up-down.
@@ -248,6 +371,8 @@ class FlipUD(Augmentation):
     Updates all properties called "position" by flipping the first index.
     """
 
+    __plain_arrays__ = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, load_size=1, updates_per_reload=2, **kwargs)
 
@@ -267,6 +392,20 @@ class FlipUD(Augmentation):
                     )
                     prop["position"] = new_position
 
+    def _geometry(self, image, number_of_updates=0, **kwargs):
+        if not number_of_updates % 2:
+            return _Geometry(image.shape)
+
+        height = image.shape[0]
+
+        def to_input(rows, cols):
+            return height - 1 - rows, cols
+
+        def to_output(position):
+            return (height - position[0] - 1, *position[1:])
+
+        return _Geometry(image.shape, to_input, to_output)
+
 
 class FlipDiagonal(Augmentation):
     """Flips images along the main diagonal.
@@ -274,6 +413,8 @@ class FlipDiagonal(Augmentation):
     Updates all properties called "position" by swapping the first and second index.
     """
 
+    __plain_arrays__ = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, load_size=1, updates_per_reload=2, **kwargs)
 
@@ -290,6 +431,22 @@ class FlipDiagonal(Augmentation):
                     new_position = (position[1], position[0], *position[2:])
                     prop["position"] = new_position
 
+    def _geometry(self, image, number_of_updates, axes=(1, 0, 2), **kwargs):
+        if not number_of_updates % 2:
+            return _Geometry(image.shape)
+        if tuple(axes) != (1, 0, *range(2, image.ndim)):
+            return None
+
+        def to_input(rows, cols):
+            return cols, rows
+
+        def to_output(position):
+            return (position[1], position[0], *position[2:])
+
+        return _Geometry(
+            (image.shape[1], image.shape[0], *image.shape[2:]), to_input, to_output
+        )
+
 
 class Affine(Augmentation):
     """
@@ -339,6 +496,8 @@ class Affine(Augmentation):
             * ``5``: ``Bi-quintic``
     """
 
+    __plain_arrays__ = True
+
     def __init__(
         self,
         scale=1,
@@ -395,24 +554,7 @@ class Affine(Augmentation):
             image.ndim
         )
 
-        dx, dy = translate
-        fx, fy = scale
-
-        cr = np.cos(rotate)
-        sr = np.sin(rotate)
-
-        k = np.tan(shear)
-
-        scale_map = np.array([[1 / fx, 0], [0, 1 / fy]])
-        rotation_map = np.array([[cr, sr], [-sr, cr]])
-        shear_map = np.array([[1, 0], [-k, 1]])
-
-        mapping = scale_map @ rotation_map @ shear_map
-
-        shape = image.shape
-        center = np.array(shape[:2]) / 2
-
-        d = center - np.dot(mapping, center) - np.array([dy, dx])
+        mapping, d = _affine_mapping(image.shape, scale, translate, rotate, shear)
 
         # Clean up kwargs
         kwargs.pop("input", False)
@@ -420,49 +562,154 @@ class Affine(Augmentation):
         kwargs.pop("offset", False)
         kwargs.pop("output", False)
 
-        # Call affine_transform
-        if image.ndim == 2:
-            new_image = utils.safe_call(
-                ndimage.affine_transform,
-                input=image,
-                matrix=mapping,
-                offset=d,
-                **kwargs
-            )
-
-            new_image = Image(new_image)
-            new_image.merge_properties_from(image)
-            image = new_image
-
-        elif image.ndim == 3:
-            for z in range(shape[-1]):
-                image[:, :, z] = utils.safe_call(
-                    ndimage.affine_transform,
-                    input=image[:, :, z],
-                    matrix=mapping,
-                    offset=d,
-                    **kwargs
-                )
+        return _affine_transform(image, mapping, d, **kwargs)
 
+    def update_properties(self, image, scale, translate, rotate, shear, **kwargs):
         # Map positions
+        mapping, d = _affine_mapping(image.shape, scale, translate, rotate, shear)
         inverse_mapping = np.linalg.inv(mapping)
         for prop in image.properties:
             if "position" in prop:
                 position = np.array(prop["position"])
                 prop["position"] = np.array(
-                    (
-                        *(
-                            (
-                                inverse_mapping
-                                @ (position[:2] - center + np.array([dy, dx]))
-                                + center
-                            )
-                        ),
-                        *position[3:],
-                    )
+                    (*(inverse_mapping @ (position[:2] - d)), *position[3:])
                 )
 
-        return image
+    def _geometry(
+        self, image, scale, translate, rotate, shear, order, mode, cval, **kwargs
+    ):
+        if image.ndim not in (2, 3):
+            return None
+
+        mapping, d = _affine_mapping(image.shape, scale, translate, rotate, shear)
+        inverse_mapping = np.linalg.inv(mapping)
+
+        def to_input(rows, cols):
+            return (
+                mapping[0, 0] * rows + mapping[0, 1] * cols + d[0],
+                mapping[1, 0] * rows + mapping[1, 1] * cols + d[1],
+            )
+
+        def to_output(position):
+            position = np.array(position)
+            return np.array((*(inverse_mapping @ (position[:2] - d)), *position[3:]))
+
+        return _Geometry(image.shape, to_input, to_output, order, mode, cval)
+
+
+def _affine_mapping(shape, scale, translate, rotate, shear):
+    # Returns the matrix and offset mapping output to input coordinates of the
+    # first two axes, for a transformation about the center of the image.
+
+    dx, dy = translate
+    fx, fy = scale
+
+    cr = np.cos(rotate)
+    sr = np.sin(rotate)
+
+    k = np.tan(shear)
+
+    scale_map = np.array([[1 / fx, 0], [0, 1 / fy]])
+    rotation_map = np.array([[cr, sr], [-sr, cr]])
+    shear_map = np.array([[1, 0], [-k, 1]])
+
+    mapping = scale_map @ rotation_map @ shear_map
+
+    center = np.array(shape[:2]) / 2
+
+    d = center - np.dot(mapping, center) - np.array([dy, dx])
+
+    return mapping, d
+
+
+# OpenCV is an optional dependency, used for fast linear warps.
+try:
+    import cv2
+
+    IMPORTED_CV2 = True
+
+    # scipy modes with the same extension as a cv2 border type. scipy's "wrap"
+    # is not periodic with the size of the image, and has no equivalent.
+    _map_mode_to_cv2_borderType = {
+        "reflect": cv2.BORDER_REFLECT,
+        "grid-mirror": cv2.BORDER_REFLECT,
+        "grid-wrap": cv2.BORDER_WRAP,
+        "constant": cv2.BORDER_CONSTANT,
+        "grid-constant": cv2.BORDER_CONSTANT,
+        "mirror": cv2.BORDER_REFLECT_101,
+        "nearest": cv2.BORDER_REPLICATE,
+    }
+    _map_order_to_cv2_interpolation = {0: cv2.INTER_NEAREST, 1: cv2.INTER_LINEAR}
+    _cv2_dtypes = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+except ImportError:
+    IMPORTED_CV2 = False
+
+
+def _affine_transform(
+    image, mapping, offset, order=1, mode="reflect", cval=0, **kwargs
+):
+    # Applies the same affine map of the first two axes to every channel of
+    # the image. Input coordinates are `mapping @ output + offset`. Linear and
+    # nearest interpolation use cv2 if available, which transforms all
+    # channels in one pass. Unlike scipy, cv2 rounds sampled positions to 1/32
+    # pixel, and blends pixels within one pixel of the edge with `cval` in
+    # constant mode.
+
+    if (
+        IMPORTED_CV2
+        and order in _map_order_to_cv2_interpolation
+        and mode in _map_mode_to_cv2_borderType
+        and image.dtype in _cv2_dtypes
+        and (image.ndim == 2 or image.shape[-1] <= 512)  # CV_CN_MAX
+    ):
+        # cv2 indexes (column, row), and maps output to input coordinates
+        # with WARP_INVERSE_MAP.
+        matrix = np.array(
+            [
+                [mapping[1, 1], mapping[1, 0], offset[1]],
+                [mapping[0, 1], mapping[0, 0], offset[0]],
+            ]
+        )
+        output = cv2.warpAffine(
+            np.ascontiguousarray(image),
+            matrix,
+            (image.shape[1], image.shape[0]),
+            flags=_map_order_to_cv2_interpolation[order] | cv2.WARP_INVERSE_MAP,
+            borderMode=_map_mode_to_cv2_borderType[mode],
+            # A scalar would only fill the first of each four channels.
+            borderValue=(cval,) * 4,
+        )
+        return output.reshape(image.shape)
+
+    if image.ndim == 2:
+        return utils.safe_call(
+            ndimage.affine_transform,
+            input=image,
+            matrix=mapping,
+            offset=offset,
+            order=order,
+            mode=mode,
+            cval=cval,
+            **kwargs
+        )
+
+    # A 3D transform with the channel axis mapped to itself would interpolate
+    # across channels, doing more work per pixel. Instead, each channel is
+    # transformed straight into its plane of the output.
+    output = np.empty_like(image)
+    for z in range(image.shape[-1]):
+        utils.safe_call(
+            ndimage.affine_transform,
+            input=image[..., z],
+            matrix=mapping,
+            offset=offset,
+            output=output[..., z],
+            order=order,
+            mode=mode,
+            cval=cval,
+            **kwargs
+        )
+    return output
 
 
 class ElasticTransformation(Augmentation):
@@ -522,8 +769,17 @@ class ElasticTransformation(Augmentation):
         May take the same values as in :func:`scipy.ndimage.map_coordinates`,
         i.e. ``constant``, ``nearest``, ``reflect`` or ``wrap``.
 
+    grid_spacing : int, optional
+        If given, the distortion fields are drawn on a coarse grid of control points
+        spaced `grid_spacing` pixels apart, and upsampled with cubic interpolation.
+        The fields keep the strength and smoothness set by `alpha` and `sigma`, but
+        are much cheaper to create for large images. Should be at most `sigma / 2`.
+        If None, the fields are drawn at full resolution.
+
     """
 
+    __plain_arrays__ = True
+
     def __init__(
         self,
         alpha=20,
@@ -532,6 +788,7 @@ class ElasticTransformation(Augmentation):
         order=3,
         cval=0,
         mode="constant",
+        grid_spacing=None,
         **kwargs
     ):
         super().__init__(
@@ -541,51 +798,30 @@ class ElasticTransformation(Augmentation):
             order=order,
             cval=cval,
             mode=mode,
+            grid_spacing=grid_spacing,
             **kwargs
         )
 
-    def get(self, image, sigma, alpha, ignore_last_dim, **kwargs):
+    def get(self, image, sigma, alpha, ignore_last_dim, grid_spacing=None, **kwargs):
 
         shape = image.shape
 
         if ignore_last_dim:
             shape = shape[:-1]
 
-        deltas = []
-        ranges = []
-        coordinates = []
-
-        for dim in shape:
-            deltas.append(
-                gaussian_filter(
-                    (np.random.rand(*shape) * 2 - 1),
-                    sigma,
-                    mode="constant",
-                    cval=0,
-                )
-                * alpha
-            )
-
-            ranges.append(np.arange(dim))
+        float_dtype = get_dtype_policy().float
+        deltas = _elastic_displacements(shape, sigma, alpha, grid_spacing, float_dtype)
 
-        grids = list(np.meshgrid(*ranges))
-
-        for grid, delta in zip(grids, deltas):
-            dDim = np.transpose(grid, axes=(1, 0) + tuple(range(2, grid.ndim))) + delta
-            coordinates.append(np.reshape(dDim, (-1, 1)))
+        coordinates = np.indices(shape, dtype=float_dtype)
+        for coordinate, delta in zip(coordinates, deltas):
+            coordinate += delta
 
         if ignore_last_dim:
-            for z in range(image.shape[-1]):
-                image[..., z] = utils.safe_call(
-                    map_coordinates,
-                    input=image[..., z],
-                    coordinates=coordinates,
-                    **kwargs
-                ).reshape(shape)
+            image = _map_channels(image, coordinates, **kwargs)
         else:
             image = utils.safe_call(
                 map_coordinates, input=image, coordinates=coordinates, **kwargs
-            ).reshape(shape)
+            )
 
         # TODO: implement interpolated coordinate mapping for property positions
         # for prop in image:
@@ -593,6 +829,187 @@ class ElasticTransformation(Augmentation):
 
         return image
 
+    def _geometry(
+        self,
+        image,
+        sigma,
+        alpha,
+        ignore_last_dim,
+        order,
+        mode,
+        cval,
+        grid_spacing=None,
+        **kwargs
+    ):
+        spatial_shape = image.shape[:-1] if ignore_last_dim else image.shape
+        if len(spatial_shape) != 2:
+            return None
+
+        float_dtype = get_dtype_policy().float
+        deltas = _elastic_displacements(
+            spatial_shape, sigma, alpha, grid_spacing, float_dtype
+        )
+
+        def to_input(rows, cols):
+            if _is_integral(rows) and _is_integral(cols):
+                indices = (
+                    np.clip(rows, 0, spatial_shape[0] - 1).astype(int),
+                    np.clip(cols, 0, spatial_shape[1] - 1).astype(int),
+                )
+                return rows + deltas[0][indices], cols + deltas[1][indices]
+
+            coordinates = (rows, cols)
+            return (
+                rows + map_coordinates(deltas[0], coordinates, order=1, mode="nearest"),
+                cols + map_coordinates(deltas[1], coordinates, order=1, mode="nearest"),
+            )
+
+        return _Geometry(image.shape, to_input, None, order, mode, cval)
+
+
+def _elastic_displacements(shape, sigma, alpha, grid_spacing, dtype):
+    # Draws one displacement field per axis, at full resolution or on a grid
+    # of control points.
+    if grid_spacing is not None:
+        return _coarse_displacements(shape, sigma, alpha, grid_spacing, dtype)
+
+    return [
+        gaussian_filter(
+            (np.random.rand(*shape) * 2 - 1).astype(dtype, copy=False),
+            sigma,
+            mode="constant",
+            cval=0,
+        )
+        * alpha
+        for _ in shape
+    ]
+
+
+def _coarse_displacements(shape, sigma, alpha, spacing, dtype):
+    # Draws one smooth displacement field per axis on a grid with `spacing`
+    # pixels between control points, and upsamples it to `shape`. Filtering
+    # noise on the grid averages fewer samples than at full resolution, so the
+    # fields are rescaled to the standard deviation of full resolution fields.
+
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (len(shape),))
+    scale = alpha
+    for sigma_i in sigma:
+        scale *= np.sqrt(
+            _gaussian_energy(sigma_i) / _gaussian_energy(sigma_i / spacing)
+        )
+
+    grid_shape = tuple((dim - 1) // spacing + 4 for dim in shape)
+
+    deltas = []
+    for _ in shape:
+        delta = gaussian_filter(
+            (np.random.rand(*grid_shape) * 2 - 1).astype(dtype, copy=False),
+            sigma / spacing,
+            mode="constant",
+            cval=0,
+        )
+        for axis, size in enumerate(shape):
+            delta = _cubic_upsample(delta, axis, size, spacing)
+        deltas.append(delta * scale)
+
+    return deltas
+
+
+def _gaussian_energy(sigma):
+    # Sum of squares of the kernel of `gaussian_filter`.
+    if sigma == 0:
+        return 1.0
+    radius = int(4 * sigma + 0.5)
+    impulse = np.zeros(2 * radius + 1)
+    impulse[radius] = 1
+    return np.sum(ndimage.gaussian_filter1d(impulse, sigma, mode="constant") ** 2)
+
+
+def _cubic_upsample(array, axis, size, spacing):
+    # Interpolates `size` pixels along `axis` from control points `spacing`
+    # pixels apart, using the cubic convolution kernel of Keys (a = -0.5). The
+    # first control point lies one spacing before the first pixel.
+
+    position = np.arange(size) / spacing + 1
+    node = np.floor(position).astype(int)
+    t = position - node
+
+    weights = (
+        ((-0.5 * t + 1) * t - 0.5) * t,
+        (1.5 * t - 2.5) * t * t + 1,
+        ((-1.5 * t + 2) * t + 0.5) * t,
+        (0.5 * t - 0.5) * t * t,
+    )
+
+    broadcast = (-1,) + (1,) * (array.ndim - axis - 1)
+    output = 0
+    for offset, weight in enumerate(weights):
+        output = output + np.take(array, node + offset - 1, axis=axis) * (
+            weight.astype(array.dtype).reshape(broadcast)
+        )
+    return output
+
+
+def _map_channels(image, coordinates, order=3, mode="constant", cval=0, **kwargs):
+    # Maps every channel of the image to the same coordinates of the first
+    # axes. Linear and nearest interpolation use cv2 if available. Otherwise,
+    # the spline coefficients of all channels are computed in one pass, and
+    # each channel is interpolated straight into its plane of the output.
+
+    if (
+        IMPORTED_CV2
+        and order in _map_order_to_cv2_interpolation
+        and mode in _map_mode_to_cv2_borderType
+        and image.dtype in _cv2_dtypes
+        and image.ndim == 3
+    ):
+        # cv2 indexes (column, row), and remaps at most four channels at once.
+        columns = coordinates[1].astype(np.float32, copy=False)
+        rows = coordinates[0].astype(np.float32, copy=False)
+        output = np.empty((*rows.shape, image.shape[-1]), dtype=image.dtype)
+        for start in range(0, image.shape[-1], 4):
+            output[..., start : start + 4] = cv2.remap(
+                np.ascontiguousarray(image[..., start : start + 4]),
+                columns,
+                rows,
+                _map_order_to_cv2_interpolation[order],
+                borderMode=_map_mode_to_cv2_borderType[mode],
+                borderValue=(cval,) * 4,
+            ).reshape(output[..., start : start + 4].shape)
+        return output
+
+    # Channels are moved to the first axis, so that each channel is read and
+    # written contiguously.
+    channels = np.moveaxis(image, -1, 0)
+
+    prefilter = kwargs.pop("prefilter", True)
+    if order > 1 and prefilter and mode not in ("nearest", "grid-constant"):
+        # Same coefficients as map_coordinates, which filters each channel
+        # along every axis. Modes requiring padding are left to scipy.
+        channels = np.ascontiguousarray(channels, dtype=np.float64)
+        for axis in range(1, channels.ndim):
+            ndimage.spline_filter1d(
+                channels, order, axis=axis, output=channels, mode=mode
+            )
+        prefilter = False
+    else:
+        channels = np.ascontiguousarray(channels)
+
+    output = np.empty((len(channels), *coordinates.shape[1:]), dtype=image.dtype)
+    for z in range(len(channels)):
+        utils.safe_call(
+            map_coordinates,
+            input=channels[z],
+            coordinates=coordinates,
+            output=output[z],
+            order=order,
+            mode=mode,
+            cval=cval,
+            prefilter=prefilter,
+            **kwargs
+        )
+    return np.ascontiguousarray(np.moveaxis(output, 0, -1))
+
 
 class Crop(Augmentation):
     """Crops a regions of an image.
@@ -623,6 +1040,34 @@ class Crop(Augmentation):
 
     def get(self, image, corner, crop, crop_mode, **kwargs):
 
+        slice_start, slice_end = self._crop_bounds(image, corner, crop, crop_mode)
+
+        slices = tuple(
+            [
+                slice(slice_start_i, slice_end_i)
+                for slice_start_i, slice_end_i in zip(slice_start, slice_end)
+            ]
+        )
+
+        cropped_image = image[slices]
+
+        # Update positions
+        cropped_image.properties = [dict(prop) for prop in image.properties]
+        for prop in cropped_image.properties:
+            if "position" in prop:
+                position = np.array(prop["position"])
+                try:
+                    position[0:2] -= np.array(slice_start)[0:2]
+                    prop["position"] = position
+                except IndexError:
+                    pass
+
+        return cropped_image
+
+    def _crop_bounds(self, image, corner, crop, crop_mode):
+        # Returns the first and last (exclusive) index of the cropped region
+        # along each axis.
+
         # Get crop argument
         if callable(crop):
             crop = crop(image)
@@ -657,27 +1102,34 @@ class Crop(Augmentation):
             a - c + s for a, s, c in zip(image.shape, slice_start, crop_amount)
         ]
 
-        slices = tuple(
-            [
-                slice(slice_start_i, slice_end_i)
-                for slice_start_i, slice_end_i in zip(slice_start, slice_end)
-            ]
-        )
+        return slice_start, slice_end
 
-        cropped_image = image[slices]
+    def _geometry(self, image, corner, crop, crop_mode, **kwargs):
+        if image.ndim > 3:
+            return None
 
-        # Update positions
-        cropped_image.properties = [dict(prop) for prop in image.properties]
-        for prop in cropped_image.properties:
-            if "position" in prop:
-                position = np.array(prop["position"])
-                try:
-                    position[0:2] -= np.array(slice_start)[0:2]
-                    prop["position"] = position
-                except IndexError:
-                    pass
+        slice_start, slice_end = self._crop_bounds(image, corner, crop, crop_mode)
+        start = np.array(slice_start)
 
-        return cropped_image
+        def to_input(rows, cols):
+            return rows + start[0], cols + start[1]
+
+        def to_output(position):
+            position = np.array(position)
+            try:
+                position[0:2] -= start[0:2]
+            except IndexError:
+                pass
+            return position
+
+        shape = [b - a for a, b in zip(slice_start, slice_end)]
+        shape += image.shape[len(shape) :]
+        if len(slice_start) > 2:
+            channels = slice(slice_start[2], slice_end[2])
+        else:
+            channels = slice(None)
+
+        return _Geometry(shape, to_input, to_output, channels=channels)
 
 
 class CropToMultiplesOf(Crop):
@@ -810,3 +1262,362 @@ class PadToMultiplesOf(Pad):
 
 
 # TODO: add resizing by rescaling
+
+
+class GeometricChain(StructuralFeature):
+    """Resolves consecutive geometric augmentations with a single resampling.
+
+    The coordinate mappings of the augmentations are composed, mapping each pixel
+    of the final output to a position in the input. The input is then
+    interpolated once, and only at the pixels of the final output. This avoids
+    the intermediate images and repeated interpolations of resolving the
+    augmentations one after another, and skips pixels that a final `Crop`
+    would discard.
+
+    Given the same properties, each augmentation draws the same random values as
+    when resolving the augmentations one after another, so the transformation is
+    the same. The output differs in how it is interpolated: once, with the
+    highest `order` of the augmentations, instead of once per augmentation.
+    Outside its input, each augmentation extends the image according to its
+    `mode`.
+
+    Updating a `GeometricChain` draws the properties of the augmentations in a
+    different order than updating them joined by `+`. Use `fuse_geometric` to
+    fuse a chain while drawing the same properties as the original chain.
+
+    Inputs that cannot be fused, such as 3-dimensional images transformed along
+    all axes by an `ElasticTransformation`, are resolved one augmentation at a
+    time.
+
+    Parameters
+    ----------
+    features : list of Feature
+        The augmentations, in the order they are applied. Can be `FlipLR`,
+        `FlipUD`, `FlipDiagonal`, `Affine`, `ElasticTransformation` or `Crop`,
+        without parent features.
+    """
+
+    def __init__(self, features, **kwargs):
+        super().__init__(features=features, **kwargs)
+
+    def get(self, image_list, features, **kwargs):
+
+        feature_inputs = [_feature_input(feature, kwargs) for feature in features]
+
+        # Chained placeholders of the input of each augmentation, for
+        # augmentations that inspect the image.
+        placeholders = [_placeholder(image.shape, image.dtype) for image in image_list]
+        geometries = [[] for _ in image_list]
+        for feature, feature_input in zip(features, feature_inputs):
+            # Same seed as Augmentation._process_and_get.
+            np.random.seed(feature_input["hash_key"][0])
+            for index, placeholder in enumerate(placeholders):
+                geometry = feature._geometry(placeholder, **feature_input)
+                if geometry is None:
+                    return self._resolve_sequentially(image_list, features, kwargs)
+                geometries[index].append(geometry)
+                placeholders[index] = _placeholder(geometry.shape, placeholder.dtype)
+
+        property_verbosity = kwargs.get("property_memorability", 1)
+
+        outputs = []
+        for image, image_geometries in zip(image_list, geometries):
+            output = Image(_resample(image, image_geometries))
+            output.properties = [dict(prop) for prop in image.properties]
+
+            for prop in output.properties:
+                if "position" in prop:
+                    for geometry in image_geometries:
+                        if geometry.to_output is not None:
+                            prop["position"] = geometry.to_output(prop["position"])
+
+            for feature, feature_input in zip(features, feature_inputs):
+                if feature.__property_memorability__ <= property_verbosity:
+                    output.append({**feature_input, "name": type(feature).__name__})
+
+            outputs.append(output)
+
+        return outputs
+
+    def _resolve_sequentially(self, image_list, features, kwargs):
+        for feature in features:
+            image_list = feature.resolve(image_list, **kwargs)
+        return image_list
+
+
+def fuse_geometric(feature):
+    """Fuses consecutive geometric augmentations of a chain of features.
+
+    Each run of two or more geometric augmentations without parent features in a
+    chain of features combined with `+` is replaced by a `GeometricChain`, if the
+    run includes an `Affine` or `ElasticTransformation`.
+
+    Updating the fused chain updates the original chain, so that the properties
+    are drawn from the same random values as without fusing. With the same seed,
+    the fused chain therefore applies the same transformation as the original
+    chain, and only differs in how the images are interpolated.
+
+    Parameters
+    ----------
+    feature : Feature
+        The chain of features.
+
+    Returns
+    -------
+    Feature
+        The fused chain, or `feature` if nothing could be fused.
+
+    Examples
+    --------
+    >>> augmented_data = fuse_geometric(
+    ...     cropped_data + flip + affine + distortion + cropping
+    ... )
+    """
+
+    features = _unchain(feature)
+
+    chain = []
+    run = []
+    for item in features + [None]:
+        if _is_geometric(item):
+            run.append(item)
+            continue
+
+        if len(run) > 1 and any(isinstance(item, _interpolating) for item in run):
+            chain.append(GeometricChain(run))
+        else:
+            chain.extend(run)
+        run = []
+
+        if item is not None:
+            chain.append(item)
+
+    if len(chain) == len(features):
+        return feature
+
+    fused = chain[0]
+    for item in chain[1:]:
+        fused = fused + item
+    return _FusedChain(feature, fused)
+
+
+class _FusedChain(StructuralFeature):
+    # Resolves a fused chain of features, and updates the original chain. The
+    # features joining the fused chain are not those joining the original
+    # chain, and each draws a hash_key when updated. Updating the original
+    # chain draws the same random values in the same order as before fusing.
+    # The features joining the fused chain are then updated without changing
+    # the global random state.
+
+    def __init__(self, original, fused, **kwargs):
+        super().__init__(**kwargs)
+        self.original = original
+        self.fused = fused
+
+    def get(self, image_list, **kwargs):
+        return self.fused.resolve(image_list, **kwargs)
+
+    def _update(self, **kwargs):
+        if get_update_context() is None:
+            with UpdateContext(kwargs):
+                return self._update(**kwargs)
+
+        self.original._update(**kwargs)
+
+        # The features of the original chain were updated above, and are not
+        # updated again within the same update.
+        state = np.random.get_state()
+        self.fused._update(**kwargs)
+        super()._update(**kwargs)
+        np.random.set_state(state)
+
+
+class _Geometry:
+    # Maps output pixels of a geometric augmentation to its input, along the
+    # first two axes. `to_input` maps arrays of rows and columns, and
+    # `to_output` maps a position property. None means no change. Augmentations
+    # that interpolate have an `order`, and extend their input according to
+    # `mode` and `cval`. Crops may select a range of `channels`.
+
+    def __init__(
+        self,
+        shape,
+        to_input=None,
+        to_output=None,
+        order=None,
+        mode="constant",
+        cval=0,
+        channels=slice(None),
+    ):
+        self.shape = tuple(shape)
+        self.to_input = to_input
+        self.to_output = to_output
+        self.order = order
+        self.mode = mode
+        self.cval = cval
+        self.channels = channels
+
+
+_geometric_augmentations = (
+    FlipLR,
+    FlipUD,
+    FlipDiagonal,
+    Affine,
+    ElasticTransformation,
+    Crop,
+)
+
+
+# Augmentations that resample their input. Fusing only flips and crops would
+# not save any interpolation.
+_interpolating = (Affine, ElasticTransformation)
+
+
+def _is_geometric(feature):
+    # Whether the feature can be part of a GeometricChain.
+    return (
+        isinstance(feature, _geometric_augmentations)
+        and not feature.feature
+        and feature.properties["update_properties"].current_value
+        == feature.update_properties
+    )
+
+
+def _unchain(feature):
+    # Lists the features of a chain combined with `+`.
+    if isinstance(feature, Branch):
+        return _unchain(feature.properties["feature_1"].sampling_rule) + _unchain(
+            feature.properties["feature_2"].sampling_rule
+        )
+    return [feature]
+
+
+def _feature_input(feature, global_kwargs):
+    # The arguments `feature.resolve` passes to `.get()`.
+    global_kwargs = {
+        key: value for key, value in global_kwargs.items() if key != "hash_key"
+    }
+    feature_input = feature.properties.current_value_dict(
+        is_resolving=True, **global_kwargs
+    )
+    feature_input.update(global_kwargs)
+    return feature._process_properties(feature_input)
+
+
+def _placeholder(shape, dtype):
+    # Array of the given shape and dtype, without memory.
+    return np.broadcast_to(np.zeros((), dtype), shape)
+
+
+def _is_integral(array):
+    return np.array_equal(array, np.round(array))
+
+
+def _resample(image, geometries):
+    # Samples the image at the input positions of the output pixels of a chain
+    # of geometries.
+
+    shape = geometries[-1].shape
+    rows, cols = np.indices(shape[:2], dtype=get_dtype_policy().float)
+
+    input_shapes = [image.shape] + [geometry.shape for geometry in geometries[:-1]]
+
+    order = 0
+    mode = "constant"
+    cval = 0
+    outside = np.zeros(shape[:2], dtype=bool)
+    outside_value = np.zeros(shape[:2])
+
+    for geometry, input_shape in zip(geometries[::-1], input_shapes[::-1]):
+        if geometry.to_input is not None:
+            rows, cols = geometry.to_input(rows, cols)
+        if geometry.order is None:
+            continue
+
+        order = max(order, geometry.order)
+        mode = geometry.mode
+        cval = geometry.cval
+
+        rows, rows_outside = _fold(rows, input_shape[0], mode)
+        cols, cols_outside = _fold(cols, input_shape[1], mode)
+        if rows_outside is not None:
+            new_outside = (rows_outside | cols_outside) & ~outside
+            outside_value[new_outside] = cval
+            outside |= new_outside
+
+    if image.ndim == 3:
+        channels = np.arange(image.shape[-1])
+        for geometry in geometries:
+            channels = channels[geometry.channels]
+        if len(channels) < image.shape[-1]:
+            image = image[..., channels]
+
+    empty = False
+    if order > 1:
+        # Only the region around the sampled positions is prefiltered. The
+        # spline coefficients decay by a factor 4 per pixel, so a margin of 12
+        # pixels makes the cut invisible.
+        region = tuple(
+            slice(
+                max(int(np.floor(coordinates.min())) - 12, 0),
+                min(int(np.ceil(coordinates.max())) + 13, size),
+            )
+            for coordinates, size in zip((rows, cols), image.shape)
+        )
+        # The region is empty if every position is outside the image, in a
+        # constant mode. The output is then filled with cval below.
+        empty = any(part.start >= part.stop for part in region)
+        if not empty:
+            image = image[region]
+            rows = rows - region[0].start
+            cols = cols - region[1].start
+
+    if empty:
+        output = np.zeros(shape[:2] + image.shape[2:], image.dtype)
+    elif _is_integral(rows) and _is_integral(cols):
+        rows = np.clip(rows, 0, image.shape[0] - 1).astype(int)
+        cols = np.clip(cols, 0, image.shape[1] - 1).astype(int)
+        output = np.asarray(image)[rows, cols]
+    elif image.ndim == 3:
+        output = _map_channels(
+            np.asarray(image), np.stack((rows, cols)), order=order, mode=mode, cval=cval
+        )
+    else:
+        output = map_coordinates(
+            np.asarray(image), (rows, cols), order=order, mode=mode, cval=cval
+        )
+
+    if outside.any():
+        values = outside_value[outside]
+        output[outside] = values[:, np.newaxis] if output.ndim == 3 else values
+    return output
+
+
+def _fold(coordinates, size, mode):
+    # Maps coordinates outside an axis of `size` pixels into it, according to
+    # `mode`. Returns the coordinates, and for constant modes a mask of the
+    # coordinates outside the axis.
+
+    if mode in ("constant", "grid-constant"):
+        return coordinates, (coordinates < 0) | (coordinates > size - 1)
+
+    if mode == "nearest":
+        coordinates = np.clip(coordinates, 0, size - 1)
+    elif mode in ("reflect", "grid-mirror"):
+        coordinates = np.mod(coordinates + 0.5, 2 * size) - 0.5
+        coordinates = np.where(
+            coordinates > size - 0.5, 2 * size - 1 - coordinates, coordinates
+        )
+        coordinates = np.clip(coordinates, 0, size - 1)
+    elif mode == "mirror":
+        period = max(2 * size - 2, 1)
+        coordinates = np.mod(coordinates, period)
+        coordinates = np.where(
+            coordinates > size - 1, period - coordinates, coordinates
+        )
+    elif mode in ("wrap", "grid-wrap"):
+        coordinates = np.mod(coordinates, size)
+    else:
+        raise ValueError("Unrecognized mode {0}".format(mode))
+
+    return coordinates, None
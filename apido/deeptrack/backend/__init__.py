@@ -1,3 +1,4 @@
 # flake8: noqa
 from .polynomials import *
-from .mie import *
\ No newline at end of file
+from .mie import *
+from . import fft
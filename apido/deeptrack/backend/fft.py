@@ -0,0 +1,147 @@
+"""Fast Fourier transforms
+
+All Fourier transforms in deeptrack go through this module. They are computed
+by `scipy.fft`, which keeps single precision inputs in single precision, so
+that float32 and complex64 images are transformed in complex64. Real inputs
+should use the real transforms, `rfft2` and `irfft2`, which do half the work.
+
+The transforms use `workers` threads, set for the process by `set_workers`.
+The default is a single thread, so that data generators running in several
+processes do not oversubscribe the processors.
+
+scipy caches the plans of recently used shapes itself. The fast lengths
+computed by `next_fast_len` are cached here.
+
+Functions
+---------
+fft2, ifft2, rfft2, irfft2
+    Two dimensional transforms, over the first two axes by default.
+fftshift, ifftshift
+    Shifts the zero frequency to and from the center.
+next_fast_len(target, real)
+    The smallest length at least `target` that transforms fast.
+fast_shape(shape, axes, real)
+    The shape with fast lengths along `axes`.
+cross_correlation(a, b, axes)
+    Circular cross-correlation of two real images.
+set_workers(workers)
+    Sets the number of threads of the transforms, optionally as a context
+    manager.
+get_workers()
+    Returns the number of threads of the transforms.
+"""
+
+import functools
+
+import numpy as np
+import scipy.fft
+
+_workers = 1
+
+
+class set_workers:
+    """Sets the number of threads of the transforms.
+
+    Can be called as a function to set the number for the process, or used
+    as a context manager to restore the previous number on exit.
+
+    Parameters
+    ----------
+    workers : int
+        The number of threads. Negative values count from the number of
+        processors, so that -1 uses all of them.
+
+    Examples
+    --------
+    >>> with set_workers(-1):
+    ...     image = optics_pipeline.update().resolve()
+    """
+
+    def __init__(self, workers=1):
+        global _workers
+
+        self.previous = _workers
+        _workers = workers
+
+    def __enter__(self):
+        return _workers
+
+    def __exit__(self, *args):
+        global _workers
+
+        _workers = self.previous
+        return False
+
+
+def get_workers() -> int:
+    """Returns the number of threads of the transforms."""
+    return _workers
+
+
+def fft2(x, axes=(0, 1), s=None):
+    """Two dimensional discrete Fourier transform."""
+    return scipy.fft.fft2(x, s=s, axes=axes, workers=_workers)
+
+
+def ifft2(x, axes=(0, 1), s=None):
+    """Two dimensional inverse discrete Fourier transform."""
+    return scipy.fft.ifft2(x, s=s, axes=axes, workers=_workers)
+
+
+def rfft2(x, axes=(0, 1), s=None):
+    """Two dimensional discrete Fourier transform of a real input.
+
+    Only the non-negative frequencies of the last axis of `axes` are returned.
+    """
+    return scipy.fft.rfft2(x, s=s, axes=axes, workers=_workers)
+
+
+def irfft2(x, s, axes=(0, 1)):
+    """Inverse of `rfft2`, with `s` the shape of the real output."""
+    return scipy.fft.irfft2(x, s=s, axes=axes, workers=_workers)
+
+
+def fftshift(x, axes=(0, 1)):
+    """Shifts the zero frequency to the center."""
+    return scipy.fft.fftshift(x, axes=axes)
+
+
+def ifftshift(x, axes=(0, 1)):
+    """Inverse of `fftshift`."""
+    return scipy.fft.ifftshift(x, axes=axes)
+
+
+@functools.lru_cache(maxsize=1024)
+def next_fast_len(target, real=False) -> int:
+    """The smallest length at least `target` that transforms fast.
+
+    Complex transforms are fast for lengths with only the prime factors 2, 3,
+    5, 7 and 11, and real transforms for lengths with the prime factors 2, 3
+    and 5.
+    """
+
+    if target <= 0:
+        return 0
+    return scipy.fft.next_fast_len(int(target), real=real)
+
+
+def fast_shape(shape, axes=(0, 1), real=False) -> tuple:
+    """The shape with fast lengths along `axes`."""
+
+    shape = list(shape)
+    for axis in axes:
+        shape[axis] = next_fast_len(shape[axis], real)
+    return tuple(shape)
+
+
+def cross_correlation(a, b, axes=(0, 1)):
+    """Circular cross-correlation of two real images.
+
+    The images are correlated along `axes`, and the zero shift is moved to
+    the center of the output, so that a peak at `center + d` means `a` is `b`
+    shifted by `d`.
+    """
+
+    shape = tuple(np.shape(a)[axis] for axis in axes)
+    product = rfft2(a, axes=axes) * np.conjugate(rfft2(b, axes=axes))
+    return fftshift(irfft2(product, s=shape, axes=axes), axes=axes)
@@ -0,0 +1,32 @@
+"""Benchmarks of deeptrack features
+
+Measures the time and the peak memory of resolving features, for images of
+several sizes and channel counts. The benchmarks follow the conventions of
+asv (airspeed velocity): each module holds classes with a list of `params`,
+a `setup` method called for each combination of parameters, and methods
+named `time_*` and `peakmem_*` measuring one call.
+
+The suite is run by
+
+    python -m apido.deeptrack.benchmarks [pattern] [--output FILE]
+        [--compare FILE]
+
+which runs the benchmarks whose names contain `pattern`. Results saved with
+`--output` can be compared to a later run with `--compare`, which reports
+the benchmarks that became slower or use more memory.
+
+Modules
+-------
+bench_features
+    Overhead of `Feature.update().resolve()`, with and without compiling.
+bench_loading
+    `LoadImage` on synthetic TIFF files.
+bench_augmentations
+    `Affine`, `ElasticTransformation`, `Crop` and `PadToMultiplesOf`.
+bench_optics
+    `Fluorescence`, `Brightfield` and `MieSphere`.
+bench_masks
+    `SampleToMasks`.
+runner
+    Discovers, runs and compares the benchmarks.
+"""
@@ -0,0 +1,83 @@
+"""Benchmarks of augmentations
+
+Classes
+-------
+Affine
+ElasticTransformation
+Crop
+PadToMultiplesOf
+"""
+
+import numpy as np
+
+from .. import augmentations
+from .data import random_image, set_dtype
+
+SIZES = [64, 256, 1024]
+CHANNELS = [1, 3]
+DTYPES = ["uint16", "float32", "float64"]
+
+
+class _Augmentation:
+    # Resolves an augmentation of a fixed image, with new properties each call
+    params = [SIZES, CHANNELS, DTYPES]
+    param_names = ["size", "channels", "dtype"]
+
+    def setup(self, size, channels, dtype):
+        self.policy = set_dtype(dtype)
+        self.image = random_image(size, channels, dtype)
+        self.feature = self.create(size)
+
+    def teardown(self, *params):
+        self.policy.__exit__()
+
+    def create(self, size):
+        raise NotImplementedError
+
+    def time_resolve(self, *params):
+        self.feature.update()
+        self.feature.resolve(self.image)
+
+    def peakmem_resolve(self, *params):
+        self.feature.update()
+        self.feature.resolve(self.image)
+
+
+class Affine(_Augmentation):
+    def create(self, size):
+        return augmentations.Affine(
+            scale=lambda: 0.9 + np.random.rand() * 0.2,
+            translate=lambda: np.random.randn(2) * 4,
+            rotate=lambda: np.random.rand() * 2 * np.pi,
+            shear=lambda: np.random.rand() * 0.1,
+            order=1,
+        )
+
+
+class ElasticTransformation(_Augmentation):
+    def create(self, size):
+        return augmentations.ElasticTransformation(
+            alpha=size / 4, sigma=size / 32, ignore_last_dim=True, order=1
+        )
+
+
+class Crop(_Augmentation):
+    params = [SIZES, CHANNELS]
+    param_names = ["size", "channels"]
+
+    def setup(self, size, channels):
+        super().setup(size, channels, "float64")
+
+    def create(self, size):
+        return augmentations.Crop(crop=(size // 2, size // 2, None), corner="random")
+
+
+class PadToMultiplesOf(_Augmentation):
+    params = [SIZES, CHANNELS]
+    param_names = ["size", "channels"]
+
+    def setup(self, size, channels):
+        super().setup(size, channels, "float64")
+
+    def create(self, size):
+        return augmentations.PadToMultiplesOf(multiple=(100, 100, None))
@@ -0,0 +1,45 @@
+"""Benchmarks of the overhead of features
+
+Classes
+-------
+UpdateResolve
+"""
+
+import numpy as np
+
+from .. import math
+from .data import random_image
+
+
+class UpdateResolve:
+    # A chain of `length` additions of random values. For small images, the
+    # time is dominated by updating the properties and by the bookkeeping of
+    # resolve.
+    params = [[1, 8, 32], [8, 256], [1, 3]]
+    param_names = ["length", "size", "channels"]
+
+    def setup(self, length, size, channels):
+        np.random.seed(0)
+        self.image = random_image(size, channels)
+        self.feature = math.Add(value=lambda: np.random.rand())
+        for _ in range(length - 1):
+            self.feature += math.Add(value=lambda: np.random.rand())
+        self.plan = self.feature.compile()
+
+    def time_update(self, *params):
+        self.feature.update()
+
+    def time_update_resolve(self, *params):
+        self.feature.update().resolve(self.image)
+
+    def peakmem_update_resolve(self, *params):
+        self.feature.update().resolve(self.image)
+
+    def time_update_resolve_unrecorded(self, *params):
+        self.feature.update().resolve(self.image, property_memorability=0)
+
+    def time_compiled_update(self, *params):
+        self.plan.update()
+
+    def time_compiled_update_resolve(self, *params):
+        self.plan.update().resolve(self.image, property_memorability=0)
@@ -0,0 +1,55 @@
+"""Benchmarks of loading images
+
+Classes
+-------
+LoadImage
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .. import features
+from ..cache import StackCache
+from .data import random_image
+
+
+class LoadImage:
+    # Loads a stack of uint16 TIFF files, of shape (size, size, channels) each
+    params = [[256, 1024], [1, 3], [1, 8]]
+    param_names = ["size", "channels", "files"]
+
+    def setup(self, size, channels, files):
+        try:
+            import tifffile
+        except ImportError:
+            raise NotImplementedError("tifffile is not installed")
+
+        self.directory = tempfile.mkdtemp()
+        paths = []
+        for index in range(files):
+            path = os.path.join(self.directory, "{0}.tif".format(index))
+            tifffile.imwrite(path, np.squeeze(random_image(size, channels, "uint16")))
+            paths.append(path)
+
+        if files == 1:
+            paths = paths[0]
+        self.feature = features.LoadImage(paths)
+        self.cached = features.LoadImage(
+            paths, cache=StackCache(max_memory_bytes=np.inf)
+        )
+        self.cached.update().resolve()
+
+    def teardown(self, *params):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_load(self, *params):
+        self.feature.update().resolve()
+
+    def peakmem_load(self, *params):
+        self.feature.update().resolve()
+
+    def time_load_cached(self, *params):
+        self.cached.update().resolve()
@@ -0,0 +1,48 @@
+"""Benchmarks of creating masks
+
+Classes
+-------
+SampleToMasks
+"""
+
+import numpy as np
+
+from .. import features, scatterers
+
+SIZES = [64, 256]
+MASKS = [1, 3]
+PARTICLES = [1, 10]
+
+
+def _transformation_function(number_of_masks):
+    # Stacks the volume of a scatterer as each mask
+    return lambda image: np.concatenate([image > 0] * number_of_masks, axis=-1)
+
+
+class SampleToMasks:
+    # Masks a new sample of ellipses each call, with one channel per mask
+    params = [SIZES, MASKS, PARTICLES]
+    param_names = ["size", "masks", "particles"]
+
+    def setup(self, size, masks, particles):
+        np.random.seed(0)
+        particle = scatterers.Ellipse(
+            position=lambda: np.random.rand(2) * size,
+            radius=(1e-6, 0.6e-6),
+            rotation=lambda: np.random.rand() * 2 * np.pi,
+            intensity=1,
+            voxel_size=(1e-7, 1e-7, 1e-7),
+        )
+        masks = features.SampleToMasks(
+            _transformation_function,
+            number_of_masks=masks,
+            output_region=(0, 0, size, size),
+            merge_method="or",
+        )
+        self.pipeline = (particle ** particles) + masks
+
+    def time_resolve(self, *params):
+        self.pipeline.update().resolve()
+
+    def peakmem_resolve(self, *params):
+        self.pipeline.update().resolve()
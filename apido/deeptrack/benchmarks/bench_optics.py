@@ -0,0 +1,83 @@
+"""Benchmarks of optics and scatterers
+
+The optics output a single channel, so these benchmarks are parameterised by
+the number of particles instead of the number of channels.
+
+Classes
+-------
+Fluorescence
+Brightfield
+MieSphere
+"""
+
+import numpy as np
+
+from .. import optics, scatterers
+from .data import set_dtype
+
+SIZES = [64, 128, 256]
+PARTICLES = [1, 10]
+DTYPES = ["float32", "float64"]
+
+
+class _Optics:
+    # Images a new sample of particles each call
+    params = [SIZES, PARTICLES, DTYPES]
+    param_names = ["size", "particles", "dtype"]
+
+    def setup(self, size, particles, dtype):
+        np.random.seed(0)
+        self.policy = set_dtype(dtype)
+        self.pipeline = self.create(size, particles)
+
+    def teardown(self, *params):
+        self.policy.__exit__()
+
+    def create(self, size, particles):
+        raise NotImplementedError
+
+    def time_resolve(self, *params):
+        self.pipeline.update().resolve()
+
+    def peakmem_resolve(self, *params):
+        self.pipeline.update().resolve()
+
+
+def _position(size):
+    return lambda: np.random.rand(2) * size * 0.8 + size * 0.1
+
+
+class Fluorescence(_Optics):
+    def create(self, size, particles):
+        particle = scatterers.PointParticle(
+            position=_position(size), intensity=lambda: 1 + np.random.rand()
+        )
+        optics_ = optics.Fluorescence(output_region=(0, 0, size, size))
+        return optics_(particle ** particles)
+
+
+class Brightfield(_Optics):
+    def create(self, size, particles):
+        particle = scatterers.Sphere(
+            position=_position(size), radius=0.5e-6, refractive_index=1.45
+        )
+        optics_ = optics.Brightfield(output_region=(0, 0, size, size))
+        return optics_(particle ** particles)
+
+
+class MieSphere(_Optics):
+    def create(self, size, particles):
+        particle = scatterers.MieSphere(
+            position=_position(size), radius=0.5e-6, refractive_index=1.45, z=0
+        )
+        optics_ = optics.Brightfield(
+            output_region=(0, 0, size, size),
+            NA=0.8,
+            wavelength=633e-9,
+            resolution=1e-6,
+            magnification=10,
+            refractive_index_medium=1.33,
+            padding=(16,) * 4,
+            return_field=True,
+        )
+        return optics_(particle ** particles)
@@ -0,0 +1,46 @@
+"""Inputs shared by the benchmarks
+
+Functions
+---------
+random_image(size, channels, dtype)
+    A reproducible random image.
+set_dtype(dtype)
+    Sets the dtype policy for the dtype of a benchmark.
+"""
+
+import numpy as np
+
+from .. import dtypes
+from ..image import Image
+
+
+def random_image(size, channels, dtype="float64") -> Image:
+    """A reproducible random image of shape (size, size, channels).
+
+    Integer images span their full range, floating point images are in [0, 1).
+    """
+
+    rng = np.random.default_rng(0)
+    dtype = np.dtype(dtype)
+    shape = (size, size, channels)
+    if dtype.kind in "ui":
+        array = rng.integers(
+            np.iinfo(dtype).min, np.iinfo(dtype).max, shape, dtype=dtype, endpoint=True
+        )
+    else:
+        array = rng.random(shape).astype(dtype)
+    return Image(array)
+
+
+def set_dtype(dtype) -> dtypes.dtype_policy:
+    """Sets the dtype policy for the dtype of a benchmark.
+
+    Floating point dtypes set the policy to their precision, while integer
+    dtypes use the default policy. Call `__exit__` on the returned object
+    to restore the previous policy.
+    """
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return dtypes.dtype_policy(dtype)
+    return dtypes.dtype_policy()
@@ -0,0 +1,262 @@
+"""Discovers, runs and compares the benchmarks
+
+Times are the median of several samples, each sample calling the benchmark
+enough times to run for at least `min_time` seconds. Peak memory is measured
+with `tracemalloc`, which counts the memory allocated by numpy, as the largest
+amount of memory allocated during one call beyond what was allocated before
+it.
+
+Functions
+---------
+discover(pattern)
+    Lists the benchmarks whose names contain `pattern`.
+run(pattern, repeat, min_time)
+    Runs the benchmarks and returns their results.
+compare(results, baseline, threshold)
+    Lists the results that are worse than those of a baseline.
+main(argv)
+    Command line interface.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import pkgutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+PREFIXES = ("time_", "peakmem_")
+
+
+def discover(pattern=None) -> list:
+    """Lists the benchmarks whose names contain `pattern`.
+
+    Returns
+    -------
+    list of (str, type, str)
+        The full name, the class and the method name of each benchmark.
+    """
+
+    package = importlib.import_module(__package__)
+    benchmarks = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(__package__ + "." + module_info.name)
+
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__ or class_name.startswith("_"):
+                continue
+            for method_name in dir(cls):
+                if not method_name.startswith(PREFIXES):
+                    continue
+                name = ".".join((module_info.name, class_name, method_name))
+                if pattern is None or pattern in name:
+                    benchmarks.append((name, cls, method_name))
+
+    return benchmarks
+
+
+def run(pattern=None, repeat=5, min_time=0.05, stream=sys.stdout) -> list:
+    """Runs the benchmarks and returns their results.
+
+    Parameters
+    ----------
+    pattern : str, optional
+        Only runs the benchmarks whose names contain `pattern`.
+    repeat : int
+        Number of samples of each time.
+    min_time : float
+        Minimum duration of each sample, in seconds.
+    stream : file, optional
+        Where to print the results as they are measured.
+
+    Returns
+    -------
+    list of dict
+        The name, parameters and value of each result. Times are in seconds
+        and peak memory in bytes. Skipped benchmarks have the value None.
+    """
+
+    results = []
+    for name, cls, method_name in discover(pattern):
+        params = getattr(cls, "params", [])
+        if params and not isinstance(params[0], (list, tuple)):
+            params = [params]
+        param_names = getattr(cls, "param_names", [])
+
+        for combination in itertools.product(*params):
+            benchmark = cls()
+            try:
+                if hasattr(benchmark, "setup"):
+                    benchmark.setup(*combination)
+            except NotImplementedError:
+                # Skipped, for example if an optional dependency is missing
+                value = None
+            else:
+                try:
+                    method = getattr(benchmark, method_name)
+                    if method_name.startswith("time_"):
+                        value = _time(method, combination, repeat, min_time)
+                    else:
+                        value = _peak_memory(method, combination)
+                finally:
+                    if hasattr(benchmark, "teardown"):
+                        benchmark.teardown(*combination)
+
+            result = {
+                "name": name,
+                "params": {
+                    str(key): repr(param)
+                    for key, param in zip(param_names, combination)
+                },
+                "value": value,
+            }
+            results.append(result)
+            if stream is not None:
+                print(_format(result), file=stream, flush=True)
+
+    return results
+
+
+def compare(results, baseline, threshold=1.2) -> list:
+    """Lists the results that are worse than those of a baseline.
+
+    Parameters
+    ----------
+    results, baseline : list of dict
+        Results returned by `run`.
+    threshold : float
+        Ratio to the baseline above which a result is worse.
+
+    Returns
+    -------
+    list of (dict, dict, float)
+        The result, the corresponding baseline result and their ratio.
+    """
+
+    baseline = {_key(result): result for result in baseline}
+    worse = []
+    for result in results:
+        before = baseline.get(_key(result))
+        if before is None or not result["value"] or not before["value"]:
+            continue
+        ratio = result["value"] / before["value"]
+        if ratio > threshold:
+            worse.append((result, before, ratio))
+    return worse
+
+
+def main(argv=None):
+    """Command line interface. Returns 1 if any result is worse."""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m " + __package__, description="Runs the benchmarks."
+    )
+    parser.add_argument("pattern", nargs="?", help="only run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="samples of each time")
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="minimum seconds per sample"
+    )
+    parser.add_argument("--output", help="saves the results as JSON")
+    parser.add_argument("--compare", help="compares to results saved as JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="ratio reported as worse"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, repeat=args.repeat, min_time=args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            worse = compare(results, json.load(f), args.threshold)
+        print()
+        print("{0} results worse than {1}".format(len(worse), args.compare))
+        for result, before, ratio in worse:
+            print(
+                "{0:.2f}x  {1}  (was {2})".format(
+                    ratio, _format(result), _format_value(before)
+                )
+            )
+        return 1 if worse else 0
+
+    return 0
+
+
+def _time(method, combination, repeat, min_time):
+    # Median time of one call
+    method(*combination)
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            method(*combination)
+        duration = time.perf_counter() - start
+        if duration >= min_time:
+            break
+        number *= max(2, min(10, int(min_time / max(duration, 1e-9)) + 1))
+
+    samples = [duration / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            method(*combination)
+        samples.append((time.perf_counter() - start) / number)
+
+    return statistics.median(samples)
+
+
+def _peak_memory(method, combination):
+    # Peak memory allocated during one call
+    method(*combination)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        method(*combination)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return peak - current
+
+
+def _key(result):
+    return result["name"], tuple(sorted(result["params"].items()))
+
+
+def _format(result):
+    params = " ".join(
+        "{0}={1}".format(key, value) for key, value in result["params"].items()
+    )
+    return "{0:<60} {1:<36} {2:>10}".format(
+        result["name"], params, _format_value(result)
+    )
+
+
+def _format_value(result):
+    value = result["value"]
+    if value is None:
+        return "skipped"
+    if result["name"].split(".")[-1].startswith("time_"):
+        for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+            if value >= scale:
+                break
+        return "{0:.3g} {1}".format(value / scale, unit)
+    for unit, scale in (("GB", 2 ** 30), ("MB", 2 ** 20), ("kB", 2 ** 10)):
+        if value >= scale:
+            break
+    return "{0:.3g} {1}".format(value / scale, unit)
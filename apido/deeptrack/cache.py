@@ -0,0 +1,244 @@
+"""Caches for decoded images
+
+Classes
+-------
+StackCache
+    Stores decoded image stacks as memory-mapped .npy files.
+"""
+
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+import numpy as np
+
+
+class StackCache:
+    """Stores decoded image stacks as memory-mapped .npy files.
+
+    Each stack is stored once, keyed by the paths of the source files and
+    their modification times, so that editing a source file invalidates
+    its entry. Loading a cached stack memory-maps the .npy file, which
+    turns repeated decodes into page-cache reads. The cache can be shared
+    between processes and runs.
+
+    Both the disk and the memory usage are bounded. When the size of the
+    stored files, stacks and metadata, exceeds `max_disk_bytes`, the least
+    recently used files are removed. Up to `max_memory_bytes` of stacks are
+    additionally kept in the memory of the current process.
+
+    Each stack can be stored with picklable metadata, kept in a .pkl file next
+    to the .npy file and removed with it.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Where to store the .npy files. If None, stacks are only cached in
+        memory.
+    max_disk_bytes : int
+        Maximum total size of the stored files, including the metadata.
+    max_memory_bytes : int
+        Maximum total size of the stacks kept in memory.
+    """
+
+    def __init__(self, directory=None, max_disk_bytes=np.inf, max_memory_bytes=0):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._memory = collections.OrderedDict()
+        self._memory_metadata = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def key(self, paths, **options) -> str:
+        """Cache key of the stack decoded from `paths` with `options`.
+
+        Raises
+        ------
+        OSError
+            If any of the paths does not exist.
+        """
+
+        digest = hashlib.sha1()
+        for path in paths:
+            stat = os.stat(path)
+            digest.update(
+                "{0}:{1}:{2};".format(
+                    os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+                ).encode()
+            )
+        digest.update(repr(sorted(options.items())).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached stack, or None if `key` is not cached.
+
+        Stacks read from disk are memory-mapped copy-on-write. Writing to them
+        does not modify the cache.
+        """
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        if self.directory is None:
+            return None
+
+        file_path = self._file_path(key)
+        try:
+            stack = np.load(file_path, mmap_mode="c")
+        except (OSError, ValueError):
+            return None
+
+        try:
+            # Mark as recently used
+            os.utime(file_path)
+        except OSError:
+            # Read-only caches are still read.
+            pass
+
+        self._remember(key, stack)
+        return stack
+
+    def get_metadata(self, key):
+        """Returns the metadata stored with `key`, or None if there is none."""
+
+        with self._lock:
+            if key in self._memory_metadata:
+                return self._memory_metadata[key]
+
+        if self.directory is None:
+            return None
+
+        try:
+            with open(self._file_path(key, ".pkl"), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, stack, metadata=None):
+        """Stores a stack.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        stack : ndarray
+            The stack to store.
+        metadata : any, optional
+            Picklable data stored with the stack.
+
+        Returns
+        -------
+        ndarray
+            The stored stack. Memory-mapped if stored on disk.
+        """
+
+        stack = np.ascontiguousarray(stack)
+
+        if self.directory is not None and stack.nbytes <= self.max_disk_bytes:
+            # The metadata is written first, so that it exists whenever the
+            # stack does.
+            if metadata is not None:
+                self._write(key, ".pkl", lambda f: pickle.dump(metadata, f))
+            self._write(key, ".npy", lambda f: np.save(f, stack))
+
+            self._evict_disk()
+            try:
+                stack = np.load(self._file_path(key), mmap_mode="c")
+            except OSError:
+                # Evicted by a concurrent process, keep the decoded stack.
+                pass
+
+        self._remember(key, stack, metadata)
+        return stack
+
+    def clear(self):
+        """Removes all cached stacks."""
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_metadata.clear()
+            self._memory_bytes = 0
+
+        if self.directory is not None:
+            for entry in self._entries():
+                self._remove(entry.path)
+
+    def _file_path(self, key, extension=".npy"):
+        return os.path.join(self.directory, key + extension)
+
+    def _write(self, key, extension, write):
+        # Writes a file atomically through a temporary file.
+        handle, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as f:
+                write(f)
+            os.replace(temporary_path, self._file_path(key, extension))
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def _remove(self, path):
+        # Removes a stored stack and its metadata.
+        for file_path in (path, path[: -len(".npy")] + ".pkl"):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+    def _entries(self):
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(".npy")]
+
+    def _remember(self, key, stack, metadata=None):
+        # Keeps the stack in memory, evicting the least recently used stacks.
+        if stack.nbytes > self.max_memory_bytes:
+            return
+
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = stack
+            if metadata is not None:
+                self._memory_metadata[key] = metadata
+            self._memory_bytes += stack.nbytes
+
+            while self._memory_bytes > self.max_memory_bytes:
+                evicted_key, evicted = self._memory.popitem(last=False)
+                self._memory_metadata.pop(evicted_key, None)
+                self._memory_bytes -= evicted.nbytes
+
+    def _evict_disk(self):
+        # Removes the least recently used files until within budget.
+        if self.max_disk_bytes == np.inf:
+            return
+
+        files = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            size = stat.st_size
+            try:
+                size += os.stat(entry.path[: -len(".npy")] + ".pkl").st_size
+            except OSError:
+                pass
+            files.append((stat.st_mtime_ns, size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
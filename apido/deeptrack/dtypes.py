@@ -0,0 +1,137 @@
+"""Dtype policy of resolved images
+
+The policy decides the precision of floating point and complex arithmetic in
+features. By default, features compute in float64 and complex128. Using
+float32 and complex64 instead halves the memory traffic of every stage.
+
+Integer images, such as 16-bit microscope data, are kept as integers through
+features that do not require floating point math, such as flips, crops and
+geometric transformations. They are only converted, to the float dtype of the
+policy, by features that need it, such as noise and normalization.
+
+The policy is global to the process, and is inherited by worker processes.
+
+Classes
+-------
+DtypePolicy
+    Float and complex dtypes used by features.
+
+Functions
+---------
+dtype_policy(float, complex)
+    Sets the policy, optionally as a context manager.
+get_dtype_policy()
+    Returns the current policy.
+as_float(array, *operands)
+    Converts an array to the float dtype of the policy, if needed.
+"""
+
+import numpy as np
+
+
+class DtypePolicy:
+    """Float and complex dtypes used by features.
+
+    Parameters
+    ----------
+    float : str or numpy dtype
+        The dtype of floating point arithmetic.
+    complex : str or numpy dtype, optional
+        The dtype of complex arithmetic. Defaults to the complex dtype with
+        the same precision as `float`.
+    """
+
+    def __init__(self, float="float64", complex=None):
+        self.float = np.dtype(float)
+        if complex is None:
+            complex = np.result_type(self.float, np.complex64)
+        self.complex = np.dtype(complex)
+
+        assert self.float.kind == "f", "float needs to be a floating point dtype"
+        assert self.complex.kind == "c", "complex needs to be a complex dtype"
+
+    def __repr__(self):
+        return "DtypePolicy(float={0}, complex={1})".format(self.float, self.complex)
+
+
+_policy = DtypePolicy()
+
+
+class dtype_policy:
+    """Sets the dtype policy.
+
+    Can be called as a function to set the policy of the process, or used as
+    a context manager to restore the previous policy on exit.
+
+    Parameters
+    ----------
+    float : str or numpy dtype or DtypePolicy
+        The dtype of floating point arithmetic, or a complete policy.
+    complex : str or numpy dtype, optional
+        The dtype of complex arithmetic. Defaults to the complex dtype with
+        the same precision as `float`.
+
+    Examples
+    --------
+    >>> with dtype_policy("float32"):
+    ...     image = pipeline.update().resolve()
+    """
+
+    def __init__(self, float="float64", complex=None):
+        global _policy
+
+        self.previous = _policy
+        if isinstance(float, DtypePolicy):
+            _policy = float
+        else:
+            _policy = DtypePolicy(float, complex)
+
+    def __enter__(self):
+        return _policy
+
+    def __exit__(self, *args):
+        global _policy
+
+        _policy = self.previous
+        return False
+
+
+def get_dtype_policy() -> DtypePolicy:
+    """Returns the current dtype policy."""
+    return _policy
+
+
+def as_float(array, *operands):
+    """Converts an array to the float dtype of the policy, if needed.
+
+    Integer arrays are converted unless all `operands` are integers, in which
+    case integer arithmetic suffices. Floating point and complex arrays of
+    higher precision than the policy are converted down to the policy.
+
+    Parameters
+    ----------
+    array : ndarray
+        The array to convert.
+    *operands
+        Other inputs to the operation performed on the array.
+
+    Returns
+    -------
+    ndarray
+        `array`, or a converted copy of it.
+    """
+
+    dtype = array.dtype
+
+    if dtype.kind in "biu":
+        if operands and all(np.asarray(v).dtype.kind in "biu" for v in operands):
+            return array
+        return array.astype(_policy.float)
+
+    if dtype.kind == "f" and dtype.itemsize > _policy.float.itemsize:
+        return array.astype(_policy.float)
+
+    if dtype.kind == "c" and dtype.itemsize > _policy.complex.itemsize:
+        return array.astype(_policy.complex)
+
+    return array
@@ -17,28 +17,78 @@ Probability
 Duplicate
     Implementation of `StructuralFeature` that sequentially resolves an
     integer number of deep-copies of a feature.
+Cached
+    Implementation of `StructuralFeature` that stores the output of a
+    deterministic feature, and reuses it for equal property values.
 
 """
 
+import contextvars
 import copy
 import enum
+import hashlib
+import os
+import pickle
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import List
 import numpy as np
-import threading
 
 from .image import Image
 from .properties import Property, PropertyDict
+from .readers import read_header, read_image
+from . import tracing
 
 
 MERGE_STRATEGY_OVERRIDE = 0
 MERGE_STRATEGY_APPEND = 1
 
-# Global thread execution lock for update calls.
-UPDATE_LOCK = threading.Lock()
 
-# Global update memoization. Ensures that the update is consistent
-UPDATE_MEMO = {"user_arguments": {}, "memoization": {}}
+class UpdateContext:
+    """State of one call to `Feature.update`.
+
+    Ensures that the update is consistent: each property is updated once per
+    call, and properties overridden by the arguments of the call keep the
+    passed values. The context is active in the thread or task running the
+    update, so that independent pipelines, or copies of one pipeline, can be
+    updated concurrently.
+
+    Parameters
+    ----------
+    user_arguments : dict, optional
+        The arguments of the update call.
+
+    Attributes
+    ----------
+    user_arguments : dict
+        The arguments of the update call.
+    memoization : dict
+        The new value of each property updated in the call, keyed by the id
+        of the property.
+    """
+
+    def __init__(self, user_arguments=None):
+        self.user_arguments = user_arguments or {}
+        self.memoization = {}
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_update_context.set(self))
+        return self
+
+    def __exit__(self, *args):
+        _update_context.reset(self._tokens.pop())
+        return False
+
+
+_update_context = contextvars.ContextVar("update_context", default=None)
+
+
+def get_update_context() -> UpdateContext:
+    """Returns the context of the running update, or None outside updates."""
+    return _update_context.get()
 
 
 class Feature:
@@ -87,12 +137,25 @@ class Feature:
         called on the list as a whole (`__distributed__ = False`).
     __property_memorability__
         Controls whether to store the features properties to the `Image`.
-        Values 1 or lower will be included by default.
+        Values 1 or lower will be included by default. Resolving with
+        `property_memorability=0` only stores the properties of features
+        with the value 0, and the additional properties returned by `get`.
+    __uncached_properties__
+        Properties that do not affect the output, and are left out of the key
+        of `Cached`.
+    __plain_arrays__ : bool
+        Controls whether `.get(image, **kwargs)` is called with plain
+        ndarrays instead of Images, so that array operations within it do not
+        track properties. With `__distributed__ = True`, the properties of each
+        input are attached to the output after the call, in front of any
+        properties of an output Image.
     """
 
     __list_merge_strategy__ = MERGE_STRATEGY_OVERRIDE
     __distributed__ = True
     __property_memorability__ = 1
+    __uncached_properties__ = ("hash_key",)
+    __plain_arrays__ = False
 
     def __init__(self, *args: dict, **kwargs):
         super(Feature, self).__init__()
@@ -158,6 +221,17 @@ class Feature:
             The resolved image
         """
 
+        trace = tracing.get_trace()
+        if trace is None:
+            return self._resolve(image_list, **global_kwargs)
+
+        with trace.span(self, image_list) as span:
+            span.outputs = self._resolve(image_list, **global_kwargs)
+        return span.outputs
+
+    def _resolve(self, image_list, **global_kwargs):
+        # Implements resolve, which records the call if a trace is active.
+
         # Remove hash_key from globals.
         global_kwargs.pop("hash_key", False)
 
@@ -189,21 +263,36 @@ class Feature:
         new_list = self._process_and_get(image_list, **feature_input)
 
         # If tuple, assume return additional properties
+        additional_properties = {}
         if isinstance(new_list, tuple):
-            feature_input = {**feature_input, **new_list[1]}
+            additional_properties = new_list[1]
             new_list = new_list[0]
 
         # Add feature_input to the image the class attribute __property_memorability__
         # is not larger than the passed property_verbosity keyword
         property_verbosity = global_kwargs.get("property_memorability", 1)
-        feature_input["name"] = type(self).__name__
         if self.__property_memorability__ <= property_verbosity:
+            feature_input = {**feature_input, **additional_properties}
+            feature_input["name"] = type(self).__name__
             for index, image in enumerate(new_list):
                 if isinstance(image, tuple):
                     image[0].append({**feature_input, **image[1]})
                     new_list[index] = image[0]
                 else:
                     image.append(feature_input)
+        else:
+            # No record of the properties is created. Additional properties
+            # are outputs of the feature, such as "undo_padding", and are
+            # still recorded.
+            for index, image in enumerate(new_list):
+                if isinstance(image, tuple):
+                    image, image_properties = image
+                    image_properties = {**additional_properties, **image_properties}
+                    new_list[index] = image
+                else:
+                    image_properties = additional_properties
+                if image_properties:
+                    image.append(image_properties)
 
         # Merge input and new_list
         if self.__list_merge_strategy__ == MERGE_STRATEGY_OVERRIDE:
@@ -234,15 +323,45 @@ class Feature:
         """
 
         # This should only be accessed by the user. Call _update directly instead
-        with UPDATE_LOCK:
-            UPDATE_MEMO["user_arguments"] = kwargs
-            UPDATE_MEMO["memoization"] = {}
+        with UpdateContext(kwargs):
             self._update(**kwargs)
             return self
 
     def _update(self, **kwargs):
         self.properties.update(**kwargs)
 
+    def compile(self):
+        """Creates a plan that updates and resolves the feature.
+
+        The plan walks the graph of features and properties once, and runs
+        later updates and resolves as a flat list of steps. Compile again if
+        the graph is modified. See `deeptrack.plan.Plan`.
+
+        Returns
+        -------
+        Plan
+            A plan with the methods `update` and `resolve`.
+        """
+
+        from .plan import Plan
+
+        return Plan(self)
+
+    def to_tf_dataset(self, **kwargs):
+        """Creates a tf.data.Dataset that resolves the feature.
+
+        Requires tensorflow. See `deeptrack.generators.as_dataset` for the
+        accepted keyword arguments.
+
+        Returns
+        -------
+        tf.data.Dataset
+        """
+
+        from .generators import as_dataset
+
+        return as_dataset(self, **kwargs)
+
     def plot(
         self,
         input_image: Image or List[Image] = None,
@@ -339,7 +458,11 @@ class Feature:
             results = []
 
             for image in image_list:
-                output = self.get(image, **feature_input)
+                if self.__plain_arrays__:
+                    output = self.get(np.asarray(image), **feature_input)
+                    output = _attach_properties(output, image)
+                else:
+                    output = self.get(image, **feature_input)
                 if not isinstance(output, Image):
                     output = Image(output)
                 results.append(output)
@@ -348,7 +471,12 @@ class Feature:
 
         else:
             # Call get on entire list.
-            new_list = self.get(image_list, **feature_input)
+            if self.__plain_arrays__:
+                new_list = self.get(
+                    [np.asarray(image) for image in image_list], **feature_input
+                )
+            else:
+                new_list = self.get(image_list, **feature_input)
 
             if not isinstance(new_list, list):
                 new_list = [new_list]
@@ -436,6 +564,17 @@ class Feature:
         return Duplicate(self, other)
 
 
+def _attach_properties(output, image):
+    # Attaches the properties of the input of get to its output.
+    if isinstance(output, Image):
+        output.properties = image.properties + output.properties
+        return output
+
+    output = np.asarray(output).view(Image)
+    output._share_properties(image, image._deduplicate_on_copy)
+    return output
+
+
 class StructuralFeature(Feature):
     """Provides the structure of a feature-set
     Feature with __property_verbosity__ = 2 to avoid adding it to the list
@@ -717,6 +856,203 @@ class ConditionalSetFeature(StructuralFeature):
                 return image
 
 
+class Cached(StructuralFeature):
+    """Stores the output of a deterministic feature.
+
+    The output is keyed by a hash of the current property values of `feature`
+    and of all features it consists of, together with the input images.
+    Properties that do not affect the output, such as `hash_key`, are listed in
+    `__uncached_properties__` and left out. Resolving with the same values again loads the output from
+    `store` instead of resolving `feature`. With a store on disk, outputs are
+    shared between processes and runs, within the size bound of the store.
+
+    The output of `feature` must only depend on these values. Global arguments
+    passed to `resolve` are part of the key if a feature in `feature` has a
+    property with the same name. Strings and paths naming existing files are
+    identified together with the modification time and size of the file, so
+    that editing a source file invalidates its outputs. Functions are
+    identified by where they are defined, and other objects only by their
+    type. Property values of the
+    output that cannot be pickled, such as features, are not stored.
+
+    Parameters
+    ----------
+    feature : Feature
+        The feature to cache. Should resolve to an Image or a list of Images.
+    store : StackCache
+        Where to store the outputs.
+
+    Examples
+    --------
+    >>> store = dt.cache.StackCache("/scratch/corrected", max_disk_bytes=50e9)
+    >>> corrected_brightfield = dt.Cached(
+    ...     brightfield_loader + correct_offset, store=store
+    ... )
+    """
+
+    __distributed__ = False
+
+    def __init__(self, feature: Feature, store, **kwargs):
+        super().__init__(feature=feature, store=store, **kwargs)
+
+    def get(self, image_list, feature, store, **kwargs):
+
+        key = _content_key(feature, image_list, kwargs)
+
+        cached = _load_cached(store, key)
+        if cached is not None:
+            return cached
+
+        output = feature.resolve(image_list, **kwargs)
+
+        images = output if isinstance(output, list) else [output]
+        for index, image in enumerate(images):
+            store.put(
+                "{0}_{1}".format(key, index),
+                image,
+                metadata=(len(images), _picklable(image.properties)),
+            )
+
+        return output
+
+
+def _content_key(feature, image_list, global_kwargs):
+    # Hashes the property values of the features in `feature`, the global
+    # arguments overriding them, and the input images.
+
+    digest = hashlib.sha1()
+    property_names = set()
+    _hash_value(digest, feature, {}, property_names)
+
+    for key in sorted(global_kwargs):
+        if key in property_names and key != "hash_key":
+            digest.update(key.encode())
+            _hash_value(digest, global_kwargs[key], {}, set())
+
+    for image in image_list:
+        _hash_value(digest, image, {}, set())
+        _hash_value(digest, getattr(image, "properties", []), {}, set())
+
+    return digest.hexdigest()
+
+
+def _hash_value(digest, value, seen, property_names):
+    # Feeds a value into `digest`. Features are hashed by their type and the
+    # current value of their properties, recursing into features they hold.
+
+    if isinstance(value, Feature):
+        if id(value) in seen:
+            digest.update("feature {0};".format(seen[id(value)]).encode())
+            return
+        seen[id(value)] = len(seen)
+
+        digest.update(
+            "{0}.{1}(".format(type(value).__module__, type(value).__qualname__).encode()
+        )
+        for key in sorted(value.properties):
+            if key in value.__uncached_properties__:
+                continue
+            property_names.add(key)
+            digest.update("{0}=".format(key).encode())
+            _hash_value(
+                digest, value.properties[key].current_value, seen, property_names
+            )
+
+        # Parent features held as attributes, such as by augmentations.
+        for key, attribute in sorted(vars(value).items()):
+            if isinstance(attribute, Feature) or (
+                isinstance(attribute, list)
+                and attribute
+                and all(isinstance(item, Feature) for item in attribute)
+            ):
+                digest.update("{0}=".format(key).encode())
+                _hash_value(digest, attribute, seen, property_names)
+        digest.update(b")")
+
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            _hash_value(digest, value.tolist(), seen, property_names)
+        else:
+            digest.update("{0}{1}".format(value.dtype.str, value.shape).encode())
+            digest.update(np.ascontiguousarray(value).data)
+
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            digest.update("{0!r}:".format(key).encode())
+            _hash_value(digest, value[key], seen, property_names)
+        digest.update(b"}")
+
+    elif isinstance(value, (list, tuple)):
+        digest.update("{0}[".format(type(value).__name__).encode())
+        for item in value:
+            _hash_value(digest, item, seen, property_names)
+        digest.update(b"]")
+
+    elif isinstance(value, (str, os.PathLike)):
+        digest.update("{0}:{1!r};".format(type(value).__name__, value).encode())
+        try:
+            status = os.stat(value)
+        except (OSError, ValueError):
+            return
+        if stat.S_ISREG(status.st_mode):
+            # Paths of files are also identified by the version of the file.
+            digest.update(
+                "file {0}:{1};".format(status.st_mtime_ns, status.st_size).encode()
+            )
+
+    elif value is None or isinstance(
+        value, (bool, int, float, complex, bytes, np.generic)
+    ):
+        digest.update("{0}:{1!r};".format(type(value).__name__, value).encode())
+
+    elif hasattr(value, "__code__"):
+        code = value.__code__
+        digest.update(
+            "function {0}:{1}:{2};".format(
+                code.co_filename, code.co_firstlineno, value.__qualname__
+            ).encode()
+        )
+
+    else:
+        digest.update("object {0};".format(type(value).__qualname__).encode())
+
+
+def _load_cached(store, key):
+    # Returns the stored output for `key`, or None if any part is missing.
+
+    images = []
+    index = 0
+    length = 1
+    while index < length:
+        image_key = "{0}_{1}".format(key, index)
+        stack = store.get(image_key)
+        metadata = store.get_metadata(image_key)
+        if stack is None or metadata is None:
+            return None
+
+        length, properties = metadata
+        images.append(Image(stack, properties=[dict(p) for p in properties]))
+        index += 1
+
+    return images if len(images) > 1 else images[0]
+
+
+def _picklable(properties):
+    # Drops the property values that cannot be pickled.
+    stored = []
+    for prop in properties:
+        stored_prop = {}
+        for key, value in prop.items():
+            try:
+                pickle.dumps(value)
+            except Exception:
+                continue
+            stored_prop[key] = value
+        stored.append(stored_prop)
+    return stored
+
+
 class Lambda(Feature):
     """Calls a custom function on each image in the input.
 
@@ -830,8 +1166,9 @@ class Label(Feature):
 class LoadImage(Feature):
     """Loads an image from disk.
 
-    Cycles through file-readers numpy, pillow and opencv2 to open the
-    image file.
+    Each file is read by the fastest available reader for its format, see
+    `deeptrack.readers`. The reader is chosen by the file extension, or by
+    the first bytes of the file if the extension is unknown.
 
     Parameters
     ----------
@@ -847,6 +1184,18 @@ class LoadImage(Feature):
         Whether to convert the image to grayscale
     get_one_random : bool
         Extracts a single image from a stack. Only used if as_list is true.
+    cache : StackCache, optional
+        Cache of decoded stacks. If given, each set of files is only decoded
+        once, and later loads are read from the cache.
+    num_workers : int, optional
+        Number of threads decoding the files of a multi-file input. Threads
+        are taken from a pool shared by all `LoadImage` features, with one
+        thread per processor. Defaults to one per file, up to the number of
+        processors.
+    dtype : str or numpy dtype, optional
+        The dtype of the stacked output. Defaults to the dtype of the first
+        file. Files of another dtype are cast while they are copied into the
+        output, instead of being decoded straight into it.
 
     Raises
     ------
@@ -865,6 +1214,9 @@ class LoadImage(Feature):
         ndim=None,
         to_grayscale=False,
         get_one_random=False,
+        cache=None,
+        num_workers=None,
+        dtype=None,
         **kwargs
     ):
         super().__init__(
@@ -874,6 +1226,9 @@ class LoadImage(Feature):
             ndim=ndim,
             to_grayscale=to_grayscale,
             get_one_random=get_one_random,
+            cache=cache,
+            num_workers=num_workers,
+            dtype=dtype,
             **kwargs
         )
 
@@ -886,34 +1241,26 @@ class LoadImage(Feature):
         to_grayscale,
         as_list,
         get_one_random,
+        cache=None,
+        num_workers=None,
+        dtype=None,
         **kwargs
     ):
         if not isinstance(path, List):
             path = [path]
         if load_options is None:
             load_options = {}
-        try:
-            image = [np.load(file, **load_options) for file in path]
-        except (IOError, ValueError):
-            try:
-                from skimage import io
 
-                image = [io.imread(file) for file in path]
-            except (IOError, ImportError, AttributeError):
-                try:
-                    import PIL.Image
+        image = None
+        if cache is not None:
+            cache_key = cache.key(path, dtype=dtype, **load_options)
+            image = cache.get(cache_key)
 
-                    image = [PIL.Image.open(file, **load_options) for file in path]
-                except (IOError, ImportError):
-                    import cv2
-
-                    image = [cv2.imread(file, **load_options) for file in path]
-                    if not image:
-                        raise IOError(
-                            "No filereader available for file {0}".format(path)
-                        )
+        if image is None:
+            image = _read_files(path, load_options, dtype, num_workers)
 
-        image = np.stack(image, axis=-1)
+            if cache is not None:
+                image = cache.put(cache_key, image)
 
         if to_grayscale:
             try:
@@ -937,6 +1284,75 @@ class LoadImage(Feature):
         return image
 
 
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+
+def _read_executor():
+    # Thread pool decoding the files of multi-file inputs, shared by all
+    # LoadImage features. Threads do not survive a fork, so each process
+    # creates its own.
+    global _read_pool
+
+    with _read_pool_lock:
+        if _read_pool is None or _read_pool[0] != os.getpid():
+            _read_pool = (
+                os.getpid(),
+                ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix="LoadImage"),
+            )
+        return _read_pool[1]
+
+
+def _read_files(paths, load_options, dtype=None, num_workers=None):
+    # Reads a list of files into a preallocated array, where the last axis
+    # is the index of the file. The array is a view of a buffer where the
+    # index of the file is the first axis, so that each file is stored in
+    # contiguous memory. Readers that support it (tifffile) decode the files
+    # in parallel straight into the buffer, other readers decode them to new
+    # arrays which are copied (and cast) into it. If the shape cannot be read
+    # from the header of the first file, the first file is decoded to find it.
+
+    header = read_header(paths[0])
+    if header is None:
+        first = read_image(paths[0], **load_options)
+        shape, first_dtype = first.shape, first.dtype
+        start = 1
+    else:
+        shape, first_dtype = header
+        start = 0
+
+    buffer = np.empty(
+        (len(paths), *shape), dtype=first_dtype if dtype is None else dtype
+    )
+    if header is None:
+        buffer[0] = first
+
+    def read_into(index):
+        read_image(paths[index], out=buffer[index], **load_options)
+
+    if num_workers is None:
+        num_workers = min(len(paths) - start, os.cpu_count() or 1)
+
+    def read_every(first_index):
+        # Reads every num_workers-th file, from `first_index`.
+        for index in range(first_index, len(paths), num_workers):
+            read_into(index)
+
+    if num_workers > 1:
+        executor = _read_executor()
+        futures = [
+            executor.submit(read_every, first_index)
+            for first_index in range(start, start + num_workers)
+        ]
+        for future in futures:
+            future.result()
+    else:
+        for index in range(start, len(paths)):
+            read_into(index)
+
+    return np.moveaxis(buffer, 0, -1)
+
+
 class DummyFeature(Feature):
     """Feature that does nothing
 
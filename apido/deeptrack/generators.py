@@ -6,11 +6,17 @@ Generator
     Base class for a generator.
 ContinuousGenerator
     Generator that asynchronously expands the dataset
+
+Functions
+---------
+as_dataset(feature, ...)
+    Creates a tf.data.Dataset that resolves a feature.
 """
 
 import numpy as np
 
 from typing import List
+import tensorflow as tf
 import tensorflow.keras as keras
 from .features import Feature
 from .image import Image
@@ -18,6 +24,11 @@ import threading
 import random
 import time
 import itertools
+import contextlib
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
 
 
 class Generator(keras.utils.Sequence):
@@ -186,6 +197,31 @@ class ContinuousGenerator(keras.utils.Sequence):
         Set of options to pass to the feature when resolving
     ndim : int
         Number of dimensions of each batch (including the batch dimension).
+    workers : int
+        Number of processes resolving the feature. If 0, the feature is
+        resolved in a thread of the current process. Worker processes are
+        forked, and return their samples through shared memory. Requires the
+        "fork" start method (i.e. not available on Windows).
+    seed : int, optional
+        Seed of the random number generators of the worker processes. Each
+        worker is seeded with its own stream derived from `seed`, and a new set
+        of streams is used each time the generator is entered. Only used if
+        `workers` is larger than 0.
+    max_data_bytes : int, optional
+        If set, the training data is stored in a ring buffer of preallocated
+        contiguous arrays of at most this many bytes, instead of in a list. The
+        number of samples that fit is determined by the first sample, and is
+        at most `max_data_size`. All samples need to have the same shape.
+        Epochs index the slots of the buffer, which keep being overwritten by
+        new samples during the epoch, so that a batch may contain samples
+        generated after the epoch started.
+    dtype, label_dtype : str or numpy dtype, optional
+        The dtype of the stored inputs and labels. Defaults to the dtype of the
+        first sample. Only used if `max_data_bytes` is set.
+    num_batch_buffers : int
+        Number of batch buffers that are reused in rotation. Needs to be larger
+        than the number of batches held by the consumer at any time, e.g. the
+        `max_queue_size` of keras. Only used if `max_data_bytes` is set.
     """
 
     def __init__(
@@ -201,6 +237,12 @@ class ContinuousGenerator(keras.utils.Sequence):
         update_kwargs={},
         verbose=1,
         ndim=4,
+        workers=0,
+        seed=None,
+        max_data_bytes=None,
+        dtype=None,
+        label_dtype=None,
+        num_batch_buffers=16,
     ):
 
         if min_data_size is None:
@@ -224,12 +266,21 @@ class ContinuousGenerator(keras.utils.Sequence):
             self.update_kwargs = itertools.cycle([update_kwargs])
 
         self.ndim = ndim
+        self.workers = workers
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._processes = []
 
         self.lock = threading.Lock()
-        self.data = []
+        if max_data_bytes is None:
+            self.data = []
+        else:
+            self.data = _SampleBuffer(max_data_bytes, max_data_size, dtype, label_dtype)
+        self.num_batch_buffers = num_batch_buffers
+        self._batch_buffers = []
         self.batch = []
         self.labels = []
         self.exit_signal = False
+        self._error = None
         self.epoch = 0
         self._batch_size = 32
         self.verbose = verbose
@@ -241,15 +292,25 @@ class ContinuousGenerator(keras.utils.Sequence):
         try:
             self.epoch = 0
             self.exit_signal = False
-            try:
-                self.data_generation_thread.start()
-            except RuntimeError:
-                self.data_generation_thread = threading.Thread(
-                    target=self._continuous_get_training_data, daemon=True
-                )
-                self.data_generation_thread.start()
+            self._error = None
+            if self.workers > 0:
+                self._start_workers()
+            else:
+                try:
+                    self.data_generation_thread.start()
+                except RuntimeError:
+                    self.data_generation_thread = threading.Thread(
+                        target=self._continuous_get_training_data, daemon=True
+                    )
+                    self.data_generation_thread.start()
 
             while len(self.data) < self.min_data_size:
+                self._raise_error()
+                if isinstance(self.data, _SampleBuffer):
+                    assert (
+                        self.data.capacity is None
+                        or self.data.capacity >= self.min_data_size
+                    ), "max_data_bytes fits less than min_data_size samples"
                 if self.verbose > 0:
                     print(
                         "Generating {0} / {1} samples before starting training".format(
@@ -274,13 +335,19 @@ class ContinuousGenerator(keras.utils.Sequence):
 
     def __exit__(self, *args):
         self.exit_signal = True
-        self.data_generation_thread.join()
+        if self.data_generation_thread.is_alive():
+            self.data_generation_thread.join()
+        self._stop_workers()
         return False
 
     def on_epoch_end(self):
 
-        # Grab a copy
-        current_data = list(self.data)
+        # Grab a copy. Slots of the ring buffer are not copied, and are
+        # overwritten by new samples during the epoch.
+        if isinstance(self.data, _SampleBuffer):
+            current_data = list(range(len(self.data)))
+        else:
+            current_data = list(self.data)
 
         if self.shuffle_batch:
             random.shuffle(current_data)
@@ -296,9 +363,14 @@ class ContinuousGenerator(keras.utils.Sequence):
 
     def __getitem__(self, idx):
 
+        self._raise_error()
+
         batch_size = self._batch_size
 
         subset = self.current_data[idx * batch_size : (idx + 1) * batch_size]
+        if isinstance(self.data, _SampleBuffer):
+            return self._gather(subset)
+
         outputs = [np.array(a) for a in list(zip(*subset))]
         outputs = (outputs[0], *outputs[1:])
         return outputs
@@ -312,33 +384,179 @@ class ContinuousGenerator(keras.utils.Sequence):
 
     def _continuous_get_training_data(self):
         index = 0
-        while True:
-            # Stop generator
-            if self.exit_signal:
-                break
+        try:
+            while True:
+                # Stop generator
+                if self.exit_signal:
+                    break
+
+                for new_image_i, new_label_i in self._get_samples():
+                    self._add_sample(index, new_image_i, new_label_i)
+                    index += 1
+        except Exception as e:
+            self._error = e
+
+    def _raise_error(self):
+        # Raises the exception that stopped the data generation thread, since
+        # exceptions raised in a thread are not seen by the consumer.
+        if self._error is not None:
+            raise self._error
+
+    def _get_samples(self):
+        # Resolves the feature once, returning a list of (image, label) pairs.
+        new_image = self._get(self.feature, self.feature_kwargs)
+
+        if self.label_function:
+            new_label = self.label_function(new_image)
+
+        if self.batch_function:
+            new_image = self.batch_function(new_image)
+
+        if new_image.ndim < self.ndim:
+            new_image = [new_image]
+            new_label = [new_label]
+
+        return list(zip(new_image, new_label))
+
+    def _gather(self, indices):
+        # Gathers samples from the ring buffer into the next batch buffer.
+        shapes = self.data.batch_shapes(len(indices))
+        if not self._batch_buffers or self._batch_buffers[0][0].shape != shapes[0]:
+            self._batch_buffers = [
+                (
+                    np.empty(shapes[0], self.data.images.dtype),
+                    np.empty(shapes[1], self.data.labels.dtype),
+                )
+                for _ in range(self.num_batch_buffers)
+            ]
+
+        batch = self._batch_buffers.pop(0)
+        self._batch_buffers.append(batch)
+
+        with self.lock:
+            self.data.gather(indices, *batch)
+        return batch
+
+    def _add_sample(self, index, new_image, new_label):
+        # Appends a sample, or replaces the oldest one if the data is full.
+        if isinstance(self.data, _SampleBuffer):
+            with self.lock:
+                self.data.put(index, new_image, new_label)
+        elif len(self.data) >= self.max_data_size:
+            self.data[index % self.max_data_size] = (new_image, new_label)
+        else:
+            self.data.append((new_image, new_label))
+
+    def _start_workers(self):
+        # Forks the worker processes, and starts a thread collecting their
+        # samples into `data`.
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise RuntimeError(
+                "workers > 0 requires the fork start method, "
+                "which is not available on this platform."
+            )
+
+        # Workers and the parent need to share a resource tracker, since
+        # shared memory is created by the workers and unlinked by the parent.
+        from multiprocessing import resource_tracker
 
-            new_image = self._get(self.feature, self.feature_kwargs)
+        resource_tracker.ensure_running()
 
-            if self.label_function:
-                new_label = self.label_function(new_image)
+        self._exit_event = context.Event()
+        self._samples = context.Queue(maxsize=2 * self.workers)
+        self._processes = [
+            context.Process(
+                target=self._produce_samples,
+                args=(int(seed.generate_state(1)[0]), os.getpid()),
+                daemon=True,
+            )
+            for seed in self._seed_sequence.spawn(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
 
-            if self.batch_function:
-                new_image = self.batch_function(new_image)
+        self.data_generation_thread = threading.Thread(
+            target=self._collect_samples, daemon=True
+        )
+        self.data_generation_thread.start()
+
+    def _stop_workers(self):
+        if not self._processes:
+            return
+
+        self._exit_event.set()
+
+        # Unblock workers waiting on a full queue.
+        for _ in self._drain_samples():
+            pass
+
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        for _ in self._drain_samples():
+            pass
+
+        self._processes = []
+
+    def _produce_samples(self, seed, parent_pid):
+        # Runs in a worker process. Exits if the parent process exits.
+        np.random.seed(seed)
+        random.seed(seed)
+
+        while not self._exit_event.is_set() and os.getppid() == parent_pid:
+            for new_image_i, new_label_i in self._get_samples():
+                message = _to_shared_memory(new_image_i, new_label_i)
+                while True:
+                    try:
+                        self._samples.put(message, timeout=0.1)
+                        break
+                    except queue.Full:
+                        if self._exit_event.is_set() or os.getppid() != parent_pid:
+                            _from_shared_memory(*message)
+                            return
+
+    def _collect_samples(self):
+        # Runs in a thread of the parent process. Exceptions are stored to be
+        # raised by _raise_error.
+        index = 0
+        try:
+            while not self.exit_signal:
+                if not any(process.is_alive() for process in self._processes):
+                    raise RuntimeError(
+                        "All worker processes have exited (exit codes {0}).".format(
+                            [process.exitcode for process in self._processes]
+                        )
+                    )
 
-            if new_image.ndim < self.ndim:
-                new_image = [new_image]
-                new_label = [new_label]
+                try:
+                    message = self._samples.get(timeout=0.1)
+                except queue.Empty:
+                    continue
 
-            for new_image_i, new_label_i in zip(new_image, new_label):
-                if len(self.data) >= self.max_data_size:
-                    self.data[index % self.max_data_size] = (
-                        new_image_i,
-                        new_label_i,
+                if isinstance(self.data, _SampleBuffer):
+                    # Copy straight from shared memory into the ring buffer.
+                    _from_shared_memory(
+                        *message,
+                        function=lambda *sample: self._add_sample(index, *sample),
                     )
                 else:
-                    self.data.append((new_image_i, new_label_i))
-
+                    self._add_sample(index, *_from_shared_memory(*message))
                 index += 1
+        except Exception as e:
+            self._error = e
+
+    def _drain_samples(self):
+        # Frees samples left in the queue.
+        while True:
+            try:
+                message = self._samples.get(timeout=0.1)
+            except queue.Empty:
+                return
+            yield _from_shared_memory(*message)
 
     def _get(self, features: Feature or List[Feature], feature_kwargs) -> Image:
         # Updates and resolves a feature or list of features.
@@ -357,3 +575,231 @@ class ContinuousGenerator(keras.utils.Sequence):
         else:
             features.update()
             return features.resolve(**feature_kwargs)
+
+
+def as_dataset(
+    feature,
+    label_function=None,
+    batch_function=lambda image: image,
+    batch_size=None,
+    size=None,
+    seed=None,
+    num_parallel_calls=tf.data.AUTOTUNE,
+    deterministic=False,
+    cache=None,
+    prefetch=tf.data.AUTOTUNE,
+    feature_kwargs={},
+):
+    """Creates a tf.data.Dataset that resolves a feature.
+
+    Each element of the dataset is created by updating and resolving the
+    feature in a `tf.py_function`. Element `i` is updated with the numpy
+    random state seeded from `seed` and `i`, which fixes the `hash_key` of
+    every feature, and thereby the random numbers drawn while resolving.
+
+    Features are not thread safe. If `feature` is a function returning a new
+    feature, each thread of the map resolves its own feature, in parallel.
+    Otherwise, resolves are serialized, and the dataset overlaps the
+    preparation of the input with the training step through prefetching.
+
+    The numpy random state is shared by all threads, and features reseed it
+    while resolving. Parallel resolves therefore draw from each other's
+    streams, and elements are only reproducible if `deterministic` is True,
+    which serializes the whole update and resolve of each element.
+
+    Parameters
+    ----------
+    feature : Feature or Callable[] -> Feature
+        The feature to resolve images from, or a function creating it.
+    label_function : Callable[Image] -> array_like, optional
+        Function that returns the label corresponding to a feature output.
+        If given, the dataset yields (input, label) tuples.
+    batch_function : Callable[Image] -> array_like
+        Function that returns the input corresponding to a feature output.
+    batch_size : int, optional
+        If given, the elements are batched, dropping the remainder.
+    size : int, optional
+        Number of elements of the dataset. If None, the dataset is infinite,
+        and every element is new. Otherwise, each epoch contains the same
+        `size` elements.
+    seed : int, optional
+        Seed of the elements. Defaults to a random seed.
+    num_parallel_calls : int
+        Number of elements resolved in parallel.
+    deterministic : bool
+        Whether element `i` should always be the same for a given `seed`, and
+        the elements always be in order. Serializes the resolves.
+    cache : str, optional
+        If given, the elements are cached in memory (if "") or in files with
+        this prefix, and only resolved once. Requires `size`.
+    prefetch : int, optional
+        Number of elements (or batches) to prepare in advance.
+    feature_kwargs : dict
+        Set of options to pass to the feature when resolving.
+
+    Returns
+    -------
+    tf.data.Dataset
+    """
+
+    assert cache is None or size is not None, "Caching requires a finite size"
+
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+
+    if isinstance(feature, Feature):
+        shared_feature = feature
+        get_feature = lambda: shared_feature
+    else:
+        shared_feature = None
+        get_feature = feature
+
+    local = threading.local()
+    if deterministic or shared_feature is not None:
+        lock = threading.Lock()
+    else:
+        lock = contextlib.nullcontext()
+
+    def resolve_element(index):
+        if not hasattr(local, "feature"):
+            local.feature = get_feature()
+
+        element_seed = np.random.SeedSequence([seed, int(index)]).generate_state(1)
+        with lock:
+            np.random.seed(element_seed[0])
+            image = local.feature.update().resolve(**feature_kwargs)
+
+            outputs = [np.asarray(batch_function(image))]
+            if label_function:
+                outputs.append(np.asarray(label_function(image)))
+        return outputs
+
+    # Resolve one element to find the dtypes and shapes of the outputs
+    example = resolve_element(0)
+    output_dtypes = [tf.as_dtype(output.dtype) for output in example]
+
+    def map_function(index):
+        outputs = tf.py_function(resolve_element, [index], output_dtypes)
+        for output, example_output in zip(outputs, example):
+            output.set_shape(example_output.shape)
+        return tuple(outputs) if len(outputs) > 1 else outputs[0]
+
+    if size is None:
+        dataset = tf.data.Dataset.counter()
+    else:
+        dataset = tf.data.Dataset.range(size)
+
+    dataset = dataset.map(
+        map_function,
+        num_parallel_calls=num_parallel_calls,
+        deterministic=deterministic,
+    )
+
+    if cache is not None:
+        dataset = dataset.cache(cache)
+
+    if batch_size:
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+
+    if prefetch:
+        dataset = dataset.prefetch(prefetch)
+
+    return dataset
+
+
+def _to_shared_memory(*arrays):
+    # Copies arrays into a new block of shared memory. Returns the name of the
+    # block and the shape, dtype and offset of each array.
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+
+    block = shared_memory.SharedMemory(
+        create=True, size=max(sum(array.nbytes for array in arrays), 1)
+    )
+
+    layout = []
+    offset = 0
+    for array in arrays:
+        np.copyto(
+            np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset),
+            array,
+        )
+        layout.append((array.shape, array.dtype.str, offset))
+        offset += array.nbytes
+
+    name = block.name
+    block.close()
+    return name, layout
+
+
+def _from_shared_memory(name, layout, function=None):
+    # Calls `function` with views of the arrays in a block created by
+    # _to_shared_memory, and frees the block. By default, returns copies of
+    # the arrays.
+    if function is None:
+        function = lambda *arrays: [array.copy() for array in arrays]
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return function(
+            *[
+                np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+                for shape, dtype, offset in layout
+            ]
+        )
+    finally:
+        block.close()
+        block.unlink()
+
+
+class _SampleBuffer:
+    # Ring buffer of (image, label) samples, stored in two preallocated
+    # contiguous arrays. The arrays are allocated when the first sample is
+    # added, with as many slots as fit in `max_bytes`.
+
+    def __init__(self, max_bytes, max_size=np.inf, dtype=None, label_dtype=None):
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self.dtype = dtype
+        self.label_dtype = label_dtype
+
+        self.images = None
+        self.labels = None
+        self.capacity = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def put(self, index, image, label):
+        # Stores the sample in slot `index` modulo the capacity.
+        if self.images is None:
+            self._allocate(np.asarray(image), np.asarray(label))
+
+        slot = index % self.capacity
+        self.images[slot] = image
+        self.labels[slot] = label
+        self.size = max(self.size, min(index + 1, self.capacity))
+
+    def gather(self, indices, images_out, labels_out):
+        np.take(self.images, indices, axis=0, out=images_out)
+        np.take(self.labels, indices, axis=0, out=labels_out)
+
+    def batch_shapes(self, batch_size):
+        return (
+            (batch_size, *self.images.shape[1:]),
+            (batch_size, *self.labels.shape[1:]),
+        )
+
+    def _allocate(self, image, label):
+        dtype = np.dtype(self.dtype or image.dtype)
+        label_dtype = np.dtype(self.label_dtype or label.dtype)
+
+        sample_bytes = image.size * dtype.itemsize + label.size * label_dtype.itemsize
+        capacity = int(min(self.max_size, self.max_bytes // max(sample_bytes, 1)))
+        assert (
+            capacity > 0
+        ), "A single sample ({0} bytes) exceeds max_data_bytes".format(sample_bytes)
+
+        self.images = np.empty((capacity, *image.shape), dtype)
+        self.labels = np.empty((capacity, *label.shape), label_dtype)
+        self.capacity = capacity
@@ -18,6 +18,8 @@ pad_image_to_fft(image: Image, axes = (0, 1))
 
 import numpy as np
 
+from .backend import fft
+
 
 class Image(np.ndarray):
     """Subclass of numpy ndarray
@@ -50,18 +52,60 @@ class Image(np.ndarray):
     # This ensures that the output will always be an Image
     __array_priority__ = 999
 
+    # Images derived from another image, such as views and the outputs of
+    # ufuncs, share its list of properties until either list is accessed. The
+    # accessed list is then copied, so that changes are not shared.
+    _properties = ()
+    _owns_properties = False
+    _deduplicate_on_copy = False
+
+    # Hashes of the hash_keys in the list, for duplicate checks. Covers the
+    # first `_hash_count` entries, and is rebuilt if the list has changed in
+    # any other way than by appending since (see `_PropertyList`).
+    _hash_index = None
+    _hash_count = 0
+    _hash_changes = 0
+
     def __new__(cls, input_array, properties=None):
         # Converts input to ndarray, and then to an Image
         # In particular, it creates the properties
 
         image = np.array(input_array).view(cls)
-        if properties is None:
-            # If input_array has properties attribute, retrieve a copy of it
-            properties = getattr(input_array, "properties", [])[:]
-        image.properties = properties
+        if properties is not None:
+            image.properties = properties
+        elif isinstance(input_array, Image):
+            # Copied when accessed
+            image._share_properties(input_array, input_array._deduplicate_on_copy)
+        else:
+            image.properties = _PropertyList(getattr(input_array, "properties", []))
 
         return image
 
+    @property
+    def properties(self) -> list:
+        """List of dictionaries of the current value of all properties of the
+        features used to resolve the image."""
+
+        if not self._owns_properties:
+            shared = self._properties
+            self._owns_properties = True
+            self._properties = _PropertyList()
+            self._hash_index = None
+            if self._deduplicate_on_copy:
+                self._merge(shared)
+            else:
+                self._properties.extend(shared)
+
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties: list):
+        if not isinstance(properties, _PropertyList):
+            properties = _PropertyList(properties)
+        self._properties = properties
+        self._owns_properties = True
+        self._hash_index = None
+
     def append(self, property_dict: dict):
         """Appends a dictionary to the properties list.
 
@@ -107,7 +151,9 @@ class Image(np.ndarray):
         """
 
         if get_one:
-            for prop in self.properties:
+            # Duplicates only follow the first instance, so the shared list
+            # can be searched without copying it.
+            for prop in self._properties:
                 if key in prop:
                     return prop[key]
             return default
@@ -134,30 +180,74 @@ class Image(np.ndarray):
 
         """
 
-        for new_prop in other.properties:
+        if isinstance(other, Image):
+            # Duplicates in the list of other are skipped when merged.
+            new_properties = other._properties
+        else:
+            new_properties = other.properties
+
+        if new_properties:
+            self.properties
+            self._merge(new_properties)
+
+        return self
+
+    def _merge(self, new_properties):
+        # Appends the properties whose hash_key is not already in the list.
+        properties = self._properties
+        hash_index = self._index()
+
+        for new_prop in new_properties:
 
             # If no hash_key, add it
             if "hash_key" not in new_prop:
-                self.append(new_prop)
+                properties.append(new_prop)
                 continue
 
-            should_append = True
-            # Else, see if hash is unique
-            for my_prop in self.properties:
-
-                if (
+            hash_key = _hashable(new_prop["hash_key"])
+            if hash_key is None:
+                # Compared to each property, as before indexing.
+                if not any(
                     "hash_key" in my_prop
                     and my_prop["hash_key"] == new_prop["hash_key"]
+                    for my_prop in properties
                 ):
+                    properties.append(new_prop)
+                continue
 
-                    # Key is not unique, don't add
-                    should_append = False
-                    break
-
-            if should_append:
-                self.append(new_prop)
-
-        return self
+            # Else, see if hash is unique
+            if hash_key not in hash_index:
+                hash_index.add(hash_key)
+                properties.append(new_prop)
+
+        self._hash_count = len(properties)
+
+    def _index(self):
+        # Returns the hashes of the hash_keys in the list, indexing new entries.
+        properties = self._properties
+        if self._hash_index is None or self._hash_changes != properties.changes:
+            self._hash_index = set()
+            self._hash_count = 0
+            self._hash_changes = properties.changes
+
+        for prop in properties[self._hash_count :]:
+            if "hash_key" in prop:
+                hash_key = _hashable(prop["hash_key"])
+                if hash_key is not None:
+                    self._hash_index.add(hash_key)
+        self._hash_count = len(properties)
+
+        return self._hash_index
+
+    def _share_properties(self, image, deduplicate):
+        if image._owns_properties:
+            # Both images copy the list before changing it.
+            image._owns_properties = False
+            image._deduplicate_on_copy = False
+        self._properties = image._properties
+        self._owns_properties = False
+        self._deduplicate_on_copy = deduplicate
+        self._hash_index = None
 
     def __array_wrap__(self, image_after_function, context=None):
         # Called at end when a function is called on an image
@@ -167,8 +257,11 @@ class Image(np.ndarray):
 
         if image_after_function is self:  # for in-place operations
             image_with_restored_properties = image_after_function
+        elif isinstance(image_after_function, Image):
+            # A new array, shares its properties until accessed
+            image_with_restored_properties = image_after_function
         else:
-            image_with_restored_properties = Image(image_after_function)
+            image_with_restored_properties = image_after_function.view(Image)
 
         if context is not None:
             # context is information about operation
@@ -191,14 +284,53 @@ class Image(np.ndarray):
         if image is None:
             return
 
-        # Ensure self has properties defined
-        self.properties = getattr(self, "properties", [])
+        # Merge from image if image is Image. The properties are shared
+        # until accessed, and copied without duplicates.
+        if isinstance(image, Image) and image._properties:
+            self._share_properties(image, True)
+
+
+class _PropertyList(list):
+    # List of the properties of an image. Counts the changes that can remove
+    # or replace entries, which invalidate the hash index of the image.
+    # Appending entries does not, since new entries are indexed incrementally.
+
+    changes = 0
+
+    def _changed(method):
+        def wrapper(self, *args, **kwargs):
+            self.changes += 1
+            return method(self, *args, **kwargs)
+
+        return wrapper
+
+    __setitem__ = _changed(list.__setitem__)
+    __delitem__ = _changed(list.__delitem__)
+    __imul__ = _changed(list.__imul__)
+    insert = _changed(list.insert)
+    pop = _changed(list.pop)
+    remove = _changed(list.remove)
+    clear = _changed(list.clear)
+    reverse = _changed(list.reverse)
+    sort = _changed(list.sort)
+
+    del _changed
+
 
-        # Merge from image if image is Image
-        if isinstance(image, Image):
-            self.merge_properties_from(image)
+def _hashable(hash_key):
+    # Hashable version of a hash_key, or None if it cannot be hashed.
+    if isinstance(hash_key, list):
+        hash_key = tuple(hash_key)
+    try:
+        hash(hash_key)
+    except TypeError:
+        return None
+    return hash_key
 
 
+# Padded lengths of pad_image_to_fft. The simulated optical fields depend on
+# the padding, so these lengths are kept rather than the smallest fast
+# lengths of `backend.fft.next_fast_len`.
 FASTEST_SIZES = [0]
 for n in range(1, 10):
     FASTEST_SIZES += [2 ** a * 3 ** (n - a - 1) for a in range(n)]
@@ -208,7 +340,8 @@ FASTEST_SIZES = np.sort(FASTEST_SIZES)
 def pad_image_to_fft(image: Image, axes=(0, 1)) -> Image:
     """Pads image to speed up fast fourier transforms.
     Pads image to speed up fast fourier transforms by adding 0s to the
-    end of the image.
+    end of the image, up to the smallest length in `FASTEST_SIZES`, or
+    beyond those up to the length given by `backend.fft.next_fast_len`.
 
     Parameters
     ----------
@@ -219,11 +352,12 @@ def pad_image_to_fft(image: Image, axes=(0, 1)) -> Image:
     """
 
     def _closest(dim):
-        # Returns the smallest value frin FASTEST_SIZES
+        # Returns the smallest value from FASTEST_SIZES
         # larger than dim
-        for size in FASTEST_SIZES:
-            if size >= dim:
-                return size
+        index = np.searchsorted(FASTEST_SIZES, dim)
+        if index < len(FASTEST_SIZES):
+            return FASTEST_SIZES[index]
+        return fft.next_fast_len(dim)
 
     new_shape = np.array(image.shape)
     for axis in axes:
@@ -10,6 +10,7 @@ NormalizeMinMax
 
 from .features import Feature
 from .image import Image
+from .dtypes import as_float
 from . import utils
 import numpy as np
 import skimage
@@ -30,7 +31,7 @@ class Add(Feature):
         super().__init__(value=value, **kwargs)
 
     def get(self, image, value, **kwargs):
-        return image + value
+        return as_float(image, value) + value
 
 
 class Subtract(Feature):
@@ -46,7 +47,7 @@ class Subtract(Feature):
         super().__init__(value=value, **kwargs)
 
     def get(self, image, value, **kwargs):
-        return image - value
+        return as_float(image, value) - value
 
 
 class Multiply(Feature):
@@ -62,7 +63,7 @@ class Multiply(Feature):
         super().__init__(value=value, **kwargs)
 
     def get(self, image, value, **kwargs):
-        return image * value
+        return as_float(image, value) * value
 
 
 class Divide(Feature):
@@ -78,7 +79,7 @@ class Divide(Feature):
         super().__init__(value=value, **kwargs)
 
     def get(self, image, value, **kwargs):
-        return image / value
+        return as_float(image) / value
 
 
 class Power(Feature):
@@ -94,7 +95,7 @@ class Power(Feature):
         super().__init__(value=value, **kwargs)
 
     def get(self, image, value, **kwargs):
-        return image ** value
+        return as_float(image, value) ** value
 
 
 class Average(Feature):
@@ -162,6 +163,7 @@ class NormalizeMinMax(Feature):
         super().__init__(min=min, max=max, **kwargs)
 
     def get(self, image, min, max, **kwargs):
+        image = as_float(image)
         image = image / (np.max(image) - np.min(image)) * (max - min)
         image = image - np.min(image) + min
         image[np.isnan(image)] = 0
@@ -15,6 +15,7 @@ Poisson
 import numpy as np
 from .features import Feature
 from .image import Image
+from .dtypes import as_float, get_dtype_policy
 
 
 class Noise(Feature):
@@ -33,7 +34,7 @@ class Background(Noise):
         super().__init__(offset=offset, **kwargs)
 
     def get(self, image, offset, **kwargs):
-        return image + offset
+        return as_float(image, offset) + offset
 
 
 # ALIASES
@@ -56,7 +57,9 @@ class Gaussian(Noise):
 
     def get(self, image, mu, sigma, **kwargs):
 
-        noisy_image = mu + image + np.random.randn(*image.shape) * sigma
+        noise = np.random.randn(*image.shape)
+        noise = noise.astype(get_dtype_policy().float, copy=False)
+        noisy_image = mu + as_float(image) + noise * sigma
         return noisy_image
 
 
@@ -82,6 +85,10 @@ class Poisson(Noise):
         peak = np.abs(np.max(image) - background)
 
         rescale = snr ** 2 / peak ** 2
-        noisy_image = Image(np.random.poisson(image * rescale) / rescale)
+        noisy_image = Image(
+            (np.random.poisson(image * rescale) / rescale).astype(
+                get_dtype_policy().float, copy=False
+            )
+        )
         noisy_image.properties = image.properties
         return noisy_image
@@ -16,10 +16,11 @@ Brightfield
 """
 
 import numpy as np
-from .features import Feature, StructuralFeature
+from .backend import fft
+from .cache import StackCache
+from .features import Feature, StructuralFeature, _content_key
 from .image import Image, pad_image_to_fft
-
-from scipy.ndimage import convolve
+from .dtypes import get_dtype_policy
 
 
 class Microscope(StructuralFeature):
@@ -140,10 +141,17 @@ class Optics(Feature):
         None returns entire image.
     pupil : Feature
         A feature-set resolving the pupil function at focus. The feature-set
-        receive an unaberrated pupil as input.
+        receive an unaberrated pupil as input. Pupils are cached, and unlike
+        other features, resolving the pupil leaves the global numpy random
+        state unchanged, so that later random values do not depend on whether
+        the pupil was cached.
 
     """
 
+    # Pupils, keyed by the parameters of the objective and of its aberrations,
+    # and phase ramps of defocus. Shared by all instances.
+    pupil_cache = StackCache(max_memory_bytes=2 ** 27)
+
     def __init__(
         self,
         NA=0.7,
@@ -192,7 +200,30 @@ class Optics(Feature):
 
         return output, {"pupil_at_focus": pupil}
 
-    def _pupil(
+    def _pupil(self, shape, defocus=0, **kwargs):
+        # Calculates the pupil at each z-position in defocus.
+        pupil_function, pupil_properties, z_shift, key = self._pupil_at_focus(
+            shape, **kwargs
+        )
+
+        pupil_functions = []
+        for z in defocus:
+            phase_key = "{0}:defocus={1!r}".format(key, float(z))
+            phase = self.pupil_cache.get(phase_key)
+            if phase is None:
+                phase = _remember(
+                    self.pupil_cache,
+                    phase_key,
+                    _defocus_phase(z_shift, z, pupil_function.dtype),
+                )
+
+            pupil_at_z = (pupil_function * phase).view(Image)
+            pupil_at_z.properties = pupil_properties[:]
+            pupil_functions.append(pupil_at_z)
+
+        return pupil_functions
+
+    def _pupil_at_focus(
         self,
         shape,
         NA,
@@ -203,57 +234,64 @@ class Optics(Feature):
         pupil,
         aberration=None,
         include_aberration=True,
-        defocus=0,
         **kwargs
     ):
-        # Calculates the pupil at each z-position in defocus.
-        shape = np.array(shape)
-
-        # Pupil radius
-        R = NA / wavelength * np.array(voxel_size)[:2]
-
-        x_radius = R[0] * shape[0]
-        y_radius = R[1] * shape[1]
-
-        x = (np.linspace(-(shape[0] / 2), shape[0] / 2 - 1, shape[0])) / x_radius + 1e-8
-        y = (np.linspace(-(shape[1] / 2), shape[1] / 2 - 1, shape[1])) / y_radius + 1e-8
-
-        W, H = np.meshgrid(y, x)
-        RHO = W ** 2 + H ** 2
-        RHO[RHO > 1] = 1
-        pupil_function = ((RHO < 1) * 1.0).astype(np.complex)
-        # Defocus
-        z_shift = (
-            2
-            * np.pi
-            * refractive_index_medium
-            / wavelength
-            * voxel_size[2]
-            * np.sqrt(1 - (NA / refractive_index_medium) ** 2 * RHO)
+        # Calculates the pupil at focus, its properties, the phase shift per
+        # unit of defocus, and a key identifying the pupil. The returned
+        # arrays are cached, and read-only.
+        key = repr(
+            (
+                tuple(shape),
+                NA,
+                wavelength,
+                refractive_index_medium,
+                tuple(np.array(voxel_size).tolist()),
+                np.dtype(get_dtype_policy().complex).str,
+            )
         )
+        pupil_function = self.pupil_cache.get(key)
+        z_shift = self.pupil_cache.get(key + ":z_shift")
+        if pupil_function is None or z_shift is None:
+            pupil_function, z_shift = _unaberrated_pupil(
+                shape, NA, wavelength, refractive_index_medium, voxel_size
+            )
+            pupil_function = _remember(self.pupil_cache, key, pupil_function)
+            z_shift = _remember(self.pupil_cache, key + ":z_shift", z_shift)
 
-        # Downsample the upsampled pupil
-
-        pupil_function[np.isnan(pupil_function)] = 0
-        pupil_function[np.isinf(pupil_function)] = 0
-        pupil_function_is_nonzero = pupil_function != 0
-
+        pupil_properties = []
         if include_aberration:
             pupil = pupil or aberration
             if isinstance(pupil, Feature):
-                pupil_function = pupil.resolve(pupil_function, **kwargs)
+                # The aberrated pupil is determined by the current values of
+                # the properties of the aberration. So that the result does
+                # not depend on whether it was cached, resolving the
+                # aberration leaves the global random state unchanged, and its
+                # hash keys are not recorded.
+                key += ":" + _content_key(pupil, [], kwargs)
+                aberrated = self.pupil_cache.get(key)
+                pupil_properties = self.pupil_cache.get_metadata(key)
+                if aberrated is None or pupil_properties is None:
+                    random_state = np.random.get_state()
+                    aberrated = pupil.resolve(np.array(pupil_function), **kwargs)
+                    np.random.set_state(random_state)
+
+                    pupil_properties = [
+                        {
+                            name: value
+                            for name, value in record.items()
+                            if name != "hash_key"
+                        }
+                        for record in getattr(aberrated, "properties", [])
+                    ]
+                    aberrated = _remember(
+                        self.pupil_cache, key, aberrated, pupil_properties
+                    )
+                pupil_function = aberrated
             elif isinstance(pupil, np.ndarray):
-                pupil_function *= pupil
+                key += ":" + _content_key(pupil, [], {})
+                pupil_function = pupil_function * pupil
 
-        pupil_functions = []
-        for z in defocus:
-            pupil_at_z = Image(pupil_function)
-            pupil_at_z[pupil_function_is_nonzero] *= np.exp(
-                1j * z_shift[pupil_function_is_nonzero] * z
-            )
-            pupil_functions.append(pupil_at_z)
-
-        return pupil_functions
+        return pupil_function, pupil_properties, z_shift, key
 
     def _pad_volume(
         self, volume, limits=None, padding=None, upscaled_output_region=None, **kwargs
@@ -298,7 +336,7 @@ class Optics(Feature):
             )
         new_volume = np.zeros(
             np.diff(new_limits, axis=1)[:, 0].astype(np.int32),
-            dtype=np.complex,
+            dtype=get_dtype_policy().complex,
         )
 
         old_region = (limits - new_limits).astype(np.int32)
@@ -344,10 +382,18 @@ class Fluorescence(Optics):
         None returns entire image.
     pupil : Feature
         A feature-set resolving the pupil function at focus. The feature-set
-        receive an unaberrated pupil as input.
+        receive an unaberrated pupil as input. Pupils are cached, and unlike
+        other features, resolving the pupil leaves the global numpy random
+        state unchanged, so that later random values do not depend on whether
+        the pupil was cached.
 
     """
 
+    __plain_arrays__ = True
+
+    # Optical transfer functions, shared by all instances.
+    otf_cache = StackCache(max_memory_bytes=2 ** 28)
+
     def get(self, illuminated_volume, limits, **kwargs):
         """Convolves the image with a pupil function"""
         # Pad volume
@@ -388,9 +434,9 @@ class Fluorescence(Optics):
         ]
         z_limits = limits[2, :]
 
-        output_image = Image(np.zeros((*padded_volume.shape[0:2], 1)))
-
-        index_iterator = range(padded_volume.shape[2])
+        output_image = np.zeros(
+            (*padded_volume.shape[0:2], 1), dtype=get_dtype_policy().float
+        )
 
         # Get planes in volume where not all values are 0.
         z_iterator = np.linspace(
@@ -405,40 +451,61 @@ class Fluorescence(Optics):
         # Further pad image to speed up fft
         volume = pad_image_to_fft(padded_volume, axes=(0, 1))
 
-        pupils = self._pupil(volume.shape[:2], defocus=z_values, **kwargs)
-        pupil_iterator = iter(pupils)
-
-        # Loop through voluma and convole sample with pupil function
-        for i, z in zip(index_iterator, z_iterator):
-
-            if zero_plane[i]:
-                continue
+        pupil_properties = []
+        if z_values.size:
+            optical_transfer_functions, pupil_properties = self._otf(
+                volume.shape[:2], z_values, **kwargs
+            )
 
-            image = volume[:, :, i]
-            pupil = Image(next(pupil_iterator))
+            # The sum of the convolutions of each plane with its point spread
+            # function is calculated in Fourier space, with one inverse
+            # transform. The point spread functions are real, so only the real
+            # part of the volume contributes to the image.
+            planes = np.real(volume[:, :, ~zero_plane])
+            fourier_field = fft.rfft2(planes, axes=(0, 1))
+            fourier_field *= optical_transfer_functions
+            field = fft.irfft2(
+                fourier_field.sum(axis=-1), s=volume.shape[:2], axes=(0, 1)
+            )
 
-            psf = np.square(np.abs(np.fft.ifft2(np.fft.fftshift(pupil))))
-            optical_transfer_function = np.fft.fft2(psf)
+            output_image[:, :, 0] = field[
+                : padded_volume.shape[0], : padded_volume.shape[1]
+            ]
 
-            fourier_field = np.fft.fft2(image)
-            convolved_fourier_field = fourier_field * optical_transfer_function
+        # The properties of the volume are attached in front of those of the
+        # pupil after the call.
+        output_image = output_image[pad[0] : -pad[2], pad[1] : -pad[3]].view(Image)
+        output_image.properties = list(pupil_properties)
 
-            field = Image(np.fft.ifft2(convolved_fourier_field))
+        return output_image
 
-            # Discard remaining imaginary part (should be 0 up to rounding error)
-            field = np.real(field)
+    def _otf(self, shape, z_values, **kwargs):
+        # Returns the optical transfer functions of the planes at z_values,
+        # stacked along the last axis, as the real fourier transforms of the
+        # point spread functions. Also returns the properties of the pupil.
+        pupil_function, pupil_properties, z_shift, key = self._pupil_at_focus(
+            shape, **kwargs
+        )
 
-            output_image[:, :, 0] += field[
-                : padded_volume.shape[0], : padded_volume.shape[1]
-            ]
+        plane_keys = [key + ":" + repr(float(z)) for z in z_values]
+        optical_transfer_functions = [
+            self.otf_cache.get(plane_key) for plane_key in plane_keys
+        ]
 
-        output_image = output_image[pad[0] : -pad[2], pad[1] : -pad[3]]
-        try:
-            output_image.properties = illuminated_volume.properties + pupil.properties
-        except UnboundLocalError:
-            output_image.properties = illuminated_volume.properties
+        missing = [
+            index for index, otf in enumerate(optical_transfer_functions) if otf is None
+        ]
+        if missing:
+            pupils = _defocus_pupil(pupil_function, z_shift, z_values[missing])
+            pupils = fft.fftshift(pupils, axes=(0, 1))
+            psf = np.square(np.abs(fft.ifft2(pupils, axes=(0, 1))))
+            computed = fft.rfft2(psf, axes=(0, 1))
+            for position, index in enumerate(missing):
+                optical_transfer_functions[index] = self.otf_cache.put(
+                    plane_keys[index], computed[:, :, position]
+                )
 
-        return output_image
+        return np.stack(optical_transfer_functions, axis=-1), pupil_properties
 
 
 class Brightfield(Optics):
@@ -475,10 +542,15 @@ class Brightfield(Optics):
         None returns entire image.
     pupil : Feature
         A feature-set resolving the pupil function at focus. The feature-set
-        receive an unaberrated pupil as input.
+        receive an unaberrated pupil as input. Pupils are cached, and unlike
+        other features, resolving the pupil leaves the global numpy random
+        state unchanged, so that later random values do not depend on whether
+        the pupil was cached.
 
     """
 
+    __plain_arrays__ = True
+
     def get(self, illuminated_volume, limits, fields, **kwargs):
         """Convolves the image with a pupil function"""
         # Pad volume
@@ -519,7 +591,7 @@ class Brightfield(Optics):
         ]
         z_limits = limits[2, :]
 
-        output_image = Image(np.zeros((*padded_volume.shape[0:2], 1)))
+        output_image = np.zeros((*padded_volume.shape[0:2], 1))
 
         index_iterator = range(padded_volume.shape[2])
         z_iterator = np.linspace(
@@ -542,14 +614,16 @@ class Brightfield(Optics):
             volume.shape[:2], defocus=[-z_limits[1]], include_aberration=True, **kwargs
         )
 
-        pupil_step = np.fft.fftshift(pupils[0])
+        pupils = [np.asarray(pupil) for pupil in pupils]
+        pupil_step = fft.fftshift(pupils[0])
 
+        complex_dtype = get_dtype_policy().complex
         if "illumination" in kwargs:
-            light_in = np.ones(volume.shape[:2], dtype=np.complex)
+            light_in = np.ones(volume.shape[:2], dtype=complex_dtype)
             light_in = kwargs["illumination"].resolve(light_in, **kwargs)
-            light_in = np.fft.fft2(light_in)
+            light_in = fft.fft2(np.asarray(light_in))
         else:
-            light_in = np.zeros(volume.shape[:2], dtype=np.complex)
+            light_in = np.zeros(volume.shape[:2], dtype=complex_dtype)
             light_in[0, 0] = light_in.size
 
         K = 2 * np.pi / kwargs["wavelength"]
@@ -564,12 +638,14 @@ class Brightfield(Optics):
             to_remove = []
             for idx, fz in enumerate(field_z):
                 if fz < z:
-                    propagation_matrix = self._pupil(
-                        fields[idx].shape,
-                        defocus=[z - fz - field_offsets[idx] / voxel_size[-1]],
-                        include_aberration=False,
-                        **kwargs
-                    )[0]
+                    propagation_matrix = np.asarray(
+                        self._pupil(
+                            fields[idx].shape,
+                            defocus=[z - fz - field_offsets[idx] / voxel_size[-1]],
+                            include_aberration=False,
+                            **kwargs
+                        )[0]
+                    )
                     propagation_matrix = propagation_matrix * np.exp(
                         1j
                         * voxel_size[-1]
@@ -579,9 +655,9 @@ class Brightfield(Optics):
                         * kwargs["refractive_index_medium"]
                         * (z - fz)
                     )
-                    light_in += np.fft.fft2(fields[idx][:, :, 0]) * np.fft.fftshift(
-                        propagation_matrix
-                    )
+                    light_in += fft.fft2(
+                        np.asarray(fields[idx])[:, :, 0]
+                    ) * fft.fftshift(propagation_matrix)
                     to_remove.append(idx)
 
             for idx in reversed(to_remove):
@@ -593,19 +669,21 @@ class Brightfield(Optics):
                 continue
 
             ri_slice = volume[:, :, i]
-            light = np.fft.ifft2(light_in)
+            light = fft.ifft2(light_in)
             light_out = light * np.exp(1j * ri_slice * voxel_size[-1] * K)
-            light_in = np.fft.fft2(light_out)
+            light_in = fft.fft2(light_out)
 
         # Add remaining fields
         for idx, fz in enumerate(field_z):
             prop_dist = z - fz - field_offsets[idx] / voxel_size[-1]
-            propagation_matrix = self._pupil(
-                fields[idx].shape,
-                defocus=[prop_dist],
-                include_aberration=False,
-                **kwargs
-            )[0]
+            propagation_matrix = np.asarray(
+                self._pupil(
+                    fields[idx].shape,
+                    defocus=[prop_dist],
+                    include_aberration=False,
+                    **kwargs
+                )[0]
+            )
             propagation_matrix = propagation_matrix * np.exp(
                 -1j
                 * voxel_size[-1]
@@ -615,23 +693,22 @@ class Brightfield(Optics):
                 * kwargs["refractive_index_medium"]
                 * prop_dist
             )
-            light_in += np.fft.fft2(fields[idx][:, :, 0]) * np.fft.fftshift(
+            light_in += fft.fft2(np.asarray(fields[idx])[:, :, 0]) * fft.fftshift(
                 propagation_matrix
             )
 
-        light_in_focus = light_in * np.fft.fftshift(pupils[-1])
+        light_in_focus = light_in * fft.fftshift(pupils[-1])
 
-        output_image = np.fft.ifft2(light_in_focus)[
+        output_image = fft.ifft2(light_in_focus)[
             : padded_volume.shape[0], : padded_volume.shape[1]
         ]
         output_image = np.expand_dims(output_image, axis=-1)
-        output_image = Image(output_image[pad[0] : -pad[2], pad[1] : -pad[3]])
+        output_image = output_image[pad[0] : -pad[2], pad[1] : -pad[3]]
 
         if not kwargs.get("return_field", False):
             output_image = np.square(np.abs(output_image))
 
-        output_image.properties = illuminated_volume.properties
-
+        # The properties of the volume are attached after the call.
         return output_image
 
 
@@ -675,14 +752,78 @@ class IlluminationGradient(Feature):
         return image
 
 
-def _get_position(image, mode="corner", return_z=False):
-    # Extracts the position of the upper left corner of a scatterer
+def _unaberrated_pupil(shape, NA, wavelength, refractive_index_medium, voxel_size):
+    # Calculates the pupil at focus without aberrations, and the phase shift
+    # per unit of defocus.
+    shape = np.array(shape)
+
+    # Pupil radius
+    R = NA / wavelength * np.array(voxel_size)[:2]
+
+    x_radius = R[0] * shape[0]
+    y_radius = R[1] * shape[1]
+
+    x = (np.linspace(-(shape[0] / 2), shape[0] / 2 - 1, shape[0])) / x_radius + 1e-8
+    y = (np.linspace(-(shape[1] / 2), shape[1] / 2 - 1, shape[1])) / y_radius + 1e-8
+
+    W, H = np.meshgrid(y, x)
+    RHO = W ** 2 + H ** 2
+    RHO[RHO > 1] = 1
+    pupil_function = (RHO < 1).astype(get_dtype_policy().complex)
+    # Defocus
+    z_shift = (
+        2
+        * np.pi
+        * refractive_index_medium
+        / wavelength
+        * voxel_size[2]
+        * np.sqrt(1 - (NA / refractive_index_medium) ** 2 * RHO)
+    )
+
+    # Downsample the upsampled pupil
+
+    pupil_function[np.isnan(pupil_function)] = 0
+    pupil_function[np.isinf(pupil_function)] = 0
+
+    # Only nonzero values of the pupil are shifted by defocus
+    z_shift[pupil_function == 0] = 0
+
+    return pupil_function, z_shift
+
+
+def _defocus_phase(z_shift, z, dtype):
+    # The phase ramp of defocus z. If z is an array, the ramps of each z are
+    # stacked along the last axis.
+    if np.ndim(z):
+        z_shift = z_shift[..., np.newaxis]
+    return np.exp(1j * z_shift * z).astype(dtype, copy=False)
+
+
+def _defocus_pupil(pupil_function, z_shift, z):
+    # The pupil at defocus z. If z is an array, the pupils at each z are
+    # stacked along the last axis.
+    if np.ndim(z):
+        pupil_function = pupil_function[..., np.newaxis]
+    return pupil_function * _defocus_phase(z_shift, z, pupil_function.dtype)
+
+
+def _remember(cache, key, array, properties=None):
+    # Stores an array in a cache of pupils, as read-only so that it cannot be
+    # modified by its users.
+    array = np.array(array)
+    array.flags.writeable = False
+    return cache.put(key, array, properties)
+
+
+def _get_position(image, mode="corner", return_z=False, padding=0):
+    # Extracts the position of the upper left corner of a scatterer, padded
+    # by `padding` voxels on each side
     num_outputs = 2 + return_z
 
     if mode == "corner":
         # Probably unecessarily complicated expression
         shift = (
-            np.ceil((np.array(image.shape) - 1) / 2)
+            np.ceil((np.array(image.shape) + 2 * padding - 1) / 2)
             - (1 - np.mod(image.shape, 2)) * 0.5
         )
     else:
@@ -735,7 +876,7 @@ def _create_volume(
     if not isinstance(list_of_scatterers, list):
         list_of_scatterers = [list_of_scatterers]
 
-    volume = np.zeros((1, 1, 1), dtype=np.complex)
+    volume = np.zeros((1, 1, 1), dtype=get_dtype_policy().complex)
     limits = None
     OR = np.zeros((4,))
     OR[0] = (
@@ -759,6 +900,10 @@ def _create_volume(
         else int(upscaled_output_region[3] + pad[3])
     )
 
+    # First pass: find the scatterers within the output region and the
+    # limits of the volume containing them, so that it is allocated once.
+    # Each scatterer is placed with a margin of 2 voxels.
+    placed = []
     for scatterer in list_of_scatterers:
 
         position = _get_position(scatterer, mode="corner", return_z=True)
@@ -772,8 +917,6 @@ def _create_volume(
         else:
             scatterer_value = scatterer.get_property("value")
 
-        scatterer = scatterer * scatterer_value
-
         if limits is None:
             limits = np.zeros((3, 2), dtype=np.int32)
             limits[:, 0] = np.floor(position).astype(np.int32)
@@ -787,80 +930,47 @@ def _create_volume(
         ):
             continue
 
-        padded_scatterer = Image(
-            np.pad(
-                scatterer,
-                [(2, 2), (2, 2), (2, 2)],
-                "constant",
-                constant_values=0,
-            )
-        )
-        padded_scatterer.properties = scatterer.properties
-        scatterer = padded_scatterer
-        position = _get_position(scatterer, mode="corner", return_z=True)
-        shape = np.array(scatterer.shape)
+        position = _get_position(scatterer, mode="corner", return_z=True, padding=2)
+        corner = np.floor(position)
+        shape = np.array(scatterer.shape) + 4
 
-        if position is None:
-            RuntimeWarning(
-                "Optical device received an image without a position property. It will be ignored."
-            )
-            continue
+        limits[:, 0] = np.minimum(limits[:, 0], corner)
+        limits[:, 1] = np.maximum(limits[:, 1], corner + shape)
 
-        splined_scatterer = np.zeros_like(scatterer)
+        placed.append((scatterer, scatterer_value, position, corner))
 
-        x_off = position[0] - np.floor(position[0])
-        y_off = position[1] - np.floor(position[1])
-
-        kernel = np.array(
-            [
-                [0, 0, 0],
-                [0, (1 - x_off) * (1 - y_off), (1 - x_off) * y_off],
-                [0, x_off * (1 - y_off), x_off * y_off],
-            ]
+    # Second pass: add the scatterers, shifted by their sub-voxel offsets.
+    if placed:
+        volume = np.zeros(
+            np.diff(limits, axis=1)[:, 0], dtype=get_dtype_policy().complex
         )
 
-        for z in range(scatterer.shape[2]):
-            if splined_scatterer.dtype == np.complex:
-                splined_scatterer[:, :, z] = (
-                    convolve(np.real(scatterer[:, :, z]), kernel, mode="constant")
-                    + convolve(np.imag(scatterer[:, :, z]), kernel, mode="constant")
-                    * 1j
-                )
-            else:
-                splined_scatterer[:, :, z] = convolve(
-                    scatterer[:, :, z], kernel, mode="constant"
-                )
-
-        scatterer = splined_scatterer
-        position = np.floor(position)
-        new_limits = np.zeros(limits.shape, dtype=np.int32)
-        for i in range(3):
-            new_limits[i, :] = (
-                np.min([limits[i, 0], position[i]]),
-                np.max([limits[i, 1], position[i] + shape[i]]),
-            )
+    for scatterer, scatterer_value, position, corner in placed:
+        scatterer = np.asarray(scatterer) * scatterer_value
+        shifted_scatterer = _subpixel_shift(
+            scatterer, position[0] - corner[0], position[1] - corner[1]
+        )
 
-        if not (np.array(new_limits) == np.array(limits)).all():
-            new_volume = np.zeros(
-                np.diff(new_limits, axis=1)[:, 0].astype(np.int32),
-                dtype=np.complex,
-            )
-            old_region = (limits - new_limits).astype(np.int32)
-            limits = limits.astype(np.int32)
-            new_volume[
-                old_region[0, 0] : old_region[0, 0] + limits[0, 1] - limits[0, 0],
-                old_region[1, 0] : old_region[1, 0] + limits[1, 1] - limits[1, 0],
-                old_region[2, 0] : old_region[2, 0] + limits[2, 1] - limits[2, 0],
-            ] = volume
-            volume = new_volume
-            limits = new_limits
-
-        within_volume_position = position - limits[:, 0]
+        x, y, z = (corner - limits[:, 0]).astype(np.int32) + 2
+        shape = shifted_scatterer.shape
 
         # NOTE: Maybe shouldn't be additive.
         volume[
-            int(within_volume_position[0]) : int(within_volume_position[0] + shape[0]),
-            int(within_volume_position[1]) : int(within_volume_position[1] + shape[1]),
-            int(within_volume_position[2]) : int(within_volume_position[2] + shape[2]),
-        ] += scatterer
+            x : x + shape[0], y : y + shape[1], z : z + shape[2]
+        ] += shifted_scatterer
     return volume, limits
+
+
+def _subpixel_shift(scatterer, x_off, y_off):
+    # Shifts a scatterer by a fraction of a voxel along the first two axes,
+    # with bilinear interpolation. The output is one voxel larger along these
+    # axes.
+    shifted_scatterer = np.zeros(
+        (scatterer.shape[0] + 1, scatterer.shape[1] + 1, scatterer.shape[2]),
+        dtype=scatterer.dtype,
+    )
+    shifted_scatterer[:-1, :-1] = (1 - x_off) * (1 - y_off) * scatterer
+    shifted_scatterer[:-1, 1:] += (1 - x_off) * y_off * scatterer
+    shifted_scatterer[1:, :-1] += x_off * (1 - y_off) * scatterer
+    shifted_scatterer[1:, 1:] += x_off * y_off * scatterer
+    return shifted_scatterer
@@ -0,0 +1,313 @@
+"""Compiled plans for updating and resolving features
+
+Updating a feature walks its graph of features and properties, copying the
+dictionary of arguments at every property and inspecting the signature of
+every sampling function, on each call. Resolving it recurses through every
+`Branch` joining its features. For small images, this bookkeeping can cost as
+much as the array operations.
+
+A `Plan` walks the graph once, in the order of the dynamic update, and
+records a flat list of steps with the arguments of each sampling function
+already bound to the properties providing them. It then updates and resolves
+the feature by running the steps, with the same results and the same draws
+of random numbers as `Feature.update` and `Feature.resolve`.
+
+Properties that the plan cannot bind ahead of time, such as iterators,
+sequential properties and features overriding `_update`, are updated by their
+dynamic methods as steps of the plan.
+
+Classes
+-------
+Plan
+    Updates and resolves a feature from precomputed steps.
+"""
+
+import numpy as np
+
+from . import features
+from .properties import Property, SequentialProperty
+from .utils import get_kwarg_names, isiterable, kwarg_has_default
+
+
+class Plan:
+    """Updates and resolves a feature from precomputed steps.
+
+    Created by `Feature.compile()`. The plan holds references to the features
+    and properties of the graph, and needs to be compiled again if the graph
+    is modified, for example by replacing a property.
+
+    Parameters
+    ----------
+    feature : Feature
+        The feature to update and resolve.
+
+    Attributes
+    ----------
+    feature : Feature
+        The compiled feature.
+    """
+
+    def __init__(self, feature):
+        self.feature = feature
+
+        # The steps of an update depend on which properties are overridden by
+        # the arguments of the call, so one list is compiled per set of names.
+        self._updates = {}
+        self._stages = _stages(feature)
+
+    def update(self, **kwargs) -> "Plan":
+        """Updates the state of all properties.
+
+        Equivalent to `Feature.update`.
+
+        Returns
+        -------
+        self
+        """
+
+        if type(self.feature).update is not features.Feature.update:
+            self.feature.update(**kwargs)
+            return self
+
+        names = frozenset(kwargs)
+        steps = self._updates.get(names)
+        if steps is None:
+            steps = self._updates[names] = _compile_feature(
+                self.feature, {}, names, set()
+            )
+
+        with features.UpdateContext(kwargs) as context:
+            memo = context.memoization
+            for step in steps:
+                step(memo, kwargs)
+
+        return self
+
+    def resolve(self, image_list=None, **global_kwargs):
+        """Creates the image.
+
+        Equivalent to `Feature.resolve`. Features joined by `Branch` are
+        resolved one after the other, without resolving the branches.
+        """
+
+        if (
+            global_kwargs.get("property_memorability", 1)
+            >= features.StructuralFeature.__property_memorability__
+        ):
+            # The branches are recorded in the properties of the output.
+            return self.feature.resolve(image_list, **global_kwargs)
+
+        for stage in self._stages:
+            image_list = stage.resolve(image_list, **global_kwargs)
+        return image_list
+
+
+def _stages(feature):
+    # Lists the features joined by branches, in the order they are resolved.
+    # Branches with additional properties pass them to their features, and
+    # are resolved as a whole.
+    properties = feature.properties
+    if type(feature) is features.Branch and set(properties) == {
+        "feature_1",
+        "feature_2",
+        "hash_key",
+    }:
+        feature_1 = properties["feature_1"].sampling_rule
+        feature_2 = properties["feature_2"].sampling_rule
+        if isinstance(feature_1, features.Feature) and isinstance(
+            feature_2, features.Feature
+        ):
+            return _stages(feature_1) + _stages(feature_2)
+
+    return [feature]
+
+
+def _compile_feature(feature, scope, names, compiled):
+    # Mirrors Feature._update, called with the properties in `scope`.
+    if type(feature)._update is not features.Feature._update:
+        return [_dynamic_feature_step(feature, scope)]
+
+    properties = feature.properties
+    scope = {**scope, **properties}
+
+    steps = []
+    for key, prop in properties.items():
+        if key in names:
+            # Overridden by an argument of the update call.
+            compiled.add(id(prop))
+            steps.append(_override_step(prop, key))
+        else:
+            steps += _compile_property(prop, scope, names, compiled)
+
+    return steps
+
+
+def _compile_property(prop, scope, names, compiled):
+    # Mirrors Property.update, called with the properties in `scope`.
+    if id(prop) in compiled:
+        return []
+    compiled.add(id(prop))
+
+    if prop.parent:
+        scope = {**scope, **prop.parent}
+    rule = prop.sampling_rule
+
+    if type(prop) is not Property:
+        return [_dynamic_property_step(prop, scope)]
+
+    if isinstance(rule, features.Feature):
+        steps = _compile_feature(rule, scope, names, compiled)
+        return [_block_step(prop, steps, lambda: rule)]
+
+    if isinstance(rule, list) and all(map(_is_elementary_or_feature, rule)):
+        steps = []
+        for item in rule:
+            if isinstance(item, features.Feature):
+                steps += _compile_feature(item, scope, names, compiled)
+        return [_block_step(prop, steps, lambda: list(rule))]
+
+    if isinstance(rule, dict) and all(map(_is_elementary_or_feature, rule.values())):
+        steps = []
+        for item in rule.values():
+            if isinstance(item, features.Feature):
+                steps += _compile_feature(item, scope, names, compiled)
+        return [_block_step(prop, steps, lambda: dict(rule))]
+
+    if _is_elementary(rule):
+        return [_constant_step(prop, rule)]
+
+    if callable(rule) and not isiterable(rule):
+        return _compile_function(prop, rule, scope, names, compiled)
+
+    return [_dynamic_property_step(prop, scope)]
+
+
+def _compile_function(prop, function, scope, names, compiled):
+    # Mirrors the sampling of a function by Property.sample.
+    steps = []
+    bindings = []
+    for name in get_kwarg_names(function):
+        if name in names:
+            bindings.append((name, _USER_ARGUMENT, None))
+        elif name in scope:
+            dependency = scope[name]
+            if not isinstance(dependency, Property):
+                bindings.append((name, _VALUE, dependency))
+                continue
+            if dependency is prop:
+                bindings.append((name, _OWN_VALUE, None))
+                continue
+            if isinstance(dependency, SequentialProperty) and "sequence_step" in names:
+                return [_dynamic_property_step(prop, scope)]
+
+            # Compiled in the order the dynamic update would update it.
+            if dependency.parent:
+                dependency_scope = dict(dependency.parent)
+            else:
+                dependency_scope = scope
+            steps += _compile_property(dependency, dependency_scope, names, compiled)
+            bindings.append((name, _PROPERTY, dependency))
+        elif not kwarg_has_default(function, name):
+            bindings.append((name, _NONE, None))
+
+    return [_function_step(prop, function, bindings, scope, steps)]
+
+
+_USER_ARGUMENT, _PROPERTY, _VALUE, _OWN_VALUE, _NONE = range(5)
+
+
+def _function_step(prop, function, bindings, scope, steps):
+    # Updates the dependencies of a function, and then calls it.
+    bindings = tuple(bindings)
+
+    def step(memo, user_arguments):
+        if id(prop) in memo:
+            return
+        for inner_step in steps:
+            inner_step(memo, user_arguments)
+
+        function_input = {}
+        for name, source, dependency in bindings:
+            if source == _PROPERTY:
+                if id(dependency) not in memo:
+                    # Skipped by the plan, such as within a block that was
+                    # already updated.
+                    _update_dynamically(dependency, scope, user_arguments)
+                function_input[name] = dependency.current_value
+            elif source == _USER_ARGUMENT:
+                function_input[name] = user_arguments[name]
+            elif source == _VALUE:
+                function_input[name] = dependency
+            elif source == _OWN_VALUE:
+                function_input[name] = prop.current_value
+            else:
+                function_input[name] = None
+
+        value = function(**function_input)
+        while isinstance(value, Property):
+            value = prop.sample(value, **{**scope, **user_arguments})
+        prop.current_value = value
+
+    return step
+
+
+def _constant_step(prop, value):
+    def step(memo, user_arguments):
+        if id(prop) not in memo:
+            prop.current_value = value
+
+    return step
+
+
+def _override_step(prop, name):
+    def step(memo, user_arguments):
+        if id(prop) not in memo:
+            prop.current_value = user_arguments[name]
+
+    return step
+
+
+def _block_step(prop, steps, value):
+    # Updates the features of a property, and then sets its value.
+    def step(memo, user_arguments):
+        if id(prop) in memo:
+            return
+        for inner_step in steps:
+            inner_step(memo, user_arguments)
+        prop.current_value = value()
+
+    return step
+
+
+def _dynamic_property_step(prop, scope):
+    def step(memo, user_arguments):
+        prop.update(**{**scope, **user_arguments})
+
+    return step
+
+
+def _dynamic_feature_step(feature, scope):
+    def step(memo, user_arguments):
+        feature._update(**{**scope, **user_arguments})
+
+    return step
+
+
+def _update_dynamically(prop, scope, user_arguments):
+    if prop.parent:
+        prop.parent.update_item(prop)
+    else:
+        prop.update(**{**scope, **user_arguments})
+
+
+def _is_elementary(rule):
+    # Values that Property.sample returns as they are.
+    if isinstance(rule, (features.Feature, Property, dict, list)):
+        return False
+    if isinstance(rule, (tuple, np.ndarray)):
+        return True
+    return not isiterable(rule) and not callable(rule)
+
+
+def _is_elementary_or_feature(rule):
+    return isinstance(rule, features.Feature) or _is_elementary(rule)
@@ -79,11 +79,12 @@ class Property:
     @current_value.setter
     def current_value(self, updated_current_value):
         self._current_value = updated_current_value
-        if id(self) not in features.UPDATE_MEMO["memoization"]:
+        context = features.get_update_context()
+        if context is not None and id(self) not in context.memoization:
             # Some values work, some don't. self, updated_current_value and self._current_value work
             # Best guess is an error in the gc reference counter causing it to dereference
             # But then again, I don't think it should be the same reference anyway
-            features.UPDATE_MEMO["memoization"][id(self)] = updated_current_value
+            context.memoization[id(self)] = updated_current_value
 
     @current_value.getter
     def current_value(self):
@@ -109,22 +110,17 @@ class Property:
 
         """
 
-        # If currently updated through a call to feature and deeptrack.UPDATE_MEMO
-        my_id = id(self)
-
-        # if my_id in deeptrack.UPDATE_MEMO["memoization"] and not hasattr(self, '_current_value'):
-        #     a = 1+1
+        # If currently updated through a call to feature.update, only update once
+        context = features.get_update_context()
 
-        if (
-            features.UPDATE_LOCK.locked()
-            and my_id in features.UPDATE_MEMO["memoization"]
-        ):
+        if context is not None and id(self) in context.memoization:
             return self
 
         if self.parent:
             kwargs.update(self.parent)
 
-        kwargs.update(features.UPDATE_MEMO["user_arguments"])
+        if context is not None:
+            kwargs.update(context.user_arguments)
         self.current_value = self.sample(self.sampling_rule, **kwargs)
 
         return self
@@ -236,7 +232,9 @@ class Property:
             return sampling_rule
 
     def __deepcopy__(self, memo):
-        is_in = id(self) in features.UPDATE_MEMO["memoization"]
+        # Properties updated in the running update are shared by the copy
+        context = features.get_update_context()
+        is_in = context is not None and id(self) in context.memoization
         if is_in:
             return self
         else:
@@ -315,13 +313,12 @@ class SequentialProperty(Property):
             returns self
         """
         my_id = id(self)
-        if (
-            features.UPDATE_LOCK.locked()
-            and my_id in features.UPDATE_MEMO["memoization"]
-        ):
+        context = features.get_update_context()
+        if context is not None and my_id in context.memoization:
             return self
 
-        kwargs.update(features.UPDATE_MEMO["user_arguments"])
+        if context is not None:
+            kwargs.update(context.user_arguments)
 
         new_current_value = []
 
@@ -345,7 +342,8 @@ class SequentialProperty(Property):
             new_current_value.append(next_value)
 
         self.current_value = new_current_value
-        features.UPDATE_MEMO["memoization"][my_id] = new_current_value
+        if context is not None:
+            context.memoization[my_id] = new_current_value
         return self
 
 
@@ -404,13 +402,17 @@ class PropertyDict(collections.OrderedDict):
             Returns itself
 
         """
+        context = features.get_update_context()
+        user_arguments = context.user_arguments if context is not None else {}
+        memoization = context.memoization if context is not None else {}
+
         property_arguments = collections.OrderedDict(self)
         property_arguments.update(kwargs)
-        property_arguments.update(features.UPDATE_MEMO["user_arguments"])
+        property_arguments.update(user_arguments)
         for key, prop in self.items():
             if isinstance(property_arguments[key], Property):
                 prop.update(**property_arguments)
-            elif id(prop) not in features.UPDATE_MEMO["memoization"]:
+            elif id(prop) not in memoization:
                 prop.current_value = property_arguments[key]
 
         return self
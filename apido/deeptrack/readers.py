@@ -0,0 +1,287 @@
+"""Registry of image file readers
+
+Files are matched to a format by their extension, or by their first bytes if
+the extension is unknown. Each format has a list of candidate readers, in
+order of preference. Readers whose decoder is not installed are skipped for
+the rest of the process, so that files are not opened by readers that cannot
+decode them. Other errors only fall back to the next candidate for the file
+that raised them.
+
+Functions
+---------
+read_image(path, out=None, **options)
+    Reads a file using the reader chosen for its format.
+read_header(path)
+    Reads the shape and dtype of the image in a file, without decoding it.
+register_reader(name, reader, formats, options=False, out=False, header=None)
+    Adds a reader to the registry.
+register_format(name, extensions, magic=())
+    Adds a file format to the registry.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+# Maps the name of each reader to a tuple of (function, accepts_options,
+# accepts_out).
+_readers = {}
+
+# Maps the name of each reader to a function reading the shape and dtype of
+# a file.
+_headers = {}
+
+# Maps the name of each format to the names of its candidate readers.
+_candidates = {}
+
+# Maps extensions and magic bytes to formats.
+_extensions = {}
+_magic = {}
+
+# Names of the readers whose decoder is not installed.
+_missing = set()
+_lock = threading.Lock()
+
+
+def register_reader(name, reader, formats, options=False, out=False, header=None):
+    """Adds a reader to the registry.
+
+    Parameters
+    ----------
+    name : str
+        Name of the reader.
+    reader : Callable[[str, ...], ndarray]
+        Function reading a file path to an array. Should raise ImportError if
+        the decoder is not installed.
+    formats : list of str
+        Formats the reader can decode. The reader is added as the least
+        preferred candidate of each format.
+    options : bool
+        Whether the reader accepts the `load_options` of `LoadImage` as
+        keyword arguments.
+    out : bool
+        Whether the reader accepts an `out` keyword argument, an array to
+        decode the file into. The reader returns `out` if it decoded the file
+        into it, and a new array otherwise.
+    header : Callable[[str], (tuple, numpy dtype)], optional
+        Function reading the shape and dtype of the image the reader decodes
+        from a file, without decoding it.
+    """
+
+    with _lock:
+        _readers[name] = (reader, options, out)
+        if header is None:
+            _headers.pop(name, None)
+        else:
+            _headers[name] = header
+        _missing.discard(name)
+        for file_format in formats:
+            _candidates.setdefault(file_format, []).append(name)
+
+
+def register_format(name, extensions, magic=()):
+    """Adds a file format to the registry.
+
+    Parameters
+    ----------
+    name : str
+        Name of the format.
+    extensions : list of str
+        Lowercase file extensions of the format, including the dot.
+    magic : list of bytes
+        Possible first bytes of files of the format.
+    """
+
+    with _lock:
+        for extension in extensions:
+            _extensions[extension] = name
+        for signature in magic:
+            _magic[signature] = name
+        _candidates.setdefault(name, [])
+
+
+def read_image(path, out=None, **options):
+    """Reads a file using the reader chosen for its format.
+
+    Candidates are tried in order of preference, skipping those whose
+    decoder is not installed, until one of them decodes the file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    out : ndarray, optional
+        Array to store the image in. Readers that support it decode the file
+        straight into `out`, otherwise the image is copied into it.
+    **options
+        Passed to readers accepting options.
+
+    Returns
+    -------
+    ndarray
+        The decoded image, or `out` if given.
+
+    Raises
+    ------
+    IOError
+        If no reader is available for the file.
+    """
+
+    for name in _installed_candidates(path):
+        reader, accepts_options, accepts_out = _readers[name]
+        kwargs = dict(options) if accepts_options else {}
+        if accepts_out and out is not None:
+            kwargs["out"] = out
+
+        try:
+            image = reader(path, **kwargs)
+        except ImportError:
+            # Never try this reader again.
+            with _lock:
+                _missing.add(name)
+            continue
+        except FileNotFoundError:
+            raise
+        except (IOError, ValueError):
+            # Only this file is unreadable, keep the reader for other files.
+            continue
+
+        if out is not None and image is not out:
+            out[...] = image
+            return out
+        return image
+
+    raise IOError("No filereader available for file {0}".format(path))
+
+
+def read_header(path):
+    """Reads the shape and dtype of the image in a file, without decoding it.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+
+    Returns
+    -------
+    (tuple, numpy dtype) or None
+        The shape and dtype of the image `read_image` returns, or None if the
+        preferred available reader cannot read them without decoding.
+    """
+
+    for name in _installed_candidates(path):
+        if name not in _headers:
+            return None
+        try:
+            shape, dtype = _headers[name](path)
+        except ImportError:
+            with _lock:
+                _missing.add(name)
+            continue
+        except (IOError, ValueError):
+            return None
+        return tuple(shape), np.dtype(dtype)
+
+    return None
+
+
+def _installed_candidates(path):
+    # Names of the readers to try for a file, in order of preference.
+    file_format = _format_of(path)
+    if file_format is None:
+        # Unknown format, try every reader.
+        candidates = list(_readers)
+    else:
+        candidates = _candidates[file_format]
+
+    for name in candidates:
+        if name not in _missing:
+            yield name
+
+
+def _format_of(path):
+    # Identifies the format of a file by extension, or else by magic bytes.
+    extension = os.path.splitext(path)[1].lower()
+    if extension in _extensions:
+        return _extensions[extension]
+
+    with open(path, "rb") as f:
+        header = f.read(8)
+    for signature, file_format in _magic.items():
+        if header.startswith(signature):
+            return file_format
+
+    return None
+
+
+def _read_numpy(path, **options):
+    return np.load(path, **options)
+
+
+def _read_tifffile(path, out=None):
+    import tifffile
+
+    with tifffile.TiffFile(path) as tif:
+        series = tif.series[0]
+        if (
+            out is not None
+            and out.shape == series.shape
+            and out.dtype == series.dtype
+            and out.flags.c_contiguous
+        ):
+            series.asarray(out=out)
+            return out
+        return series.asarray()
+
+
+def _read_tifffile_header(path):
+    import tifffile
+
+    with tifffile.TiffFile(path) as tif:
+        return tif.series[0].shape, tif.series[0].dtype
+
+
+def _read_pil(path, **options):
+    import PIL.Image
+
+    with PIL.Image.open(path, **options) as image:
+        if getattr(image, "n_frames", 1) == 1:
+            return np.asarray(image)
+
+        # Multi-page files are stacked along the first axis.
+        frames = []
+        for index in range(image.n_frames):
+            image.seek(index)
+            frames.append(np.asarray(image))
+        return np.stack(frames)
+
+
+def _read_skimage(path):
+    from skimage import io
+
+    return io.imread(path)
+
+
+def _read_cv2(path, **options):
+    import cv2
+
+    image = cv2.imread(path, **options)
+    if image is None:
+        raise IOError("cv2 could not read {0}".format(path))
+    return image
+
+
+register_format("npy", [".npy"], [b"\x93NUMPY"])
+register_format("tiff", [".tif", ".tiff"], [b"II*\x00", b"MM\x00*"])
+register_format("png", [".png"], [b"\x89PNG"])
+register_format("jpeg", [".jpg", ".jpeg"], [b"\xff\xd8\xff"])
+register_format("bmp", [".bmp"], [b"BM"])
+
+register_reader("numpy", _read_numpy, ["npy"], options=True)
+register_reader(
+    "tifffile", _read_tifffile, ["tiff"], out=True, header=_read_tifffile_header
+)
+register_reader("pil", _read_pil, ["tiff", "png", "jpeg", "bmp"], options=True)
+register_reader("skimage", _read_skimage, ["tiff", "png", "jpeg", "bmp"])
+register_reader("cv2", _read_cv2, ["tiff", "png", "jpeg", "bmp"], options=True)
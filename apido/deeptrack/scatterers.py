@@ -22,7 +22,7 @@ import numpy as np
 
 from . import backend as D
 from .features import Feature, MERGE_STRATEGY_APPEND
-from .image import Image
+from .image import Image, pad_image_to_fft
 from . import image
 import warnings
 
@@ -67,6 +67,9 @@ class Scatterer(Feature):
 
     __list_merge_strategy__ = MERGE_STRATEGY_APPEND
     __distributed__ = False
+    # Optics read the properties of scatterers from their images, so they are
+    # stored for any property_memorability.
+    __property_memorability__ = 0
 
     def __init__(
         self,
@@ -542,7 +545,7 @@ class MieScatterer(Scatterer):
             - upscaled_output_region[1]
             + padding[1]
         )
-        arr = deeptrack.image.pad_image_to_fft(np.zeros((xSize, ySize)))
+        arr = pad_image_to_fft(np.zeros((xSize, ySize)))
 
         # Evluation grid
         x = np.arange(-padding[0], arr.shape[0] - padding[0]) - (position[1]) * upscale
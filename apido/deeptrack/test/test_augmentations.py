@@ -0,0 +1,209 @@
+import unittest
+
+import numpy as np
+from scipy import ndimage
+
+from .. import augmentations, math
+
+
+def _smooth_image(shape, seed=0):
+    # Random image that varies smoothly along the first two axes
+    rng = np.random.RandomState(seed)
+    sigma = (3, 3) + (0,) * (len(shape) - 2)
+    return ndimage.gaussian_filter(rng.rand(*shape), sigma)
+
+
+# Modes of scipy.ndimage, with and without an equivalent cv2 border type
+MODES = (
+    "constant",
+    "grid-constant",
+    "nearest",
+    "reflect",
+    "grid-mirror",
+    "mirror",
+    "grid-wrap",
+    "wrap",
+)
+
+
+class TestWarps(unittest.TestCase):
+    # The cv2 warps match scipy for all channels, for images with more than
+    # four channels, and with a nonzero cval.
+
+    def assertMatchesScipy(self, output, expected, inside, outside, order, cval):
+        # Pixels sampled within one pixel of the edge of the input are not
+        # compared, since cv2 blends them with cval in constant mode.
+        compared = inside | outside
+        self.assertEqual(output.shape, expected.shape)
+        self.assertEqual(output.dtype, expected.dtype)
+
+        difference = np.abs(output - expected)[compared]
+        if order == 0:
+            # Sampled positions halfway between pixels may round differently.
+            self.assertLess(np.mean(difference > 1e-6), 0.02)
+            self.assertLess(difference.max(), 0.15)
+        else:
+            # cv2 rounds sampled positions to 1/32 pixel.
+            self.assertLess(difference.max(), 0.01)
+
+    def _image(self, dtype):
+        image = _smooth_image((48, 56, 7))
+        return ((image - image.min()) / np.ptp(image)).astype(dtype)
+
+    def _masks(self, shape, rows, cols):
+        inside = (rows >= 0) & (rows <= shape[0] - 1) & (cols >= 0)
+        inside &= cols <= shape[1] - 1
+        outside = (rows < -1) | (rows > shape[0]) | (cols < -1) | (cols > shape[1])
+        return inside, outside
+
+    def test_affine_transform(self):
+        cval = 5.0
+        mapping, offset = augmentations._affine_mapping(
+            (48, 56), scale=(1.1, 0.9), translate=(3.3, -2.2), rotate=0.3, shear=0.1
+        )
+        rows, cols = np.indices((48, 56))
+        inside, outside = self._masks(
+            (48, 56),
+            mapping[0, 0] * rows + mapping[0, 1] * cols + offset[0],
+            mapping[1, 0] * rows + mapping[1, 1] * cols + offset[1],
+        )
+
+        for dtype in (np.float32, np.float64):
+            image = self._image(dtype)
+            for mode in MODES:
+                for order in (0, 1):
+                    with self.subTest(dtype=dtype, mode=mode, order=order):
+                        expected = np.stack(
+                            [
+                                ndimage.affine_transform(
+                                    image[..., z],
+                                    mapping,
+                                    offset,
+                                    order=order,
+                                    mode=mode,
+                                    cval=cval,
+                                )
+                                for z in range(image.shape[-1])
+                            ],
+                            axis=-1,
+                        )
+                        output = augmentations._affine_transform(
+                            image, mapping, offset, order=order, mode=mode, cval=cval
+                        )
+                        self.assertMatchesScipy(
+                            output, expected, inside, outside, order, cval
+                        )
+
+    def test_map_channels(self):
+        cval = 5.0
+        rng = np.random.RandomState(1)
+        coordinates = np.indices((48, 56), dtype=float)
+        for coordinate in coordinates:
+            coordinate += ndimage.gaussian_filter(rng.randn(48, 56), 4) * 40 - 3
+        inside, outside = self._masks((48, 56), *coordinates)
+        self.assertTrue(inside.any() and outside.any())
+
+        for dtype in (np.float32, np.float64):
+            image = self._image(dtype)
+            for mode in MODES:
+                for order in (0, 1):
+                    with self.subTest(dtype=dtype, mode=mode, order=order):
+                        expected = np.stack(
+                            [
+                                ndimage.map_coordinates(
+                                    image[..., z],
+                                    coordinates,
+                                    order=order,
+                                    mode=mode,
+                                    cval=cval,
+                                )
+                                for z in range(image.shape[-1])
+                            ],
+                            axis=-1,
+                        )
+                        output = augmentations._map_channels(
+                            image, coordinates, order=order, mode=mode, cval=cval
+                        )
+                        self.assertMatchesScipy(
+                            output, expected, inside, outside, order, cval
+                        )
+
+
+class TestGeometricChain(unittest.TestCase):
+    def _chain(self):
+        # The training chain: a crop at a random corner, then a flip, a random
+        # affine transformation, a random distortion and a central crop.
+        return (
+            math.Add(value=lambda: np.random.rand())
+            + augmentations.Crop(
+                crop=(90, 90, None),
+                corner=lambda: (*np.random.randint(0, 60, size=2), 0),
+            )
+            + augmentations.FlipLR()
+            + augmentations.Affine(
+                rotate=lambda: np.random.rand() * 2 * np.pi,
+                scale=lambda: np.random.rand() * 0.1 + 0.95,
+                shear=lambda: np.random.rand() * 0.05 - 0.025,
+            )
+            + augmentations.ElasticTransformation(
+                alpha=lambda: np.random.rand() * 20, sigma=4
+            )
+            + augmentations.Crop(crop=(64, 64, None), corner=(13, 13, 0))
+        )
+
+    def test_fused_equals_sequential(self):
+        images = [_smooth_image((160, 160, 3)), _smooth_image((160, 160, 2), 1)]
+        images = [(image - image.min()) / np.ptp(image) for image in images]
+
+        sequential = self._chain()
+        fused = augmentations.fuse_geometric(self._chain())
+        self.assertIsNot(fused, sequential)
+
+        for seed in range(4):
+            np.random.seed(seed)
+            expected = sequential.update().resolve(images)
+            np.random.seed(seed)
+            output = fused.update().resolve(images)
+
+            for expected_image, image in zip(expected, output):
+                self.assertEqual(image.shape, expected_image.shape)
+                for name in ("corner", "rotate", "scale", "shear", "alpha"):
+                    self.assertEqual(
+                        repr(image.get_property(name, get_one=False)),
+                        repr(expected_image.get_property(name, get_one=False)),
+                    )
+
+                # Only the interpolation differs, by less than 0.01. Sampling
+                # one pixel off differs by more than 0.08 on these images.
+                error = np.abs(image - expected_image)[2:-2, 2:-2]
+                self.assertLess(error.max(), 0.02)
+
+    def test_outside_image(self):
+        # Every position is outside the image with a cubic interpolation.
+        chain = (
+            augmentations.Affine(translate=(500, 500), order=3, mode="constant", cval=5)
+            + augmentations.FlipLR()
+        )
+        fused = augmentations.fuse_geometric(chain)
+
+        output = fused.update().resolve(_smooth_image((40, 30, 2)))
+
+        np.testing.assert_array_equal(output, np.full((40, 30, 2), 5.0))
+
+    def test_fused_random_state(self):
+        # Fusing does not change the values drawn by other features.
+        fused = augmentations.fuse_geometric(self._chain())
+        sequential = self._chain()
+
+        np.random.seed(1)
+        fused.update()
+        fused_value = np.random.rand()
+        np.random.seed(1)
+        sequential.update()
+        sequential_value = np.random.rand()
+
+        self.assertEqual(fused_value, sequential_value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from ..cache import StackCache
+
+
+class TestStackCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.stack = np.arange(24, dtype=np.float32).reshape(2, 3, 4)
+
+    def _files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_put_and_get(self):
+        cache = StackCache(self.directory)
+        cache.put("a", self.stack, metadata={"name": "a"})
+
+        stack = StackCache(self.directory).get("a")
+        np.testing.assert_array_equal(stack, self.stack)
+        self.assertIsInstance(stack, np.memmap)
+        self.assertEqual(StackCache(self.directory).get_metadata("a"), {"name": "a"})
+        self.assertIsNone(cache.get("b"))
+
+    def test_key(self):
+        path = os.path.join(self.directory, "source.npy")
+        np.save(path, self.stack)
+        cache = StackCache()
+        key = cache.key([path], dtype="float32")
+
+        self.assertEqual(cache.key([path], dtype="float32"), key)
+        self.assertNotEqual(cache.key([path], dtype="uint8"), key)
+
+        status = os.stat(path)
+        os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(cache.key([path], dtype="float32"), key)
+
+    def test_read_only(self):
+        StackCache(self.directory).put("a", self.stack)
+
+        with mock.patch("os.utime", side_effect=PermissionError):
+            stack = StackCache(self.directory).get("a")
+
+        np.testing.assert_array_equal(stack, self.stack)
+
+    def test_eviction_counts_metadata(self):
+        metadata = list(range(1000))
+        cache = StackCache(self.directory)
+        cache.put("a", self.stack, metadata=metadata)
+        entry_bytes = sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in self._files()
+        )
+
+        # Two stacks fit, but not with their metadata.
+        cache = StackCache(self.directory, max_disk_bytes=2 * entry_bytes - 1)
+        cache.put("b", self.stack, metadata=metadata)
+
+        self.assertEqual(self._files(), ["b.npy", "b.pkl"])
+
+    def test_memory(self):
+        cache = StackCache(max_memory_bytes=self.stack.nbytes)
+        cache.put("a", self.stack)
+        self.assertIs(cache.get("a"), self.stack)
+
+        cache.put("b", self.stack + 1)
+        self.assertIsNone(cache.get("a"))
+        np.testing.assert_array_equal(cache.get("b"), self.stack + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .. import features, readers
+from ..cache import StackCache
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+class TestReadFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.planes = [
+            np.random.RandomState(seed).randint(0, 2 ** 16, (30, 20), np.uint16)
+            for seed in range(5)
+        ]
+
+        # Records the arrays tifffile is asked to decode into.
+        self.outs = []
+        reader, options, out = readers._readers["tifffile"]
+
+        def read_tifffile(path, **kwargs):
+            image = reader(path, **kwargs)
+            self.outs.append(image is kwargs.get("out"))
+            return image
+
+        readers._readers["tifffile"] = (read_tifffile, options, out)
+        self.addCleanup(
+            readers._readers.__setitem__, "tifffile", (reader, options, out)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _save(self, extension, save):
+        paths = []
+        for index, plane in enumerate(self.planes):
+            path = os.path.join(self.directory, "{0}{1}".format(index, extension))
+            save(path, plane)
+            paths.append(path)
+        return paths
+
+    def _tiffs(self):
+        return self._save(".tif", tifffile.imwrite)
+
+    @unittest.skipUnless(tifffile, "tifffile is not installed")
+    def test_tiff(self):
+        for num_workers in (None, 1, 3):
+            self.outs = []
+            image = features._read_files(self._tiffs(), {}, num_workers=num_workers)
+
+            np.testing.assert_array_equal(image, np.stack(self.planes, axis=-1))
+            self.assertEqual(image.dtype, np.uint16)
+            # Each file is decoded straight into the output.
+            self.assertEqual(self.outs, [True] * len(self.planes))
+
+    @unittest.skipUnless(tifffile, "tifffile is not installed")
+    def test_tiff_cast(self):
+        image = features._read_files(self._tiffs(), {}, dtype=np.float32)
+
+        np.testing.assert_array_equal(image, np.stack(self.planes, axis=-1))
+        self.assertEqual(image.dtype, np.float32)
+        self.assertEqual(self.outs, [False] * len(self.planes))
+
+    def test_npy(self):
+        image = features._read_files(self._save(".npy", np.save), {}, num_workers=2)
+
+        np.testing.assert_array_equal(image, np.stack(self.planes, axis=-1))
+
+
+class _Load(features.Feature):
+    # Loads a .npy file, counting the loads.
+
+    __distributed__ = False
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path=path, **kwargs)
+        self.loads = 0
+
+    def get(self, image, path, **kwargs):
+        self.loads += 1
+        return np.load(path)
+
+
+class TestCached(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = StackCache(os.path.join(self.directory, "cache"))
+
+        self.paths = []
+        for index in range(2):
+            path = os.path.join(self.directory, "{0}.npy".format(index))
+            np.save(path, np.full((4, 4), index))
+            self.paths.append(path)
+
+        self.loader = _Load(lambda: self.path)
+        self.cached = features.Cached(self.loader, store=self.store)
+
+    def _resolve(self, path):
+        self.path = path
+        return np.asarray(self.cached.update().resolve())
+
+    def test_hit(self):
+        first = self._resolve(self.paths[1])
+        second = self._resolve(self.paths[1])
+
+        np.testing.assert_array_equal(first, np.full((4, 4), 1))
+        np.testing.assert_array_equal(second, first)
+        self.assertEqual(self.loader.loads, 1)
+
+    def test_miss(self):
+        self._resolve(self.paths[0])
+        output = self._resolve(self.paths[1])
+
+        np.testing.assert_array_equal(output, np.full((4, 4), 1))
+        self.assertEqual(self.loader.loads, 2)
+
+    def test_edited_file(self):
+        self._resolve(self.paths[0])
+
+        np.save(self.paths[0], np.full((4, 4), 2))
+        status = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+        output = self._resolve(self.paths[0])
+
+        np.testing.assert_array_equal(output, np.full((4, 4), 2))
+        self.assertEqual(self.loader.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
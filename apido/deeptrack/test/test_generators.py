@@ -0,0 +1,91 @@
+import time
+import unittest
+
+import numpy as np
+
+from .. import generators
+from ..features import Feature
+
+
+class _Noise(Feature):
+    # Resolves to a new random image each time it is updated, slowly enough
+    # that the generator waits for the buffer to be allocated and filled.
+
+    __distributed__ = False
+
+    def get(self, image, **kwargs):
+        time.sleep(0.2)
+        return np.random.rand(8, 8, 1)
+
+
+class _Failing(Feature):
+    __distributed__ = False
+
+    def get(self, image, **kwargs):
+        raise ValueError("Cannot resolve")
+
+
+class TestContinuousGenerator(unittest.TestCase):
+    # Samples of 8 * 8 float64 pixels and a float64 label.
+    sample_bytes = 8 * 8 * 8 + 8
+
+    def _generator(self, num_samples, min_data_size):
+        return generators.ContinuousGenerator(
+            _Noise(),
+            label_function=lambda image: np.zeros(1),
+            min_data_size=min_data_size,
+            max_data_size=100,
+            batch_size=2,
+            verbose=0,
+            max_data_bytes=num_samples * self.sample_bytes,
+        )
+
+    def test_buffer_fits_min_data_size(self):
+        with self._generator(4, 4) as generator:
+            self.assertEqual(generator.data.capacity, 4)
+            self.assertEqual(len(generator.current_data), 4)
+
+            images, labels = generator[0]
+            self.assertEqual(images.shape, (2, 8, 8, 1))
+            self.assertEqual(labels.shape, (2, 1))
+
+    def test_buffer_smaller_than_min_data_size(self):
+        with self.assertRaises(AssertionError):
+            with self._generator(3, 4):
+                pass
+
+    def test_error_in_thread(self):
+        generator = generators.ContinuousGenerator(
+            _Failing(), label_function=lambda image: image, verbose=0
+        )
+        with self.assertRaisesRegex(ValueError, "Cannot resolve"):
+            with generator:
+                pass
+
+    def test_workers_exited(self):
+        generator = generators.ContinuousGenerator(
+            _Failing(), label_function=lambda image: image, verbose=0, workers=2
+        )
+        with self.assertRaisesRegex(RuntimeError, "worker processes have exited"):
+            with generator:
+                pass
+
+
+class TestAsDataset(unittest.TestCase):
+    def _elements(self, **kwargs):
+        dataset = generators.as_dataset(
+            _Noise, size=4, seed=1, num_parallel_calls=4, **kwargs
+        )
+        return np.stack([element.numpy() for element in dataset])
+
+    def test_deterministic(self):
+        np.testing.assert_array_equal(
+            self._elements(deterministic=True), self._elements(deterministic=True)
+        )
+
+    def test_not_deterministic(self):
+        self.assertEqual(self._elements().shape, (4, 8, 8, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
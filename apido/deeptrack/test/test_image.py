@@ -0,0 +1,108 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from ..image import Image, pad_image_to_fft
+
+
+def _props(*hash_keys):
+    return [{"hash_key": [hash_key], "value": hash_key} for hash_key in hash_keys]
+
+
+class TestMergeProperties(unittest.TestCase):
+    # Each test indexes the properties by merging, changes the list, and
+    # merges again.
+
+    def _image(self, *hash_keys):
+        image = Image(np.zeros(2), properties=_props(*hash_keys))
+        image.merge_properties_from(Image(np.zeros(2), properties=_props(*hash_keys)))
+        return image
+
+    def assertMerged(self, image, other_keys, expected_keys):
+        image.merge_properties_from(Image(np.zeros(2), properties=_props(*other_keys)))
+        self.assertEqual(
+            [prop["value"] for prop in image.properties], list(expected_keys)
+        )
+
+    def test_append(self):
+        image = self._image(1, 2)
+        image.append(_props(3)[0])
+        self.assertMerged(image, (3, 4), (1, 2, 3, 4))
+
+    def test_pop_and_append(self):
+        image = self._image(1, 2)
+        image.properties.pop()
+        image.append(_props(3)[0])
+        self.assertMerged(image, (2,), (1, 3, 2))
+
+    def test_setitem(self):
+        image = self._image(1, 2)
+        image.properties[1] = _props(3)[0]
+        self.assertMerged(image, (2, 3), (1, 3, 2))
+
+    def test_slice(self):
+        image = self._image(1, 2, 3)
+        image.properties[1:] = _props(4, 5)
+        self.assertMerged(image, (2, 3, 4), (1, 4, 5, 2, 3))
+
+    def test_delitem(self):
+        image = self._image(1, 2)
+        del image.properties[0]
+        image.append(_props(3)[0])
+        self.assertMerged(image, (1,), (2, 3, 1))
+
+    def test_remove_and_insert(self):
+        image = self._image(1, 2)
+        image.properties.remove(image.properties[1])
+        image.properties.insert(0, _props(3)[0])
+        self.assertMerged(image, (2, 3), (3, 1, 2))
+
+    def test_clear(self):
+        image = self._image(1, 2)
+        properties = image.properties
+        properties.clear()
+        properties.extend(_props(3, 4))
+        self.assertMerged(image, (1, 3), (3, 4, 1))
+
+    def test_setter(self):
+        image = self._image(1, 2)
+        image.properties = _props(3, 4)
+        self.assertMerged(image, (1, 4), (3, 4, 1))
+
+    def test_shared_list(self):
+        image = self._image(1, 2)
+        other = Image(np.zeros(2))
+        other.properties = image.properties
+        other.properties.pop()
+        other.append(_props(3)[0])
+        self.assertMerged(image, (2,), (1, 3, 2))
+
+    def test_pickle(self):
+        image = self._image(1, 2)
+        properties = pickle.loads(pickle.dumps(image.properties))
+        self.assertEqual(properties, _props(1, 2))
+
+
+class TestPadImageToFFT(unittest.TestCase):
+    # The simulated optical fields depend on the padded shape.
+
+    def test_padded_shape(self):
+        for length, padded in [
+            (0, 0),
+            (64, 64),
+            (65, 72),
+            (84, 96),
+            (97, 108),
+            (500, 576),
+            (6561, 6561),
+            (6562, 6600),
+        ]:
+            image = pad_image_to_fft(np.ones((length, 3, 2)), axes=(0,))
+            self.assertEqual(image.shape, (padded, 3, 2))
+            self.assertEqual(image[:length].sum(), length * 6)
+            self.assertEqual(image[length:].sum(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from .. import aberrations, optics, scatterers
+
+
+class TestPupilCache(unittest.TestCase):
+    # Fluorescence images of a sphere, through a random defocus aberration.
+
+    def setUp(self):
+        microscope = optics.Fluorescence(
+            NA=0.7,
+            wavelength=680e-9,
+            resolution=1e-6,
+            magnification=10,
+            output_region=(0, 0, 32, 32),
+            pupil=aberrations.Defocus(coefficient=lambda: np.random.uniform(-1, 1)),
+        )
+        sphere = scatterers.Sphere(
+            position=lambda: np.random.uniform(8, 24, 2), radius=2e-6, intensity=100
+        )
+        self.pipeline = microscope(sphere)
+
+    def _samples(self, seed=0):
+        np.random.seed(seed)
+        return [np.asarray(self.pipeline.update().resolve()) for _ in range(3)]
+
+    def test_cached_equals_uncached(self):
+        optics.Optics.pupil_cache.clear()
+        uncached = self._samples()
+        cached = self._samples()
+
+        for image, expected in zip(cached, uncached):
+            np.testing.assert_array_equal(image, expected)
+
+    def test_random_stream(self):
+        # Resolving the pupil leaves the global random state unchanged, which
+        # changes the samples that follow the first one compared with pupils
+        # that reseeded it.
+        sums = [image.sum() for image in self._samples()]
+
+        np.testing.assert_allclose(
+            sums, [85164.48794029788, 73578.5500227765, 64553.01267190662], rtol=1e-6
+        )
+        self.assertAlmostEqual(np.random.rand(), 0.4248718176157761)
+
+
+if __name__ == "__main__":
+    unittest.main()
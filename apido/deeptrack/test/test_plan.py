@@ -0,0 +1,101 @@
+import gc
+import unittest
+import weakref
+
+import numpy as np
+
+from .. import math, noises, optics, scatterers, sequences, utils
+from ..augmentations import Affine, FlipLR
+
+
+def _pipeline():
+    # Properties depending on other properties, on arguments of the update,
+    # and drawn by nested features.
+    sphere = scatterers.Sphere(
+        position=lambda: np.random.uniform(8, 24, 2),
+        radius=lambda: np.random.uniform(1e-6, 2e-6),
+        intensity=lambda radius, brightness=1: brightness * radius * 5e7,
+        z=lambda: np.random.randn(),
+    )
+    microscope = optics.Fluorescence(
+        NA=lambda: np.random.uniform(0.6, 0.8),
+        wavelength=680e-9,
+        resolution=1e-6,
+        magnification=10,
+        output_region=(0, 0, 32, 32),
+    )
+    return (
+        microscope(sphere + sphere)
+        + math.Add(value=lambda: np.random.rand())
+        + noises.Gaussian(sigma=lambda: np.random.rand())
+        + Affine(rotate=lambda: np.random.rand() * 6.28, order=1)
+        + FlipLR()
+    )
+
+
+class TestPlan(unittest.TestCase):
+    def _assertMatches(self, create_feature, kwargs={}):
+        # Stateful features, such as FlipLR, count their updates, so the
+        # dynamic and compiled updates run on separate copies.
+        feature = create_feature()
+        plan = create_feature().compile()
+        for seed in range(3):
+            np.random.seed(seed)
+            expected = np.asarray(feature.update(**kwargs).resolve())
+            expected_state = np.random.rand()
+
+            np.random.seed(seed)
+            output = np.asarray(plan.update(**kwargs).resolve())
+
+            np.testing.assert_array_equal(output, expected)
+            self.assertEqual(np.random.rand(), expected_state)
+
+    def test_compiled_equals_dynamic(self):
+        self._assertMatches(_pipeline)
+
+    def test_update_arguments(self):
+        self._assertMatches(_pipeline, {"brightness": 2})
+
+    def test_sequence(self):
+        def sequence():
+            particle = scatterers.Sphere(
+                position=lambda: np.random.uniform(8, 24, 2),
+                radius=1e-6,
+                intensity=100,
+            )
+            return sequences.Sequence(
+                optics.Fluorescence(output_region=(0, 0, 32, 32))(particle),
+                sequence_length=3,
+            )
+
+        self._assertMatches(sequence)
+
+
+class TestArgspec(unittest.TestCase):
+    def test_functions_are_freed(self):
+        function = lambda radius, brightness=1: radius
+        self.assertEqual(utils.get_kwarg_names(function), ["radius", "brightness"])
+        self.assertTrue(utils.kwarg_has_default(function, "brightness"))
+
+        reference = weakref.ref(function)
+        del function
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_bound_method(self):
+        feature = math.Add(value=1)
+        self.assertIn("value", utils.get_kwarg_names(feature.get))
+        self.assertIn(type(feature).get, utils._argspecs)
+
+    def test_unhashable(self):
+        class Callable:
+            __hash__ = None
+
+            def __call__(self, value):
+                return value
+
+        self.assertEqual(utils.get_kwarg_names(Callable()), ["self", "value"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from .. import readers
+
+
+class TestReadImage(unittest.TestCase):
+    # Formats read by fake readers, which record the files they are asked to
+    # read.
+
+    def setUp(self):
+        self.calls = []
+        self.formats = []
+        self.readers = []
+
+    def tearDown(self):
+        for name in self.readers:
+            readers._readers.pop(name)
+            readers._missing.discard(name)
+        for name in self.formats:
+            readers._candidates.pop(name)
+            readers._extensions.pop("." + name)
+
+    def _register(self, file_format, names):
+        readers.register_format(file_format, ["." + file_format])
+        self.formats.append(file_format)
+        for name in names:
+            key = file_format + "-" + name
+            readers.register_reader(key, self._reader(name), [file_format])
+            self.readers.append(key)
+
+    def _reader(self, name):
+        def reader(path):
+            self.calls.append((name, path))
+            if name == "missing":
+                raise ImportError(name)
+            if name == "picky" and path.startswith("bad"):
+                raise ValueError(path)
+            return np.full((2, 2), len(self.calls))
+
+        return reader
+
+    def test_missing_reader_is_skipped(self):
+        self._register("test", ["missing", "picky", "fallback"])
+        readers.read_image("a.test")
+        readers.read_image("b.test")
+
+        self.assertEqual(
+            self.calls,
+            [("missing", "a.test"), ("picky", "a.test"), ("picky", "b.test")],
+        )
+
+    def test_failure_falls_back_for_one_file(self):
+        self._register("test", ["picky", "fallback"])
+        readers.read_image("bad.test")
+        readers.read_image("good.test")
+
+        self.assertEqual(
+            self.calls,
+            [("picky", "bad.test"), ("fallback", "bad.test"), ("picky", "good.test")],
+        )
+
+    def test_missing_reader_after_failure(self):
+        self._register("test", ["picky", "missing"])
+        with self.assertRaises(IOError):
+            readers.read_image("bad.test")
+        readers.read_image("good.test")
+
+        self.assertEqual(
+            self.calls,
+            [("picky", "bad.test"), ("missing", "bad.test"), ("picky", "good.test")],
+        )
+
+    def test_no_reader(self):
+        self._register("test", ["missing", "picky"])
+
+        with self.assertRaises(IOError):
+            readers.read_image("bad.test")
+
+
+if __name__ == "__main__":
+    unittest.main()
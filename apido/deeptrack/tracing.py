@@ -0,0 +1,336 @@
+"""Tracing of resolved features
+
+Records the wall time, the number of calls, and the shapes and bytes of the
+inputs and outputs of each feature resolved while a `Trace` is active. Nested
+features, such as the features joined by `Branch` or `Combine`, are recorded
+as nested spans, so the time of each feature is reported both in total and
+excluding the features it resolves.
+
+Tracing is opt-in and only costs a lookup of the active trace per resolve
+when no trace is active.
+
+Examples
+--------
+>>> with Trace() as trace:
+...     for _ in range(100):
+...         pipeline.update().resolve()
+>>> print(trace.table())
+>>> trace.save_chrome_trace("trace.json")
+
+The saved file can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Classes
+-------
+Trace
+    Records the resolves of features.
+Span
+    One recorded call.
+
+Functions
+---------
+get_trace()
+    Returns the active trace, or None.
+span(feature, inputs, kind)
+    Records a call to the active trace, if any.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class Trace:
+    """Records the resolves of features.
+
+    Active within a `with` block, in the thread or task that entered it.
+
+    Attributes
+    ----------
+    spans : list of Span
+        The recorded calls, in the order they ended.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._origin = time.perf_counter_ns()
+        self._labels = {}
+        self._counts = {}
+        self._stacks = threading.local()
+        self._lock = threading.Lock()
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_trace.set(self))
+        return self
+
+    def __exit__(self, *args):
+        _trace.reset(self._tokens.pop())
+        return False
+
+    def span(self, feature, inputs=None, kind="resolve") -> "Span":
+        """Records a call to `feature` with `inputs`.
+
+        Used as a context manager around the call. The outputs are recorded
+        by setting `outputs` on the span.
+        """
+
+        return Span(self, self._label(feature, kind), kind, inputs)
+
+    def summary(self) -> list:
+        """Totals of each traced feature.
+
+        Returns
+        -------
+        list of dict
+            One row per feature instance and kind of call, sorted by time
+            excluding nested features. Times are in seconds.
+        """
+
+        rows = {}
+        for recorded in self.spans:
+            row = rows.get(recorded.label)
+            if row is None:
+                row = rows[recorded.label] = {
+                    "feature": recorded.label,
+                    "calls": 0,
+                    "total_time": 0.0,
+                    "self_time": 0.0,
+                    "input_bytes": 0,
+                    "output_bytes": 0,
+                }
+            row["calls"] += 1
+            row["total_time"] += recorded.duration * 1e-9
+            row["self_time"] += (recorded.duration - recorded.nested) * 1e-9
+            row["input_bytes"] += recorded.input_bytes
+            row["output_bytes"] += recorded.output_bytes
+            row["input_shapes"] = recorded.input_shapes
+            row["output_shapes"] = recorded.output_shapes
+
+        return sorted(rows.values(), key=lambda row: -row["self_time"])
+
+    def table(self) -> str:
+        """The summary as a text table.
+
+        Shapes are those of the last call. Bytes are per call.
+        """
+
+        lines = [
+            "{0:<32} {1:>7} {2:>10} {3:>10} {4:>10} {5:>10} {6:>10}  {7}".format(
+                "feature",
+                "calls",
+                "total ms",
+                "self ms",
+                "ms/call",
+                "in MB",
+                "out MB",
+                "input -> output shapes",
+            )
+        ]
+        for row in self.summary():
+            calls = row["calls"]
+            lines.append(
+                "{0:<32} {1:>7} {2:>10.2f} {3:>10.2f} {4:>10.3f} {5:>10.2f} "
+                "{6:>10.2f}  {7} -> {8}".format(
+                    row["feature"],
+                    calls,
+                    row["total_time"] * 1e3,
+                    row["self_time"] * 1e3,
+                    row["total_time"] * 1e3 / calls,
+                    row["input_bytes"] / calls / 2 ** 20,
+                    row["output_bytes"] / calls / 2 ** 20,
+                    _format_shapes(row["input_shapes"]),
+                    _format_shapes(row["output_shapes"]),
+                )
+            )
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """The recorded calls in the Chrome trace event format."""
+
+        process_id = os.getpid()
+        events = []
+        for recorded in self.spans:
+            events.append(
+                {
+                    "name": recorded.label,
+                    "cat": recorded.kind,
+                    "ph": "X",
+                    "ts": (recorded.start - self._origin) / 1e3,
+                    "dur": recorded.duration / 1e3,
+                    "pid": process_id,
+                    "tid": recorded.thread,
+                    "args": {
+                        "input_shapes": recorded.input_shapes,
+                        "output_shapes": recorded.output_shapes,
+                        "input_bytes": recorded.input_bytes,
+                        "output_bytes": recorded.output_bytes,
+                    },
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path):
+        """Saves the recorded calls as a Chrome trace JSON file."""
+
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def _label(self, feature, kind):
+        # Names each feature instance by its class and order of appearance.
+        key = id(feature)
+        with self._lock:
+            label = self._labels.get(key)
+            if label is None:
+                name = type(feature).__name__
+                index = self._counts.get(name, 0)
+                self._counts[name] = index + 1
+                label = "{0}#{1}".format(name, index)
+                # The feature is kept so that its id is not reused.
+                self._labels[key] = label, feature
+            else:
+                label = label[0]
+        if kind != "resolve":
+            label = label + "." + kind
+        return label
+
+    def _stack(self):
+        # The spans currently open in this thread.
+        stack = getattr(self._stacks, "stack", None)
+        if stack is None:
+            stack = self._stacks.stack = []
+        return stack
+
+    def _record(self, recorded):
+        with self._lock:
+            self.spans.append(recorded)
+
+
+class Span:
+    """One recorded call.
+
+    Attributes
+    ----------
+    label : str
+        The feature instance, and the kind of call if not a resolve.
+    kind : str
+        The kind of call, such as "resolve" or "get".
+    outputs : any
+        The outputs of the call, set by the caller.
+    start, duration : int
+        Start and duration in nanoseconds.
+    nested : int
+        Time spent in spans nested within this one, in nanoseconds.
+    input_shapes, output_shapes : list of tuple
+        Shapes of the input and output arrays.
+    input_bytes, output_bytes : int
+        Total size of the input and output arrays.
+    thread : int
+        The thread of the call.
+    """
+
+    __slots__ = (
+        "trace",
+        "label",
+        "kind",
+        "outputs",
+        "start",
+        "duration",
+        "nested",
+        "input_shapes",
+        "input_bytes",
+        "output_shapes",
+        "output_bytes",
+        "thread",
+    )
+
+    def __init__(self, trace, label, kind, inputs):
+        self.trace = trace
+        self.label = label
+        self.kind = kind
+        self.outputs = None
+        self.nested = 0
+        self.input_shapes, self.input_bytes = _describe(inputs)
+
+    def __enter__(self):
+        if self.trace is not None:
+            self.trace._stack().append(self)
+            self.thread = threading.get_ident()
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        if self.trace is None:
+            return False
+
+        self.duration = time.perf_counter_ns() - self.start
+        stack = self.trace._stack()
+        stack.pop()
+        if stack:
+            stack[-1].nested += self.duration
+
+        self.output_shapes, self.output_bytes = _describe(self.outputs)
+        self.outputs = None
+        self.trace._record(self)
+        return False
+
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def get_trace() -> Trace:
+    """Returns the active trace, or None."""
+    return _trace.get()
+
+
+def span(feature, inputs=None, kind="resolve") -> Span:
+    """Records a call to the active trace, if any.
+
+    Returns a span that records nothing if no trace is active.
+    """
+
+    trace = _trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return trace.span(feature, inputs, kind)
+
+
+class _NoSpan(Span):
+    # Span of calls made while no trace is active.
+    __slots__ = ()
+
+    def __init__(self):
+        self.trace = None
+
+    def __setattr__(self, name, value):
+        if name != "outputs":
+            super().__setattr__(name, value)
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _describe(images):
+    # Shapes and total size of the arrays in nested lists of images.
+    shapes = []
+    nbytes = 0
+    stack = [images]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(reversed(item))
+        elif isinstance(item, np.ndarray):
+            shapes.append(item.shape)
+            nbytes += item.nbytes
+    return shapes, nbytes
+
+
+def _format_shapes(shapes):
+    if len(shapes) == 1:
+        return str(shapes[0])
+    if len(set(shapes)) == 1:
+        return "{0} x {1}".format(len(shapes), shapes[0])
+    return ", ".join(map(str, shapes))
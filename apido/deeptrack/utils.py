@@ -18,6 +18,7 @@ get_kwarg_names(function: Callable)
 """
 
 import inspect
+import weakref
 
 from typing import Callable, List
 
@@ -103,15 +104,14 @@ def get_kwarg_names(function: Callable) -> List[str]:
 
     """
 
-    try:
-        argspec = inspect.getfullargspec(function)
-    except TypeError:
+    argspec = _argspec(function)
+    if argspec is None:
         return []
 
     if argspec.varargs:
-        return argspec.kwonlyargs or []
+        return list(argspec.kwonlyargs or [])
     else:
-        return argspec.args or []
+        return list(argspec.args or [])
 
 
 def kwarg_has_default(function: Callable, argument: str) -> bool:
@@ -134,7 +134,7 @@ def kwarg_has_default(function: Callable, argument: str) -> bool:
     if argument not in args:
         return False
 
-    defaults = inspect.getfullargspec(function).defaults or ()
+    defaults = _argspec(function).defaults or ()
 
     return len(args) - args.index(argument) <= len(defaults)
 
@@ -161,3 +161,31 @@ def safe_call(function, positional_args=[], **kwargs):
             input_arguments[key] = kwargs[key]
 
     return function(*positional_args, **input_arguments)
+
+
+def _argspec(function):
+    # Inspecting a signature is slow compared to calling most property
+    # functions, so the result is remembered for each function, for as long
+    # as the function exists. Bound methods are remembered by their function,
+    # which has the same argspec.
+    function = getattr(function, "__func__", function)
+    try:
+        return _argspecs[function]
+    except KeyError:
+        argspec = _inspect_argspec(function)
+        _argspecs[function] = argspec
+        return argspec
+    except TypeError:
+        # Callables that cannot be weakly referenced are inspected each time.
+        return _inspect_argspec(function)
+
+
+def _inspect_argspec(function):
+    try:
+        return inspect.getfullargspec(function)
+    except TypeError:
+        return None
+
+
+# Weakly keyed, so that discarded pipelines and their functions are freed.
+_argspecs = weakref.WeakKeyDictionary()
@@ -0,0 +1,306 @@
+"""Tiled whole-field inference for virtual stainers.
+
+Whole fields are cut into overlapping tiles, which are batched and passed
+through the stainer. The input normalization of the stainer is applied to each
+whole field before tiling, so that tiles of several sites can share a batch.
+The overlapping predictions are blended with a smooth window and written into
+a preallocated output, so that memory is bounded by the tile and batch size
+rather than by the size of the field.
+
+Functions
+---------
+blending_window(tile_shape, halo)
+    Smooth separable window used to blend overlapping tiles.
+iter_predict_tiled(model, images, ...)
+    Lazily stains a stream of fields, yielding one output per field.
+predict_tiled(model, images, ...)
+    Stains a field or a list of fields.
+"""
+
+import collections
+
+import numpy as np
+
+_DEFAULT_TILE_SIZE = (512, 512)
+_DEFAULT_HALO = 32
+
+
+def blending_window(tile_shape, halo):
+    """Smooth separable window used to blend overlapping tiles.
+
+    Two neighbouring tiles overlap by `2 * halo` pixels, where their windows
+    sum to one. The window is zero over the `halo // 2` pixels closest to each
+    edge, which are the least accurate predictions of a tile, rises as a
+    squared sine over the rest of the overlap, and is one in the center of the
+    tile. Every pixel of the field is at least `halo` pixels from the edge of
+    some tile, where the window is positive.
+
+    Parameters
+    ----------
+    tile_shape : tuple of ints
+        The (height, width) of a tile, including the halo.
+    halo : int
+        Number of context pixels on each side of the tile.
+
+    Returns
+    -------
+    ndarray
+        A float32 array of shape `tile_shape`.
+    """
+
+    margin = halo // 2
+    ramp_length = 2 * (halo - margin)
+    ramp = np.sin(np.pi / 2 * (np.arange(ramp_length) + 0.5) / ramp_length) ** 2
+    edge = np.concatenate([np.zeros(margin), ramp])
+
+    axes = []
+    for size in tile_shape:
+        weights = np.ones(size, dtype=np.float32)
+        length = min(len(edge), size)
+        weights[:length] = np.minimum(weights[:length], edge[:length])
+        weights[size - length :] = np.minimum(
+            weights[size - length :], edge[:length][::-1]
+        )
+        axes.append(weights)
+
+    return np.outer(axes[0], axes[1]).astype(np.float32)
+
+
+def iter_predict_tiled(
+    model,
+    images,
+    tile_size=_DEFAULT_TILE_SIZE,
+    halo=_DEFAULT_HALO,
+    batch_size=8,
+    multiple=32,
+    out=None,
+    dtype=np.float32,
+):
+    """Lazily stains a stream of fields, yielding one output per field.
+
+    Each field is cut into tiles of `tile_size` pixels, extended by `halo`
+    pixels of context on every side. Context outside the field is mirrored.
+    Each field is yielded as soon as its last tile has been predicted. At most
+    the fields that have tiles in the current batch are held in memory at the
+    same time.
+
+    The stainers standardize their input with the mean and standard deviation
+    of the whole batch, in a `Lambda` layer applied to the input. Predicting a
+    field on its own, this gives the statistics of the field. If the model
+    starts with such a layer, it is applied to each whole field before the
+    field is tiled, and the tiles are passed through the rest of the model.
+    The normalization then does not depend on the tiling or on the other
+    fields, and tiles of consecutive fields share batches. Otherwise, for
+    example for the two-stage stainers, tiles of different fields are never
+    batched together. Each field is then predicted independently of the
+    others, but its tiles are normalized by the statistics of their batch.
+
+    The output still differs from predicting the whole field near the edges of
+    the tiles, by the effect of the tiling on layers with a receptive field
+    larger than the halo and on the instance normalization of the U-Net, which
+    uses the statistics of each tile.
+
+    Parameters
+    ----------
+    model : keras.Model
+        The stainer, typically returned by `apido.load_model`.
+    images : iterable of array_like
+        Fields of shape (height, width, channels). Can be a generator.
+    tile_size : int or tuple of ints
+        Size of the central region of each tile.
+    halo : int
+        Number of context pixels on each side of the tile. Neighbouring tiles
+        overlap by `2 * halo` pixels.
+    batch_size : int
+        Number of tiles passed to the model at once.
+    multiple : int
+        The size of each tile including the halo needs to be a multiple of
+        this value. For the U-Net stainers, this is 2 ** (depth).
+    out : sequence of ndarray, optional
+        Preallocated outputs, one per field. If not given, outputs are
+        allocated as needed.
+    dtype : numpy dtype
+        The dtype of the allocated outputs.
+
+    Yields
+    ------
+    ndarray
+        The stained field of shape (height, width, output_channels).
+    """
+
+    if isinstance(tile_size, int):
+        tile_size = (tile_size, tile_size)
+
+    tile_shape = tuple(size + 2 * halo for size in tile_size)
+
+    assert all(
+        size % multiple == 0 for size in tile_shape
+    ), "tile_size + 2 * halo needs to be a multiple of {0}, got {1}".format(
+        multiple, tile_shape
+    )
+
+    window = blending_window(tile_shape, halo)
+
+    normalization, model = _split_input_normalization(model)
+
+    # Fields with tiles in flight. Maps the index of the field to a dict
+    # containing the output and the number of tiles left to predict.
+    pending = collections.OrderedDict()
+
+    batch = None
+    batch_tiles = []
+
+    def predict_batch():
+        predictions = np.asarray(
+            model.predict_on_batch(batch[: len(batch_tiles)]), dtype=np.float32
+        )
+
+        for prediction, (index, x, y) in zip(predictions, batch_tiles):
+            field = pending[index]
+            output = field["output"]
+
+            if output is None:
+                output_shape = (*field["shape"], prediction.shape[-1])
+                if out is not None:
+                    output = out[index]
+                    assert (
+                        output.shape == output_shape
+                    ), "Expected output of shape {0}, got {1}".format(
+                        output_shape, output.shape
+                    )
+                    output[...] = 0
+                else:
+                    output = np.zeros(output_shape, dtype=dtype)
+                field["output"] = output
+                field["weights"] = np.zeros(field["shape"], dtype=np.float32)
+
+            # Region of the tile within the field
+            x0, y0 = max(x, 0), max(y, 0)
+            x1 = min(x + tile_shape[0], field["shape"][0])
+            y1 = min(y + tile_shape[1], field["shape"][1])
+            tile_region = (slice(x0 - x, x1 - x), slice(y0 - y, y1 - y))
+
+            tile_window = window[tile_region]
+            output[x0:x1, y0:y1] += prediction[tile_region] * tile_window[..., None]
+            field["weights"][x0:x1, y0:y1] += tile_window
+
+            field["tiles_left"] -= 1
+
+        batch_tiles.clear()
+
+    def pop_finished():
+        while pending:
+            index, field = next(iter(pending.items()))
+            if field["tiles_left"] > 0:
+                return
+
+            del pending[index]
+            output = field["output"]
+            output /= field["weights"][..., None]
+            yield output
+
+    for index, image in enumerate(images):
+        image = np.asarray(image)
+        if image.ndim == 2:
+            image = np.expand_dims(image, axis=-1)
+
+        if normalization is not None:
+            image = np.asarray(normalization(image[np.newaxis].astype(np.float32)))[0]
+        elif batch_tiles:
+            # The model normalizes its input by the statistics of the batch.
+            predict_batch()
+            yield from pop_finished()
+
+        if batch is None:
+            batch = np.zeros((batch_size, *tile_shape, image.shape[-1]), np.float32)
+
+        assert (
+            image.shape[-1] == batch.shape[-1]
+        ), "All fields need to have the same number of channels"
+
+        field_shape = image.shape[:2]
+        corners = [
+            (x - halo, y - halo)
+            for x in range(0, field_shape[0], tile_size[0])
+            for y in range(0, field_shape[1], tile_size[1])
+        ]
+
+        pending[index] = {
+            "shape": field_shape,
+            "output": None,
+            "weights": None,
+            "tiles_left": len(corners),
+        }
+
+        for x, y in corners:
+            rows = _reflect_indices(x, tile_shape[0], field_shape[0])
+            cols = _reflect_indices(y, tile_shape[1], field_shape[1])
+            batch[len(batch_tiles)] = image[np.ix_(rows, cols)]
+            batch_tiles.append((index, x, y))
+
+            if len(batch_tiles) == batch_size:
+                predict_batch()
+                yield from pop_finished()
+
+    if batch_tiles:
+        predict_batch()
+    yield from pop_finished()
+
+
+def predict_tiled(model, images, **kwargs):
+    """Stains a field or a list of fields.
+
+    Convenience wrapper around `iter_predict_tiled`. Accepts the same keyword
+    arguments.
+
+    Parameters
+    ----------
+    model : keras.Model
+        The stainer, typically returned by `apido.load_model`.
+    images : array_like or list of array_like
+        A single field of shape (height, width, channels) or a list of fields.
+
+    Returns
+    -------
+    ndarray or list of ndarray
+        The stained field, or a list of stained fields if a list was passed.
+    """
+
+    if isinstance(images, np.ndarray) and images.ndim <= 3:
+        return next(iter_predict_tiled(model, [images], **kwargs))
+
+    return list(iter_predict_tiled(model, images, **kwargs))
+
+
+def _split_input_normalization(model):
+    # Splits a model starting with a Lambda layer, which only the Lambda layer
+    # reads the input of, into the Lambda layer and the rest of the model.
+    # Returns None and the model if it does not start with such a layer.
+    from tensorflow import keras
+
+    if not isinstance(model, keras.Model) or len(model.inputs) != 1:
+        return None, model
+
+    input_layer = model.inputs[0]._keras_history.layer
+    consumers = [node.outbound_layer for node in input_layer.outbound_nodes]
+    if len(consumers) != 1 or not isinstance(consumers[0], keras.layers.Lambda):
+        return None, model
+
+    normalization = consumers[0]
+    try:
+        body = keras.Model(normalization.output, model.outputs)
+    except ValueError:
+        return None, model
+    return normalization, body
+
+
+def _reflect_indices(start, size, length):
+    # Indexes of `size` pixels starting at `start`, mirrored at the edges
+    # of an axis of `length` pixels (same as numpy pad mode "reflect").
+    indices = np.arange(start, start + size)
+    if length == 1:
+        return np.zeros_like(indices)
+
+    period = 2 * (length - 1)
+    indices = np.abs(indices) % period
+    return np.where(indices >= length, period - indices, indices)
@@ -0,0 +1,240 @@
+"""Indexed manifest of the images in a plate folder.
+
+Image file names follow the structure
+
+.. codeblock:
+
+   AssayPlate_Greiner_#655090_{well}_T0001F{site}L01A0{action}Z0{z}C0{channel}.tif
+
+The folder is listed once and every file name is parsed into a columnar index
+of well, site, action, z and channel. The index is saved next to the data,
+stamped with the modification time of the folder, and reused for as long as
+the folder keeps that modification time.
+
+Classes
+-------
+PlateManifest
+    Columnar index of the images in a plate folder.
+"""
+
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+_index_name = ".apido_plate_index.npz"
+
+_file_name_pattern = re.compile(
+    r"_(?P<well>[A-Z][0-9]{2})_T[0-9]{4}F(?P<site>[0-9]{3})L[0-9]{2}"
+    r"A(?P<action>[0-9]{2})Z(?P<z>[0-9]{2})C(?P<channel>[0-9]{2})\.tif$"
+)
+
+_columns = ("well", "site", "action", "z", "channel", "file_name")
+
+
+class PlateManifest:
+    """Columnar index of the images in a plate folder.
+
+    Parameters
+    ----------
+    folder : str
+        The plate folder.
+    index_path : str, optional
+        Where to persist the index. Defaults to a hidden file in `folder`.
+        Set to False to never persist the index.
+    rebuild : bool
+        If True, ignore any persisted index.
+
+    Attributes
+    ----------
+    well, site : ndarray of str
+        Well (e.g. "B03") and site (e.g. "001") of each image.
+    action, z, channel : ndarray of int
+        Action, z-plane and channel of each image.
+    file_name : ndarray of str
+        File name of each image, relative to `folder`.
+    """
+
+    def __init__(self, folder, index_path=None, rebuild=False):
+        self.folder = os.path.normpath(folder)
+
+        if index_path is None:
+            index_path = os.path.join(self.folder, _index_name)
+        self.index_path = index_path
+
+        if rebuild or not self._load():
+            self._build()
+            self._save()
+
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.file_name)
+
+    @property
+    def path(self):
+        """Full path to each image."""
+        return np.array([os.path.join(self.folder, f) for f in self.file_name])
+
+    def select(self, well=None, site=None, action=None, z=None, channel=None):
+        """Boolean mask of the images matching all given conditions.
+
+        Each condition can be a single value or a list of accepted values.
+
+        Returns
+        -------
+        ndarray of bool
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in (
+            ("well", well),
+            ("site", site),
+            ("action", action),
+            ("z", z),
+            ("channel", channel),
+        ):
+            if value is None:
+                continue
+            if column == "site":
+                value = _format_site(value)
+            mask &= np.isin(getattr(self, column), value)
+
+        return mask
+
+    def wells_and_sites(self, **conditions):
+        """Sorted list of unique (well, site) pairs.
+
+        Parameters
+        ----------
+        **conditions
+            Only include images matching these conditions, see `select`.
+
+        Returns
+        -------
+        list of (str, str)
+        """
+
+        mask = self.select(**conditions)
+        return sorted(set(zip(self.well[mask], self.site[mask])))
+
+    def get_path(self, well, site, action, z=1, channel=None):
+        """Path to a single image.
+
+        Parameters
+        ----------
+        well : str
+        site : str or int
+        action : int
+        z : int
+        channel : int, optional
+            Defaults to `action`.
+
+        Raises
+        ------
+        KeyError
+            If no such image exists in the folder.
+        """
+
+        if self._lookup is None:
+            self._lookup = {
+                key: index
+                for index, key in enumerate(
+                    zip(
+                        self.well,
+                        self.site,
+                        self.action.tolist(),
+                        self.z.tolist(),
+                        self.channel.tolist(),
+                    )
+                )
+            }
+
+        if channel is None:
+            channel = action
+
+        index = self._lookup[(well, _format_site(site), action, z, channel)]
+        return os.path.join(self.folder, self.file_name[index])
+
+    def get_paths(self, well, site, action, z=(1,), channel=None):
+        """Paths to a stack of images, one for each value in `z`."""
+        return [self.get_path(well, site, action, z_i, channel) for z_i in z]
+
+    def _build(self):
+        rows = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                match = _file_name_pattern.search(entry.name)
+                if match:
+                    rows.append(
+                        (
+                            match.group("well"),
+                            match.group("site"),
+                            int(match.group("action")),
+                            int(match.group("z")),
+                            int(match.group("channel")),
+                            entry.name,
+                        )
+                    )
+        rows.sort()
+
+        columns = list(zip(*rows)) or [()] * len(_columns)
+        self.well = np.array(columns[0], dtype="U3")
+        self.site = np.array(columns[1], dtype="U3")
+        self.action = np.array(columns[2], dtype=np.int8)
+        self.z = np.array(columns[3], dtype=np.int8)
+        self.channel = np.array(columns[4], dtype=np.int8)
+        self.file_name = np.array(columns[5], dtype=str)
+
+    def _load(self):
+        # Loads the persisted index if the folder is unchanged since it was saved.
+        if not self.index_path:
+            return False
+
+        try:
+            if os.stat(self.index_path).st_mtime_ns != os.stat(self.folder).st_mtime_ns:
+                return False
+
+            with np.load(self.index_path, allow_pickle=False) as index:
+                for column in _columns:
+                    setattr(self, column, index[column])
+        except (OSError, KeyError, ValueError):
+            return False
+
+        return True
+
+    def _save(self):
+        # Saving is best-effort, the folder may be read only.
+        if not self.index_path:
+            return
+
+        try:
+            handle, temporary_path = tempfile.mkstemp(
+                suffix=".npz", dir=os.path.dirname(self.index_path)
+            )
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(handle, "wb") as f:
+                np.savez(f, **{column: getattr(self, column) for column in _columns})
+            os.replace(temporary_path, self.index_path)
+
+            # Moving the index into the folder modifies the folder. The index
+            # is stamped with the resulting modification time of the folder.
+            os.utime(
+                self.index_path,
+                ns=(time.time_ns(), os.stat(self.folder).st_mtime_ns),
+            )
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+def _format_site(site):
+    # Sites are indexed as zero-padded strings of length 3.
+    if isinstance(site, (list, tuple, np.ndarray)):
+        return [_format_site(s) for s in site]
+    return "{0:0>3}".format(site)
@@ -0,0 +1,406 @@
+"""Command line tool for staining plates with a pretrained virtual stainer.
+
+Reading, staining and writing run concurrently. A pool of reader threads
+loads and offset-corrects the brightfield stacks of upcoming sites while the
+model stains the current batch, and a pool of writer threads saves the
+stains. The stages are linked by bounded queues, so a plate is streamed
+through at the throughput of the model without ever being held in memory.
+
+Usage
+-----
+.. codeblock:
+
+   python -m apido.stain DATASET_PATH OUTPUT_PATH --magnification 20x
+
+Functions
+---------
+brightfield_pipeline(dataset_path, magnification)
+    Creates the feature that loads and offset-corrects a brightfield stack.
+stain_plate(model, dataset_path, output_path, magnification, ...)
+    Stains every site in a dataset folder.
+main(argv)
+    Entry point of the command line tool.
+"""
+
+import argparse
+import collections
+import os
+import queue
+import threading
+from timeit import default_timer as timer
+
+import numpy as np
+
+from . import deeptrack as dt
+from .plate import PlateManifest
+
+file_name_struct = "AssayPlate_Greiner_#655090_{0}_T0001F{1}L01A0{2}Z0{3}C0{2}.tif"
+
+# Affine transformation parameters of the offset correction (precalculated,
+# see report). `site_angle` is the angle between consecutive sites.
+_offset_parameters = {
+    "20x": {
+        "Ax": 3.9549,
+        "Bx": 0.06653,
+        "x": -1.22169,
+        "Ay": -0.1979,
+        "By": -4.0921,
+        "y": 0.7653,
+        "scale": 0.9988,
+        "sign": -1,
+        "site_angle": np.pi / 3,
+    },
+    "40x": {
+        "Ax": 2.4922,
+        "Bx": -0.03039,
+        "x": -0.9588,
+        "Ay": -0.16666,
+        "By": -2.59577,
+        "y": 0.61792,
+        "scale": 0.99958,
+        "sign": -1,
+        "site_angle": np.pi / 4,
+    },
+    "60x": {
+        "Ax": 2.3054,
+        "Bx": -0.0315,
+        "x": -0.8363,
+        "Ay": -0.1352,
+        "By": -2.3049,
+        "y": 0.8081,
+        "scale": 0.99975,
+        "sign": 1,
+        "site_angle": np.pi / 6,
+    },
+}
+
+# Signals that a reader has run out of sites.
+_DONE = object()
+
+
+def brightfield_pipeline(dataset_path, magnification, manifest=None):
+    """Creates the feature that loads and offset-corrects a brightfield stack.
+
+    The well and site to load are passed as arguments to `update`, e.g.
+    `pipeline.update(well="B03", site="001").resolve()`. The output is padded
+    to a multiple of 32, and the padding can be undone using the property
+    `undo_padding`.
+
+    Parameters
+    ----------
+    dataset_path : str
+        Folder containing the images.
+    magnification : str
+        One of "20x", "40x" or "60x".
+    manifest : PlateManifest, optional
+        Index of `dataset_path`. If given, paths are looked up in the index
+        instead of being formatted from the file name structure.
+
+    Returns
+    -------
+    Feature
+    """
+
+    parameters = _offset_parameters[magnification]
+    Ax, Bx, x = parameters["Ax"], parameters["Bx"], parameters["x"]
+    Ay, By, y = parameters["Ay"], parameters["By"], parameters["y"]
+    sign, site_angle = parameters["sign"], parameters["site_angle"]
+
+    root = dt.DummyFeature(well=None, site=None)
+
+    if manifest is not None:
+        brightfield_loader = dt.LoadImage(
+            **root.properties,
+            path=lambda well, site: manifest.get_paths(well, site, 4, z=range(1, 8)),
+        )
+    else:
+        brightfield_loader = dt.LoadImage(
+            **root.properties,
+            file_names=lambda well, site: [
+                file_name_struct.format(well, site, 4, z) for z in range(1, 8)
+            ],
+            path=lambda file_names: [
+                os.path.join(dataset_path, file_name) for file_name in file_names
+            ],
+        )
+
+    ensure_padded = dt.PadToMultiplesOf(multiple=(32, 32, None))
+
+    correct_offset = dt.Affine(
+        translate=lambda angle: (
+            (np.cos(angle) * Bx + np.sin(angle) * Ax + x) * sign,
+            (np.cos(angle) * By + np.sin(angle) * Ay + y) * sign,
+        ),
+        scale=parameters["scale"],
+        angle=lambda site: (int(site) - 1) * site_angle,
+        **root.properties,
+    )
+
+    return brightfield_loader + ensure_padded + correct_offset
+
+
+def stain_plate(
+    model,
+    dataset_path,
+    output_path,
+    magnification,
+    wells_and_sites=None,
+    batch_size=1,
+    num_readers=2,
+    num_writers=3,
+    prefetch=4,
+    tile_size=None,
+    halo=32,
+    verbose=1,
+):
+    """Stains every site in a dataset folder.
+
+    Parameters
+    ----------
+    model : keras.Model
+        The stainer, typically returned by `apido.load_model`.
+    dataset_path : str
+        Folder containing the brightfield images.
+    output_path : str
+        Folder to save the stains to.
+    magnification : str
+        One of "20x", "40x" or "60x".
+    wells_and_sites : list of (str, str), optional
+        Sites to stain. By default, every site found in `dataset_path`.
+    batch_size : int
+        Number of sites (or tiles, if `tile_size` is set) stained at once.
+        Sites are only batched together if the input normalization of the
+        model can be applied to each site separately.
+    num_readers : int
+        Number of threads loading brightfield stacks.
+    num_writers : int
+        Number of threads saving stains.
+    prefetch : int
+        Maximum number of loaded sites and of stained sites waiting in each
+        queue.
+    tile_size : int, optional
+        If set, sites are stained tile by tile using
+        `apido.iter_predict_tiled`.
+    halo : int
+        Context around each tile. Only used if `tile_size` is set.
+    verbose : int
+        Whether to print progress.
+
+    Returns
+    -------
+    int
+        The number of sites stained.
+    """
+
+    manifest = PlateManifest(dataset_path)
+    if wells_and_sites is None:
+        wells_and_sites = manifest.wells_and_sites(action=4, z=1)
+
+    os.makedirs(output_path, exist_ok=True)
+    output_format = os.path.join(output_path, file_name_struct)
+
+    sites_to_load = queue.Queue()
+    for well_and_site in wells_and_sites:
+        sites_to_load.put(well_and_site)
+
+    loaded_sites = queue.Queue(maxsize=prefetch)
+    stained_sites = queue.Queue(maxsize=prefetch)
+    writer_errors = []
+
+    def reader():
+        pipeline = brightfield_pipeline(dataset_path, magnification, manifest)
+        try:
+            while True:
+                try:
+                    well, site = sites_to_load.get_nowait()
+                except queue.Empty:
+                    break
+
+                brightfield = pipeline.update(well=well, site=site).resolve()
+                undo_padding = brightfield.get_property("undo_padding")
+                loaded_sites.put((well, site, np.asarray(brightfield), undo_padding))
+        except Exception as e:
+            loaded_sites.put(e)
+        finally:
+            loaded_sites.put(_DONE)
+
+    def writer():
+        from PIL import Image
+
+        while True:
+            item = stained_sites.get()
+            if item is _DONE:
+                break
+
+            well, site, prediction = item
+            try:
+                for action in range(prediction.shape[-1]):
+                    file_path = output_format.format(well, site, action + 1, 1)
+                    Image.fromarray(prediction[..., action].astype(np.uint16)).save(
+                        file_path
+                    )
+                if verbose > 0:
+                    print("Saved stains of well {0}, site {1}".format(well, site))
+            except Exception as e:
+                writer_errors.append(e)
+
+    readers = [threading.Thread(target=reader, daemon=True) for _ in range(num_readers)]
+    writers = [threading.Thread(target=writer, daemon=True) for _ in range(num_writers)]
+    for thread in readers + writers:
+        thread.start()
+
+    def loaded():
+        # Yields loaded sites until all readers are done.
+        readers_left = num_readers
+        while readers_left:
+            item = loaded_sites.get()
+            if item is _DONE:
+                readers_left -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+
+    def batches():
+        batch = []
+        for item in loaded():
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def save(well, site, prediction, undo_padding):
+        prediction = np.asarray(prediction)
+        if undo_padding is not None:
+            prediction = prediction[undo_padding]
+        stained_sites.put((well, site, prediction))
+
+    num_stained = 0
+    start = timer()
+    try:
+        if tile_size:
+            from .inference import iter_predict_tiled
+
+            # Outputs are yielded in input order, after the input is consumed
+            in_flight = collections.deque()
+
+            def brightfields():
+                for well, site, brightfield, undo_padding in loaded():
+                    in_flight.append((well, site, undo_padding))
+                    yield brightfield
+
+            for prediction in iter_predict_tiled(
+                model,
+                brightfields(),
+                tile_size=tile_size,
+                halo=halo,
+                batch_size=batch_size,
+            ):
+                well, site, undo_padding = in_flight.popleft()
+                save(well, site, prediction, undo_padding)
+                num_stained += 1
+
+        else:
+            from .inference import _split_input_normalization
+
+            # The stainers normalize their input by the statistics of the
+            # batch, so sites are only batched once normalized one by one.
+            normalization, body = _split_input_normalization(model)
+
+            for batch in batches():
+                wells, sites, brightfields, undo_paddings = zip(*batch)
+
+                if normalization is None:
+                    predictions = [
+                        model.predict_on_batch(b[np.newaxis])[0] for b in brightfields
+                    ]
+                else:
+                    brightfields = [
+                        np.asarray(normalization(b[np.newaxis].astype(np.float32)))
+                        for b in brightfields
+                    ]
+                    if all(b.shape == brightfields[0].shape for b in brightfields):
+                        predictions = body.predict_on_batch(
+                            np.concatenate(brightfields)
+                        )
+                    else:
+                        predictions = [
+                            body.predict_on_batch(b)[0] for b in brightfields
+                        ]
+
+                for item in zip(wells, sites, predictions, undo_paddings):
+                    save(*item)
+                    num_stained += 1
+
+    finally:
+        for _ in writers:
+            stained_sites.put(_DONE)
+        for thread in writers:
+            thread.join()
+
+    if writer_errors:
+        raise writer_errors[0]
+
+    if verbose > 0:
+        print(
+            "Stained {0} sites in {1:.1f} seconds".format(num_stained, timer() - start)
+        )
+
+    return num_stained
+
+
+def main(argv=None):
+    """Entry point of the command line tool.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Command line arguments. Defaults to `sys.argv`.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m apido.stain",
+        description="Virtually stain every site in a folder of brightfield images.",
+    )
+    parser.add_argument("dataset_path", help="Folder containing the input images.")
+    parser.add_argument("output_path", help="Folder to save the stains to.")
+    parser.add_argument(
+        "-m", "--magnification", default="20x", choices=("20x", "40x", "60x")
+    )
+    parser.add_argument(
+        "--model", default=None, help="Defaults to models/{magnification}."
+    )
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--tile-size", type=int, default=None)
+    parser.add_argument("--halo", type=int, default=32)
+    parser.add_argument("-q", "--quiet", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    from .utils import load_model
+
+    model_path = args.model or os.path.join("models", args.magnification)
+    model = load_model(os.path.abspath(model_path))
+
+    stain_plate(
+        model,
+        os.path.normpath(args.dataset_path),
+        os.path.normpath(args.output_path),
+        args.magnification,
+        batch_size=args.batch_size,
+        num_readers=args.readers,
+        num_writers=args.writers,
+        prefetch=args.prefetch,
+        tile_size=args.tile_size,
+        halo=args.halo,
+        verbose=0 if args.quiet else 1,
+    )
+
+
+if __name__ == "__main__":
+    main()
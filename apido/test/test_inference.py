@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras import backend as K
+
+from .. import inference
+
+
+def _stainer():
+    # Same input normalization as the stainers, followed by two convolutions,
+    # which see at most 2 pixels away.
+    model_input = keras.Input((None, None, 7))
+    layer = keras.layers.Lambda(lambda x: K.tanh((x - K.mean(x)) / K.std(x)))(
+        model_input
+    )
+    layer = keras.layers.Conv2D(8, 3, padding="same", activation="relu")(layer)
+    layer = keras.layers.Conv2D(3, 3, padding="same")(layer)
+    return keras.Model(model_input, layer)
+
+
+def _field(shape, offset=0, scale=1, seed=0):
+    rng = np.random.RandomState(seed)
+    return (rng.rand(*shape, 7) * scale + offset).astype(np.float32)
+
+
+class TestPredictTiled(unittest.TestCase):
+    def setUp(self):
+        keras.utils.set_random_seed(0)
+        self.model = _stainer()
+        self.kwargs = dict(tile_size=16, halo=8, batch_size=3)
+
+    def predict_whole(self, model, field):
+        return np.asarray(model.predict_on_batch(field[np.newaxis]))[0]
+
+    def test_tiled_equals_untiled(self):
+        field = _field((50, 70))
+        expected = self.predict_whole(self.model, field)
+        output = inference.predict_tiled(self.model, field, **self.kwargs)
+
+        # Context outside the field is mirrored by the tiler and zero padded
+        # by the convolutions, so the pixels closest to the edges differ.
+        np.testing.assert_allclose(
+            output[2:-2, 2:-2], expected[2:-2, 2:-2], rtol=1e-4, atol=1e-5
+        )
+
+    def test_fields_are_independent(self):
+        # Fields with different statistics share batches.
+        first = _field((50, 70))
+        second = _field((40, 40), offset=10, scale=5, seed=1)
+
+        alone = inference.predict_tiled(self.model, first, **self.kwargs)
+        together = inference.predict_tiled(self.model, [second, first], **self.kwargs)
+        expected = self.predict_whole(self.model, second)
+
+        np.testing.assert_allclose(together[1], alone, rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(
+            together[0][2:-2, 2:-2], expected[2:-2, 2:-2], rtol=1e-4, atol=1e-5
+        )
+
+    def test_nested_normalization(self):
+        # The normalization cannot be split off a nested model. Tiles of
+        # different fields are then not batched together.
+        model_input = keras.Input((None, None, 7))
+        nested = keras.Model(model_input, self.model(model_input))
+        normalization, _ = inference._split_input_normalization(nested)
+        self.assertIsNone(normalization)
+
+        first = _field((50, 70))
+        second = _field((40, 40), offset=10, scale=5, seed=1)
+
+        alone = inference.predict_tiled(nested, first, **self.kwargs)
+        together = inference.predict_tiled(nested, [second, first], **self.kwargs)
+        np.testing.assert_array_equal(together[1], alone)
+
+
+if __name__ == "__main__":
+    unittest.main()